@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+#  coding=utf-8
+
+import time
+import resource
+import argparse
+import multiprocessing
+from copy import deepcopy
+
+from rdkit import Chem
+from rdkit.Chem import AllChem
+
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+
+_LP = LigandPreparationEnum()
+
+_MODE_DEEP = "deep"
+_MODE_COW = "cow"
+
+
+def build_pool(number_ligands: int) -> list:
+    template = Chem.AddHs(Chem.MolFromSmiles("CCCCn1c(Cc2cc(OC)c(OC)c(OC)c2)nc2c(N)ncnc21"))
+    AllChem.EmbedMolecule(template, randomSeed=42)
+    return [Ligand(smile="CCCCn1c(Cc2cc(OC)c(OC)c(OC)c2)nc2c(N)ncnc21", ligand_number=number,
+                   molecule=Chem.Mol(template), mol_type=_LP.TYPE_RDKIT) for number in range(number_ligands)]
+
+
+def docking_run(pool: list, number_conformers: int, mode: str):
+    # mirrors the copies made along a docking run: pool -> docker, poses -> result parser, poses -> output
+    copy = deepcopy if mode == _MODE_DEEP else (lambda lig: lig.get_clone())
+    ligands = [copy(lig) for lig in pool]
+    for ligand in ligands:
+        for _ in range(number_conformers):
+            ligand.add_conformer(Chem.Mol(ligand.get_molecule()))
+        ligand.add_tags_to_conformers()
+    parsed = [copy(lig) for lig in ligands]
+    written = [copy(lig) for lig in ligands]
+    return len(parsed) + len(written)
+
+
+def measure(number_ligands: int, number_conformers: int, number_runs: int, mode: str, queue):
+    pool = build_pool(number_ligands)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for _ in range(number_runs):
+        docking_run(pool, number_conformers, mode)
+    queue.put((time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before))
+
+
+if __name__ == "__main__":
+
+    # get the input parameters and parse them
+    parser = argparse.ArgumentParser(description="Compares deep copies and copy-on-write clones of ligands along the copies made in a docking run.")
+    parser.add_argument("-ligands", type=int, default=10000, help="The number of ligands in the pool.")
+    parser.add_argument("-conformers", type=int, default=5, help="The number of poses per ligand.")
+    parser.add_argument("-runs", type=int, default=3, help="The number of docking runs using the pool.")
+    args = parser.parse_args()
+
+    # every mode is measured in a fresh process, as the peak RSS of a process never decreases
+    for mode in [_MODE_DEEP, _MODE_COW]:
+        queue = multiprocessing.Queue()
+        p = multiprocessing.Process(target=measure, args=(args.ligands, args.conformers, args.runs, mode, queue))
+        p.start()
+        duration, rss_increase = queue.get()
+        p.join()
+        print(f"{mode:>5}: {duration / args.runs:.2f} s per docking run, peak RSS increase {rss_increase / 1024:.1f} MiB")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+#  coding=utf-8
+
+import time
+import argparse
+import tracemalloc
+import multiprocessing
+
+import dockstream.core.ligand.ligand as ligand_module
+from dockstream.core.ligand.ligand import Ligand
+
+# the variants compared: (use "__slots__", intern names and original smiles)
+_VARIANTS = [(False, False), (False, True), (True, False), (True, True)]
+
+
+def get_ligand_class(use_slots: bool, use_interning: bool):
+    # the variants are built from the current "Ligand" class, so that only the memory layout differs; this is meant
+    # to be called in a fresh process, as the module is changed (e.g. clones have to be of the same variant)
+    if not use_interning:
+        ligand_module._intern = lambda value: value
+    if use_slots:
+        return Ligand
+    excluded = set(Ligand.__slots__) | {"__slots__", "__dict__", "__weakref__"}
+    ligand_class = type(Ligand.__name__, (), {key: value for key, value in vars(Ligand).items() if key not in excluded})
+    ligand_module.Ligand = ligand_class
+    return ligand_class
+
+
+def build_ligands(ligand_class, number_ligands: int, number_enumerations: int) -> list:
+    # every ligand is expanded into several enumerations, sharing name and original smile (as after stereo-enumeration);
+    # the strings are built per enumeration, as they would be when parsed from the input or the embedding output
+    ligands = []
+    for ligand_number in range(number_ligands):
+        for enumeration in range(number_enumerations):
+            original_smile = "".join(["CCCCn1c(Cc2cc(OC)c(OC)c(OC)c2)nc2c(N)ncnc21", "C" * (ligand_number % 10)])
+            ligands.append(ligand_class(smile=original_smile,
+                                        original_smile=original_smile,
+                                        ligand_number=ligand_number,
+                                        enumeration=enumeration,
+                                        name="".join(["compound_", str(ligand_number % 1000)])))
+    return ligands
+
+
+def measure(number_ligands: int, number_enumerations: int, use_slots: bool, use_interning: bool, queue):
+    ligand_class = get_ligand_class(use_slots, use_interning)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    ligands = build_ligands(ligand_class, number_ligands, number_enumerations)
+    time_creation = time.perf_counter() - start
+    memory_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    clones = [ligand.get_clone() for ligand in ligands]
+    time_cloning = time.perf_counter() - start
+    queue.put((len(ligands), memory_current, time_creation, time_cloning))
+
+
+if __name__ == "__main__":
+
+    # get the input parameters and parse them
+    parser = argparse.ArgumentParser(description="Compares memory footprint and allocation time of \"Ligand\" objects with and without \"__slots__\" and interning.")
+    parser.add_argument("-ligands", type=int, default=100000, help="The number of ligands.")
+    parser.add_argument("-enumerations", type=int, default=4, help="The number of enumerations per ligand.")
+    args = parser.parse_args()
+
+    # every variant is measured in a fresh process, as the "Ligand" class is changed for it
+    print(f"{'__slots__':>9} {'interning':>9} {'memory (MiB)':>13} {'bytes/object':>13} {'creation (us)':>14} {'cloning (us)':>13}")
+    for use_slots, use_interning in _VARIANTS:
+        queue = multiprocessing.Queue()
+        p = multiprocessing.Process(target=measure, args=(args.ligands, args.enumerations, use_slots, use_interning,
+                                                          queue))
+        p.start()
+        number_objects, memory_current, time_creation, time_cloning = queue.get()
+        p.join()
+        print(f"{str(use_slots):>9} {str(use_interning):>9} {memory_current / 2 ** 20:>13.1f} "
+              f"{memory_current / number_objects:>13.0f} {time_creation / number_objects * 1e6:>14.2f} "
+              f"{time_cloning / number_objects * 1e6:>13.2f}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#  coding=utf-8
+
+import time
+import argparse
+
+import pandas as pd
+from rdkit import Chem
+
+from dockstream.core.AutodockVina.AutodockVina_docker import AutodockVina, AutodockVinaParameters, SearchSpace
+from dockstream.core.Schrodinger.Glide_docker import Parallelization
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+from dockstream.utils.smiles import to_smiles
+
+_LP = LigandPreparationEnum()
+
+
+def load_ligands(path: str) -> list:
+    return [Ligand(smile=to_smiles(mol), original_smile=to_smiles(mol), ligand_number=number, enumeration=0,
+                   molecule=mol, mol_type=_LP.TYPE_RDKIT)
+            for number, mol in enumerate(Chem.SDMolSupplier(path, removeHs=False)) if mol is not None]
+
+
+def dock(engine: str, ligands: list, args) -> tuple:
+    docker = AutodockVina(input_pools=["benchmark"],
+                          parameters=AutodockVinaParameters(
+                              engine=engine,
+                              prefix_execution=args.prefix_execution,
+                              parallelization=Parallelization(number_cores=args.cores),
+                              receptor_pdbqt_path=[args.receptor],
+                              number_poses=1,
+                              seed=args.seed,
+                              search_space=SearchSpace(center_x=args.center[0], center_y=args.center[1],
+                                                       center_z=args.center[2], size_x=args.size[0],
+                                                       size_y=args.size[1], size_z=args.size[2])))
+    docker.add_molecules(molecules=[ligand.get_clone() for ligand in ligands])
+    start = time.perf_counter()
+    docker.dock()
+    return time.perf_counter() - start, docker.get_scores(best_only=True)
+
+
+if __name__ == "__main__":
+
+    # get the input parameters and parse them
+    parser = argparse.ArgumentParser(description="Compares the speed and the scores of the AutoDock Vina-compatible engines on a reference ligand set.")
+    parser.add_argument("-receptor", type=str, required=True, help="A path to the receptor PDBQT.")
+    parser.add_argument("-ligands", type=str, required=True, help="A path to an SDF file with the embedded reference ligands.")
+    parser.add_argument("-center", type=float, nargs=3, required=True, help="The center (x, y, z) of the box.")
+    parser.add_argument("-size", type=float, nargs=3, required=True, help="The edge lengths (x, y, z) of the box.")
+    parser.add_argument("-engines", type=str, nargs='+', default=["vina", "qvina2", "qvina-w", "smina"],
+                        help="The engines to compare; the first one is the reference for the score correlation.")
+    parser.add_argument("-cores", type=int, default=4, help="The number of cores used by every engine.")
+    parser.add_argument("-seed", type=int, default=42, help="The seed handed over to every engine.")
+    parser.add_argument("-prefix_execution", type=str, default=None, help="A command executed before every engine call (e.g. \"module load ...\").")
+    parser.add_argument("-csv", type=str, default=None, required=False, help="If set, the best score of every ligand and engine is written to this CSV file.")
+    args = parser.parse_args()
+
+    ligands = load_ligands(args.ligands)
+    durations = {}
+    scores = pd.DataFrame(index=range(len(ligands)))
+    for engine in args.engines:
+        durations[engine], engine_scores = dock(engine, ligands, args)
+        scores[engine] = pd.to_numeric(pd.Series(engine_scores), errors="coerce")
+
+    # report: wall time, speed-up and score correlation with the reference engine (ligands docked by both only)
+    reference = args.engines[0]
+    print(f"{'engine':>8} {'time [s]':>10} {'speed-up':>9} {'pearson':>8} {'spearman':>9} {'docked':>7}")
+    for engine in args.engines:
+        pairs = scores[[reference, engine]].dropna()
+        print(f"{engine:>8} {durations[engine]:>10.1f} {durations[reference] / durations[engine]:>9.2f} "
+              f"{pairs[reference].corr(pairs[engine], method='pearson'):>8.3f} "
+              f"{pairs[reference].corr(pairs[engine], method='spearman'):>9.3f} "
+              f"{scores[engine].notna().sum():>7d}")
+
+    if args.csv is not None:
+        scores.to_csv(path_or_buf=args.csv, sep=',', na_rep='', header=True, index_label="ligand_number")
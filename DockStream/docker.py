@@ -3,8 +3,11 @@
 
 import os
 import sys
+import time
 import warnings
 import argparse
+import functools
+import multiprocessing
 
 from dockstream.containers.docking_container import DockingContainer
 
@@ -13,9 +16,12 @@ from dockstream.core.OpenEye.OpenEye_docker import OpenEye
 from dockstream.core.Schrodinger.Glide_docker import Glide
 from dockstream.core.AutodockVina.AutodockVina_docker import AutodockVina
 from dockstream.core.OpenEyeHybrid.OpenEyeHybrid_docker import OpenEyeHybrid
+from dockstream.core.pose_archive import is_pose_archive_path
 
 from dockstream.utils.entry_point_functions.header import initialize_logging, set_environment
-from dockstream.utils.entry_point_functions.embedding import embed_ligands
+from dockstream.utils.entry_point_functions.output_writer import OutputWriter
+from dockstream.utils.entry_point_functions.pool_scheduler import PoolScheduler
+from dockstream.utils.entry_point_functions.streaming import is_streamable, stream_docking
 from dockstream.utils.entry_point_functions.write_out import handle_poses_writeout, handle_score_printing, \
                                                          handle_scores_writeout
 
@@ -24,12 +30,16 @@ from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
 from dockstream.utils.enums.logging_enums import LoggingConfigEnum
 
 from dockstream.utils.files_paths import attach_root_path
+from dockstream.utils.general_utils import nested_get
 from dockstream.utils.argparse_bool_extension import str2bool
 from dockstream.utils.dockstream_exceptions import *
 
 
 if __name__ == "__main__":
 
+    # the deadline (if specified) is counted from the start of the process
+    start_time = time.time()
+
     # enums
     _LE = LoggingConfigEnum()
     _LP = LigandPreparationEnum()
@@ -49,12 +59,22 @@ if __name__ == "__main__":
     parser.add_argument("-input_csv", type=str, default=None, help="If set (a path to a CSV file), this will overwrite any input file specification in the configuration.")
     parser.add_argument("-input_csv_smiles_column", type=str, default=None, help="If \"-input_csv\" is set, you need to specify the column name with the smiles as well.")
     parser.add_argument("-input_csv_names_column", type=str, default=None, help="Optional name of the name column, if \"-input_csv\" is specified.")
+    parser.add_argument("-pool_core_budget", type=int, default=None, help="The number of cores shared by the preparators of all embedding pools, which are built concurrently (default: all cores).")
+    parser.add_argument("-stream_chunk_size", type=int, default=None, help="If set (together with \"-smiles\"), ligands are embedded in chunks of this size on worker processes, while the chunks ready are docked already.")
+    parser.add_argument("-stream_workers", type=int, default=1, help="The number of worker processes embedding chunks when streaming.")
+    parser.add_argument("-stream_max_pending", type=int, default=2, help="The maximum number of chunks embedded ahead of docking when streaming.")
+    parser.add_argument("-deadline_seconds", type=float, default=None, help="If set, docking is stopped this many seconds after the start and all ligands not docked by then get score \"NA\".")
+    parser.add_argument("-async_output", type=str2bool, default=False, help="If set to True, the output of a docking run is written in the background while the next run docks (failures to write are reported with a delay of one run); otherwise, it is written before the next run starts.")
+    parser.add_argument("-output_max_pending", type=int, default=2, help="The maximum number of docking runs, whose output is waiting to be written in the background.")
     args, args_unk = parser.parse_known_args()
 
     if args.conf is None or not os.path.isfile(args.conf):
         raise Exception("Parameter \"-conf\" must be a relative or absolute path to a configuration JSON file.")
     if args.print_scores is False and args.print_all:
         raise Exception("Flag \"-print_scores\" must be activated in order to use \"-print_all\", see help message.")
+    if args.deadline_seconds is not None and args.deadline_seconds <= 0:
+        raise Exception("Parameter \"-deadline_seconds\" must be a positive number.")
+    deadline = None if args.deadline_seconds is None else start_time + args.deadline_seconds
 
     # set the logging configuration according to parameters
     if args.log_conf is None:
@@ -86,10 +106,32 @@ if __name__ == "__main__":
     except Exception as e:
         logger.log(f"Could not load CCDC / Gold docker - if another backend is being used, you can safely ignore this warning. The exception message reads: {get_exception_message(e)}", _LE.WARNING)
 
+    # initialize the docker instance for the backend specified in a docking run
+    def build_docker(docking_run):
+        if docking_run[_DE.BACKEND] == _DE.BACKEND_RDOCK:
+            return rDock(**docking_run)
+        elif docking_run[_DE.BACKEND] == _DE.BACKEND_OPENEYE:
+            return OpenEye(**docking_run)
+        elif docking_run[_DE.BACKEND] == _DE.BACKEND_OPENEYEHYBRID:
+            return OpenEyeHybrid(**docking_run)
+        elif docking_run[_DE.BACKEND] == _DE.BACKEND_GLIDE:
+            return Glide(**docking_run)
+        elif docking_run[_DE.BACKEND] == _DE.BACKEND_GOLD:
+            return Gold(**docking_run)
+        elif docking_run[_DE.BACKEND] == _DE.BACKEND_AUTODOCKVINA:
+            return AutodockVina(**docking_run)
+        else:
+            raise Exception("Backend is unknown.")
+
+    # If single element (from GUI), wrap in a list.
+    if _DE.DOCKING_RUNS in config[_DE.DOCKING].keys() and not isinstance(config[_DE.DOCKING][_DE.DOCKING_RUNS], list):
+        config[_DE.DOCKING][_DE.DOCKING_RUNS] = [config[_DE.DOCKING][_DE.DOCKING_RUNS]]
+
     # ligand preparation: transform SMILES into embedded (and potentially aligned) molecules
     #                     note, that this step is in principle independent from the actual docking
     # ---------
-    dict_pools = {}
+    pool_scheduler = None
+    dict_streamed_dockers = {}
     if _LP.LIGAND_PREPARATION in config[_DE.DOCKING].keys():
 
         # If single element (from GUI), wrap in a list.
@@ -116,76 +158,113 @@ if __name__ == "__main__":
             for pool in pools_list:
                 pool[_LP.INPUT] = new_input
 
-        # ligand preparation is to be performed
-        for pool_number, pool in enumerate(config[_DE.DOCKING][_LP.LIGAND_PREPARATION][_LP.EMBEDDING_POOLS]):
-            logger.log(f"Starting generation of pool {pool[_LP.POOLID]}.", _LE.INFO)
+        # stream: embed ligands in chunks on worker processes and dock each chunk as soon as it is ready
+        pools_list = config[_DE.DOCKING][_LP.LIGAND_PREPARATION][_LP.EMBEDDING_POOLS]
+        stream = args.stream_chunk_size is not None and args.smiles is not None and \
+                 _DE.DOCKING_RUNS in config[_DE.DOCKING].keys()
+        if stream and not is_streamable(pools_list):
+            logger.log("Streaming is only supported for pools with console input, will prepare pools first.", _LE.WARNING)
+            stream = False
+        if stream:
             try:
-                prep = embed_ligands(smiles=args.smiles,
-                                     pool_number=pool_number,
-                                     pool=pool,
-                                     logger=logger,
-                                     ligand_number_start=0)
-                dict_pools[pool[_LP.POOLID]] = prep.get_ligands()
+                dict_streamed_dockers = stream_docking(smiles=args.smiles.split(';'),
+                                                       pools=pools_list,
+                                                       docking_runs=config[_DE.DOCKING][_DE.DOCKING_RUNS],
+                                                       build_docker=build_docker,
+                                                       chunk_size=max(args.stream_chunk_size, 1),
+                                                       number_workers=max(args.stream_workers, 1),
+                                                       max_pending=max(args.stream_max_pending, 1),
+                                                       deadline=deadline,
+                                                       logger=logger)
             except Exception as e:
-                logger.log(f"Failed in constructing pool {pool[_LP.POOLID]}.", _LE.EXCEPTION)
+                logger.log("Failed in streaming ligand preparation and docking.", _LE.EXCEPTION)
                 logger.log(f"Exception reads: {get_exception_message(e)}.", _LE.EXCEPTION)
-                raise LigandPreparationFailed
-            else:
-                logger.log(f"Completed construction of pool {pool[_LP.POOLID]}.", _LE.INFO)
+                raise DockingRunFailed() from e
+
+        # ligand preparation is to be performed: pools are built concurrently (within the core budget) and docking
+        # runs start as soon as the pools they use are ready
+        if not stream:
+            pool_scheduler = PoolScheduler(pools=pools_list,
+                                           smiles=args.smiles,
+                                           core_budget=args.pool_core_budget if args.pool_core_budget is not None
+                                                       else multiprocessing.cpu_count(),
+                                           logger=logger)
+            pool_scheduler.start()
 
     # docking: this is the actual docking step; ligands can be provided by the preparation step specified before or
     #          loaded from files
     # ---------
+    def write_run_output(docking_run, docker):
+        # a pose archive is shared by all steps of a campaign, so the prefix is used as key of the step instead
+        if is_pose_archive_path(nested_get(docking_run, [_DE.OUTPUT, _DE.OUTPUT_POSES, _DE.OUTPUT_POSES_PATH],
+                                           default=None)):
+            docker.set_pose_archive_step(args.output_prefix)
+            handle_poses_writeout(docking_run=docking_run, docker=docker, output_prefix=None)
+        else:
+            handle_poses_writeout(docking_run=docking_run, docker=docker, output_prefix=args.output_prefix)
+        handle_scores_writeout(docking_run=docking_run, docker=docker, output_prefix=args.output_prefix)
+        handle_score_printing(print_scores=args.print_scores,
+                              print_all=args.print_all,
+                              docker=docker,
+                              logger=logger)
+        logger.log(f"Completed docking run {docking_run[_DE.RUN_ID]}.", _LE.INFO)
+
+    output_writer = OutputWriter(logger=logger,
+                                 max_pending=args.output_max_pending,
+                                 asynchronous=args.async_output)
     dict_docking_runs = {}
     if _DE.DOCKING_RUNS in config[_DE.DOCKING].keys():
 
-        # If single element (from GUI), wrap in a list.
-        if not isinstance(config[_DE.DOCKING][_DE.DOCKING_RUNS], list):
-            config[_DE.DOCKING][_DE.DOCKING_RUNS] = [config[_DE.DOCKING][_DE.DOCKING_RUNS]]
-
         # execute the docking runs specified
         for docking_run_number, docking_run in enumerate(config[_DE.DOCKING][_DE.DOCKING_RUNS]):
             logger.log(f"Starting docking run {docking_run[_DE.RUN_ID]}.", _LE.INFO)
             try:
-                if docking_run[_DE.BACKEND] == _DE.BACKEND_RDOCK:
-                    docker = rDock(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_OPENEYE:
-                    docker = OpenEye(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_OPENEYEHYBRID:
-                    docker = OpenEyeHybrid(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_GLIDE:
-                    docker = Glide(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_GOLD:
-                    docker = Gold(**docking_run)
-                elif docking_run[_DE.BACKEND] == _DE.BACKEND_AUTODOCKVINA:
-                    docker = AutodockVina(**docking_run)
+                if docking_run[_DE.RUN_ID] in dict_streamed_dockers:
+                    # the docking has been performed chunk-wise already
+                    docker = dict_streamed_dockers[docking_run[_DE.RUN_ID]]
                 else:
-                    raise Exception("Backend is unknown.")
-
-                # merge all specified pools for this run together
-                if isinstance(docking_run[_DE.INPUT_POOLS], str):
-                    docking_run[_DE.INPUT_POOLS] = [docking_run[_DE.INPUT_POOLS]]
-                for pool_id in docking_run[_DE.INPUT_POOLS]:
-                    cur_pool = [lig.get_clone() for lig in dict_pools.get(pool_id)]
-                    if cur_pool is None or len(cur_pool) == 0:
-                        raise Exception("Could not find pool id during docking run or pool was empty.")
-                    docker.add_molecules(molecules=cur_pool)
-
-                # do the docking
-                docker.dock()
-
-                # if specified, save the poses and the scores and print the scores to "stdout"
-                handle_poses_writeout(docking_run=docking_run, docker=docker, output_prefix=args.output_prefix)
-                handle_scores_writeout(docking_run=docking_run, docker=docker, output_prefix=args.output_prefix)
-                handle_score_printing(print_scores=args.print_scores,
-                                      print_all=args.print_all,
-                                      docker=docker,
-                                      logger=logger)
+                    docker = build_docker(docking_run)
+
+                    # rescoring of existing poses from a file does not use any pools (and thus no embedding)
+                    rescoring_ligands = docker.get_rescoring_ligands()
+                    if rescoring_ligands is not None:
+                        docker.add_molecules(molecules=rescoring_ligands)
+                        docking_run[_DE.INPUT_POOLS] = []
+
+                    # merge all specified pools for this run together
+                    if isinstance(docking_run[_DE.INPUT_POOLS], str):
+                        docking_run[_DE.INPUT_POOLS] = [docking_run[_DE.INPUT_POOLS]]
+                    for pool_id in docking_run[_DE.INPUT_POOLS]:
+                        cur_pool = pool_scheduler.get_ligands(pool_id) if pool_scheduler is not None else None
+                        if cur_pool is None or len(cur_pool) == 0:
+                            raise Exception("Could not find pool id during docking run or pool was empty.")
+                        docker.add_molecules(molecules=[lig.get_clone() for lig in cur_pool])
+
+                    # do the docking (within the deadline, if specified)
+                    docker.set_deadline(deadline)
+                    docker.dock()
+
+                    # add the results for ligands removed as duplicates before embedding (if any)
+                    duplicates = {}
+                    for pool_id in docking_run[_DE.INPUT_POOLS]:
+                        for representative_number, duplicate in pool_scheduler.get_duplicates(pool_id):
+                            duplicates.setdefault(duplicate.get_ligand_number(), (representative_number, duplicate))
+                    docker.expand_duplicates(list(duplicates.values()))
             except Exception as e:
                 logger.log(f"Failed when executing run {docking_run[_DE.RUN_ID]}.", _LE.EXCEPTION)
                 logger.log(f"Exception reads: {get_exception_message(e)}.", _LE.EXCEPTION)
+                output_writer.close()
                 raise DockingRunFailed() from e
-            else:
-                logger.log(f"Completed docking run {docking_run[_DE.RUN_ID]}.", _LE.INFO)
+
+            # if specified, save the poses and the scores and print the scores to "stdout"; this is done in the
+            # background, while the next run is docked
+            output_writer.submit(docking_run[_DE.RUN_ID], functools.partial(write_run_output, docking_run, docker))
+
+    # make sure, that all output has been written
+    output_writer.close()
+
+    # make sure, that all pools (also those not used in any run) have been built
+    if pool_scheduler is not None:
+        pool_scheduler.shutdown()
 
     sys.exit(0)
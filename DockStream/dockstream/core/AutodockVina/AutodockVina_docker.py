@@ -1,8 +1,7 @@
 import os
+import re
 import tempfile
 import shutil
-import multiprocessing
-from copy import deepcopy
 from typing import Optional, List, Any
 
 import rdkit.Chem as Chem
@@ -10,11 +9,19 @@ from pydantic import BaseModel, Field
 from typing_extensions import Literal
 
 from dockstream.core.Schrodinger.Glide_docker import Parallelization
-from dockstream.core.docker import Docker
+from dockstream.core.docker import Docker, SubjobLimits, Rescoring
 from dockstream.core.AutodockVina.AutodockVina_result_parser import AutodockResultParser
+from dockstream.core.AutodockVina.AutodockVina_pdbqt_parser import AutodockVinaPDBQTParser
+from dockstream.core.AutodockVina.AutodockVina_engines import get_engine_adapter
+from dockstream.core.result_ingestion import get_binaries_path, iter_sdf_molecules, read_result_molecules, \
+                                             write_binaries
 from dockstream.utils.enums.logging_enums import LoggingConfigEnum
 from dockstream.utils.execute_external.AutodockVina import AutodockVinaExecutor
+from dockstream.utils.execute_external.execute import Executor
 from dockstream.utils.enums.AutodockVina_enums import AutodockVinaExecutablesEnum, AutodockVinaOutputEnum, AutodockResultKeywordsEnum
+from dockstream.utils.enums.AutodockVina_batch_enums import AutodockVinaBatchEnum
+from dockstream.utils.enums.AutodockVina_engine_enums import AutodockVinaEngineEnum
+from dockstream.utils.enums.rescoring_enums import RescoringEnum
 from dockstream.utils.execute_external.OpenBabel import OpenBabelExecutor
 from dockstream.utils.enums.OpenBabel_enums import OpenBabelExecutablesEnum
 from dockstream.utils.enums.RDkit_enums import RDkitLigandPreparationEnum
@@ -29,6 +36,9 @@ _BEE = OpenBabelExecutablesEnum()
 _LE = LoggingConfigEnum()
 _ROE = AutodockVinaOutputEnum()
 _EE = AutodockVinaExecutablesEnum()
+_VB = AutodockVinaBatchEnum()
+_VE = AutodockVinaEngineEnum()
+_RS = RescoringEnum()
 
 
 class SearchSpace(BaseModel):
@@ -51,6 +61,11 @@ class AutodockVinaParameters(BaseModel):
     search_space: SearchSpace
     seed: int = 42
     number_poses: int = 1
+    subjob_limits: Optional[SubjobLimits] = None
+    native_pose_reader: bool = True
+    batch_mode: bool = False
+    engine: Literal["vina", "qvina2", "qvina-w", "smina"] = "vina"
+    rescoring: Optional[Rescoring] = None
 
     def get(self, key: str) -> Any:
         """Temporary method to support nested_get"""
@@ -64,6 +79,7 @@ class AutodockVina(Docker, BaseModel):
     parameters: AutodockVinaParameters
 
     _ADV_executor: AutodockVinaExecutor = None
+    _engine_executor: Executor = None
     _OpenBabel_executor: OpenBabelExecutor = None
 
     class Config:
@@ -84,6 +100,16 @@ class AutodockVina(Docker, BaseModel):
         self._logger.log(f"Checked AutoDock Vina backend availability (prefix_execution={self.parameters.prefix_execution}).",
                          _LE.DEBUG)
 
+        # the other Vina-compatible engines are called with the generic executor
+        if self.parameters.engine == _VE.ENGINE_VINA:
+            self._engine_executor = self._ADV_executor
+        else:
+            self._engine_executor = Executor(prefix_execution=self.parameters.prefix_execution,
+                                             binary_location=self.parameters.binary_location)
+            if not self._is_engine_available():
+                raise DockingRunFailed(f"Cannot initialize AutoDock Vina docker, as engine {self.parameters.engine} is not available - abort.")
+            self._logger.log(f"Checked availability of engine {self.parameters.engine}.", _LE.DEBUG)
+
         # initialize the executor for all "OpenBabel" related calls and also check if it is available
         # note, that while there is an "OpenBabel" API (python binding) which we also use, the match to the binary
         # options is not trivial; thus, use command-line here
@@ -92,6 +118,25 @@ class AutodockVina(Docker, BaseModel):
             raise DockingRunFailed(
                 "Cannot initialize OpenBabel external library, which should be part of the environment - abort.")
 
+    def _is_engine_available(self) -> bool:
+        try:
+            execution_result = self._engine_executor.execute(command=self._get_engine_adapter().binary,
+                                                             arguments=[_VE.HELP],
+                                                             check=False)
+            return _VE.HELP_IDENTIFICATION_STRING in str(execution_result.stdout)
+        except Exception:
+            return False
+
+    def _get_rescoring(self) -> Optional[Rescoring]:
+        return self.parameters.rescoring
+
+    def _get_engine_adapter(self):
+        return get_engine_adapter(self.parameters.engine)
+
+    def _get_box_size(self):
+        search_space = self.parameters.search_space
+        return search_space.size_x, search_space.size_y, search_space.size_z
+
     def _get_score_from_conformer(self, conformer):
         return float(conformer.GetProp(_RKA.SDF_TAG_SCORE))
 
@@ -139,39 +184,76 @@ class AutodockVina(Docker, BaseModel):
         if not isinstance(sublists, list):
             sublists = [sublists]
 
+        # there is one temporary folder per sublist and one list of input and output paths, identifiers and molecules
+        # (with one element per ligand) for each of them; ligands that failed before are not written
         tmp_output_dirs = []
         tmp_input_paths = []
         tmp_output_paths = []
         ligand_identifiers = []
+        molecules = []
         for start_index, sublist in zip(start_indices, sublists):
-            # for "AutoDock Vina", only single molecules can be handled so every sublist is guaranteed at this stage
-            # to have only one element
-            # TODO: in the course of the redesign of the docking class-backends, also "beautify" this part
+            # generate temporary input files and output directory
+            cur_tmp_output_dir = tempfile.mkdtemp()
+            cur_input_paths, cur_output_paths, cur_identifiers, cur_molecules = [], [], [], []
             for ligand in sublist:
-                # generate temporary input files and output directory
-                cur_tmp_output_dir = tempfile.mkdtemp()
+                if ligand.get_molecule() is None:
+                    continue
                 cur_tmp_input_pdbqt = gen_temp_file(prefix=str(start_index), suffix=".pdbqt", dir=cur_tmp_output_dir)
                 cur_tmp_output_sdf = gen_temp_file(prefix=str(start_index), suffix=".sdf", dir=cur_tmp_output_dir)
 
                 # write-out the temporary input file
-                if ligand.get_molecule() is None:
-                    if os.path.isdir(cur_tmp_output_dir):
-                        shutil.rmtree(cur_tmp_output_dir)
-                    continue
-                mol = deepcopy(ligand.get_molecule())
-                self._write_molecule_to_pdbqt(cur_tmp_input_pdbqt, mol)
-                tmp_output_dirs.append(cur_tmp_output_dir)
-                tmp_input_paths.append(cur_tmp_input_pdbqt)
-                tmp_output_paths.append(cur_tmp_output_sdf)
-                ligand_identifiers.append(ligand.get_identifier())
-
-        return tmp_output_dirs, tmp_input_paths, tmp_output_paths, ligand_identifiers
+                self._write_molecule_to_pdbqt(cur_tmp_input_pdbqt, ligand.get_molecule())
+                cur_input_paths.append(cur_tmp_input_pdbqt)
+                cur_output_paths.append(cur_tmp_output_sdf)
+                cur_identifiers.append(ligand.get_identifier())
+                cur_molecules.append(ligand.get_molecule())
+            if len(cur_input_paths) == 0:
+                if os.path.isdir(cur_tmp_output_dir):
+                    shutil.rmtree(cur_tmp_output_dir)
+                continue
+            tmp_output_dirs.append(cur_tmp_output_dir)
+            tmp_input_paths.append(cur_input_paths)
+            tmp_output_paths.append(cur_output_paths)
+            ligand_identifiers.append(cur_identifiers)
+            molecules.append(cur_molecules)
+
+        return tmp_output_dirs, tmp_input_paths, tmp_output_paths, ligand_identifiers, molecules
+
+    def _get_version(self) -> Optional[tuple]:
+        execution_result = self._ADV_executor.execute(command=_EE.VINA,
+                                                      arguments=[_VB.VINA_VERSION],
+                                                      check=False)
+        match = re.search(_VB.VERSION_PATTERN, str(execution_result.stdout))
+        if match is None:
+            return None
+        return tuple(int(part) if part is not None else 0 for part in match.groups())
+
+    def _use_batch_mode(self) -> bool:
+        if not self.parameters.batch_mode:
+            return False
+        if self.parameters.rescoring is not None:
+            self._logger.log("Batch mode is not supported for rescoring, rescoring ligands one by one.", _LE.WARNING)
+            return False
+        if not self._get_engine_adapter().supports_batch:
+            self._logger.log(f"Engine {self.parameters.engine} does not support batch mode, docking ligands one by one.",
+                             _LE.WARNING)
+            return False
+        version = self._get_version()
+        if version is None or version < _VB.MINIMUM_BATCH_VERSION:
+            self._logger.log(f"AutoDock Vina version {version} does not support batch mode (requires at least {_VB.MINIMUM_BATCH_VERSION}), docking ligands one by one.",
+                             _LE.WARNING)
+            return False
+        return True
 
     def _dock(self, number_cores):
 
         self._initialize_executors()
 
-        start_indices, sublists = self.get_sublists_for_docking(number_cores=number_cores, enforce_singletons=True)
+        # in batch mode (Vina 1.2 and later), each subjob docks a sublist of ligands with one call, so that the
+        # receptor is parsed and the grids are calculated once per sublist rather than once per ligand
+        batch_mode = self._use_batch_mode()
+        start_indices, sublists = self.get_sublists_for_docking(number_cores=number_cores,
+                                                                enforce_singletons=not batch_mode)
         number_sublists = len(sublists)
         self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
 
@@ -180,51 +262,44 @@ class AutodockVina(Docker, BaseModel):
 
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
+        ligands_by_identifier = self._get_ligands_by_identifier()
         while sublists_submitted < len(sublists):
+            # stop dispatching once the deadline has passed; the remaining ligands will not be docked
+            if self._deadline_reached():
+                self._skip_sublists(sublists[sublists_submitted:])
+                break
+
             upper_bound_slice = min((sublists_submitted + slices_per_iteration), len(sublists))
             cur_slice_start_indices = start_indices[sublists_submitted:upper_bound_slice]
             cur_slice_sublists = sublists[sublists_submitted:upper_bound_slice]
 
             # generate paths and initialize molecules (so that if they fail, this can be covered)
             tmp_output_dirs, tmp_input_paths, tmp_output_paths, \
-            ligand_identifiers = self._generate_temporary_input_output_files(cur_slice_start_indices,
-                                                                             cur_slice_sublists)
-
-            # run in parallel; wait for all subjobs to finish before proceeding
-            processes = []
-            for chunk_index in range(len(tmp_output_dirs)):
-                p = multiprocessing.Process(target=self._dock_subjob, args=(tmp_input_paths[chunk_index],
-                                                                            tmp_output_paths[chunk_index]))
-                processes.append(p)
-                p.start()
-            for p in processes:
-                p.join()
+            ligand_identifiers, molecules = self._generate_temporary_input_output_files(cur_slice_start_indices,
+                                                                                        cur_slice_sublists)
+
+            # run in parallel; wait for all subjobs to finish (or to be killed) before proceeding
+            self._run_subjobs(target=self._dock_subjob,
+                              list_arguments=[arguments + (batch_mode,)
+                                              for arguments in zip(tmp_input_paths, tmp_output_paths,
+                                                                   molecules, ligand_identifiers)],
+                              list_identifiers=ligand_identifiers,
+                              limits=self.parameters.subjob_limits)
 
             # add the number of input sublists rather than the output temporary folders to account for cases where
             # entire sublists failed to produce an input structure
             sublists_submitted += len(cur_slice_sublists)
 
-            # parse the resulting sdf files
-            for path_sdf_results, cur_identifier in zip(tmp_output_paths, ligand_identifiers):
+            # collect the resulting poses (parsed and tagged by the subjobs already)
+            for path_sdf_results, cur_identifier in zip([path for paths in tmp_output_paths for path in paths],
+                                                        [identifier for identifiers in ligand_identifiers
+                                                         for identifier in identifiers]):
                 # add conformations
-                if not os.path.isfile(path_sdf_results) or os.path.getsize(path_sdf_results) == 0:
+                ligand = ligands_by_identifier.get(cur_identifier)
+                if ligand is None:
                     continue
-
-                for molecule in Chem.SDMolSupplier(path_sdf_results, removeHs=False):
-                    if molecule is None:
-                        continue
-
-                    # extract the score from the AutoDock Vina output and update some tags
-                    score = self._extract_score_from_VinaResult(molecule=molecule)
-                    molecule.SetProp("_Name", cur_identifier)
-                    molecule.SetProp(_RKA.SDF_TAG_SCORE, score)
-                    molecule.ClearProp(_ROE.REMARK_TAG)
-
-                    # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_identifier:
-                            ligand.add_conformer(molecule)
-                            break
+                for molecule in read_result_molecules(path_sdf_results):
+                    ligand.add_conformer(molecule)
 
             # clean-up
             for path in tmp_output_dirs:
@@ -240,29 +315,68 @@ class AutodockVina(Docker, BaseModel):
         self._docking_fail_check()
 
         # generate docking results as dataframe
-        result_parser = AutodockResultParser(ligands=[ligand.get_clone() for ligand in self.ligands])
+        result_parser = AutodockResultParser(ligands=self.ligands)
         self._df_results = result_parser.as_dataframe()
 
         # set docking flag
         self._docking_performed = True
 
     def _extract_score_from_VinaResult(self, molecule) -> str:
-        result_tag_lines = molecule.GetProp(_ROE.REMARK_TAG).split("\n")
-        result_line = [line for line in result_tag_lines if _ROE.RESULT_LINE_IDENTIFIER in line][0]
-        parts = result_line.split()
-        return parts[_ROE.RESULT_LINE_POS_SCORE]
+        return self._get_engine_adapter().get_score_from_remark(molecule.GetProp(_ROE.REMARK_TAG))
 
-    def _dock_subjob(self, input_path_pdbqt, output_path_sdf):
+    @staticmethod
+    def _tag_pose(pose, identifier: str, score: str):
+        pose.SetProp("_Name", identifier)
+        pose.SetProp(_RKA.SDF_TAG_SCORE, score)
+        return pose
 
-        # set up arguments list and execute
+    def _read_poses_with_OpenBabel(self, tmp_pdbqt_docked, output_path_sdf, identifier, score=None) -> list:
+        # translate the output PDBQT into an SDF and extract the scores from the AutoDock Vina remarks (unless given)
+        arguments = [tmp_pdbqt_docked,
+                     _BEE.OBABLE_INPUTFORMAT_PDBQT,
+                     _BEE.OBABEL_OUTPUT_FORMAT_SDF,
+                     "".join([_BEE.OBABEL_O, output_path_sdf])]
+        self._OpenBabel_executor.execute(command=_BEE.OBABEL,
+                                         arguments=arguments,
+                                         check=False)
+        self._delay4file_system(path=output_path_sdf)
+        if not os.path.isfile(output_path_sdf) or os.path.getsize(output_path_sdf) == 0:
+            return []
+
+        poses = []
+        for molecule in iter_sdf_molecules(output_path_sdf):
+            pose_score = score if score is not None else self._extract_score_from_VinaResult(molecule=molecule)
+            if molecule.HasProp(_ROE.REMARK_TAG):
+                molecule.ClearProp(_ROE.REMARK_TAG)
+            poses.append(self._tag_pose(molecule, identifier, pose_score))
+        return poses
+
+    def _read_poses(self, input_path_pdbqt, tmp_pdbqt_docked, output_path_sdf, molecule, identifier,
+                    score=None) -> list:
+        # read the poses from the output PDBQT and map them back onto the input molecule (which keeps its bond
+        # orders); only if that is disabled or the atoms cannot be matched, translate the output with "OpenBabel";
+        # if a score is given (rescoring), it is used for all poses instead of the one in the output
+        if self.parameters.native_pose_reader:
+            parser = AutodockVinaPDBQTParser(molecule=molecule, input_pdbqt_path=input_path_pdbqt)
+            if parser.is_matched():
+                adapter = self._get_engine_adapter()
+                poses = parser.get_poses(tmp_pdbqt_docked,
+                                         result_line=adapter.result_line,
+                                         result_line_pos_score=adapter.result_line_pos_score)
+                if score is not None:
+                    return [self._tag_pose(pose, identifier, score) for pose, _ in poses]
+                return [self._tag_pose(pose, identifier, str(pose_score))
+                        for pose, pose_score in poses if pose_score is not None]
+            self._logger.log(f"Could not match the atoms of ligand {identifier} to its PDBQT, using OpenBabel to read the poses.",
+                             _LE.DEBUG)
+        return self._read_poses_with_OpenBabel(tmp_pdbqt_docked, output_path_sdf, identifier, score=score)
+
+    def _get_common_arguments(self) -> list:
         # TODO: support "ensemble docking" - currently, only the first entry is used
-        tmp_pdbqt_docked = gen_temp_file(suffix=".pdbqt", dir=os.path.dirname(input_path_pdbqt))
         search_space = self.parameters.search_space
         arguments = [_EE.VINA_RECEPTOR, self.parameters.receptor_pdbqt_path[0],
-                     _EE.VINA_LIGAND, input_path_pdbqt,
                      _EE.VINA_CPU, str(1),
                      _EE.VINA_SEED, self.parameters.seed,
-                     _EE.VINA_OUT, tmp_pdbqt_docked,
                      _EE.VINA_CENTER_X, str(search_space.center_x),
                      _EE.VINA_CENTER_Y, str(search_space.center_y),
                      _EE.VINA_CENTER_Z, str(search_space.center_z),
@@ -271,20 +385,91 @@ class AutodockVina(Docker, BaseModel):
                      _EE.VINA_SIZE_Z, str(search_space.size_z),
                      _EE.VINA_NUM_MODES, self.parameters.number_poses]
 
-        execution_result = self._ADV_executor.execute(command=_EE.VINA,
-                                                      arguments=arguments,
-                                                      check=True)
+        # all Vina-compatible engines share these flags, but may need additional ones
+        return self._get_engine_adapter().extra_arguments + arguments
+
+    def _dock_single(self, input_path_pdbqt) -> str:
+        tmp_pdbqt_docked = gen_temp_file(suffix=".pdbqt", dir=os.path.dirname(input_path_pdbqt))
+        arguments = self._get_common_arguments() + [_EE.VINA_LIGAND, input_path_pdbqt,
+                                                    _EE.VINA_OUT, tmp_pdbqt_docked]
+        execution_result = self._engine_executor.execute(command=self._get_engine_adapter().binary,
+                                                         arguments=arguments,
+                                                         check=True)
         self._delay4file_system(path=tmp_pdbqt_docked)
+        return tmp_pdbqt_docked
+
+    def _dock_batch(self, input_paths_pdbqt: list) -> list:
+        # the output folder is separate from the inputs, so that the output names cannot collide with them
+        tmp_output_dir = tempfile.mkdtemp(dir=os.path.dirname(input_paths_pdbqt[0]))
+        arguments = self._get_common_arguments() + [_VB.VINA_BATCH] + list(input_paths_pdbqt) + \
+                    [_VB.VINA_DIR, tmp_output_dir]
+        execution_result = self._engine_executor.execute(command=self._get_engine_adapter().binary,
+                                                         arguments=arguments,
+                                                         check=False)
+        docked_paths = [os.path.join(tmp_output_dir,
+                                     os.path.splitext(os.path.basename(path))[0] + _VB.BATCH_OUTPUT_SUFFIX)
+                        for path in input_paths_pdbqt]
+        if execution_result.returncode != 0:
+            # the ligands docked before the failure are still used; the others will never be written, so do not wait
+            self._logger.log(f"AutoDock Vina batch (input: {', '.join(input_paths_pdbqt)}) returned code {execution_result.returncode}: {execution_result.stderr}.",
+                             _LE.WARNING)
+        else:
+            for docked_path in docked_paths:
+                self._delay4file_system(path=docked_path)
+        return docked_paths
+
+    def _rescore_single(self, input_path_pdbqt, output_path_sdf, molecule, identifier) -> list:
+        # score the pose as it is or optimize it locally first; no search is performed
+        arguments = self._get_common_arguments() + [_EE.VINA_LIGAND, input_path_pdbqt]
+        tmp_pdbqt_optimized = None
+        if self.parameters.rescoring.mode == _RS.MODE_SCORE_ONLY:
+            arguments.append(_RS.VINA_SCORE_ONLY)
+        else:
+            tmp_pdbqt_optimized = gen_temp_file(suffix=".pdbqt", dir=os.path.dirname(input_path_pdbqt))
+            arguments = arguments + [_RS.VINA_LOCAL_ONLY, _EE.VINA_OUT, tmp_pdbqt_optimized]
+        execution_result = self._engine_executor.execute(command=self._get_engine_adapter().binary,
+                                                         arguments=arguments,
+                                                         check=True)
+        score = self._get_engine_adapter().get_affinity(execution_result.stdout)
+        if score is None:
+            self._logger.log(f"Could not find the affinity of ligand {identifier} in the output: {execution_result.stdout}",
+                             _LE.WARNING)
+            return []
+        if tmp_pdbqt_optimized is None:
+            return [self._tag_pose(Chem.Mol(molecule), identifier, score)]
+
+        # the optimized pose is read like docked poses (including the fallback to "OpenBabel")
+        self._delay4file_system(path=tmp_pdbqt_optimized)
+        poses = []
+        if os.path.isfile(tmp_pdbqt_optimized):
+            poses = self._read_poses(input_path_pdbqt, tmp_pdbqt_optimized, output_path_sdf, molecule, identifier,
+                                     score=score)
+        if len(poses) == 0:
+            self._logger.log(f"Could not read the optimized pose of ligand {identifier}.", _LE.WARNING)
+            return []
+        return poses[:1]
+
+    def _dock_subjob(self, input_paths_pdbqt, output_paths_sdf, molecules, identifiers, batch_mode):
+        if self.parameters.rescoring is not None:
+            for input_path_pdbqt, output_path_sdf, molecule, identifier in \
+                    zip(input_paths_pdbqt, output_paths_sdf, molecules, identifiers):
+                write_binaries(self._rescore_single(input_path_pdbqt, output_path_sdf, molecule, identifier),
+                               get_binaries_path(output_path_sdf))
+            return
+
+        if batch_mode:
+            docked_paths = self._dock_batch(input_paths_pdbqt)
+        else:
+            docked_paths = [self._dock_single(path) for path in input_paths_pdbqt]
 
-        # translate the parsed output PDBQT into an SDF
-        arguments = [tmp_pdbqt_docked,
-                     _BEE.OBABLE_INPUTFORMAT_PDBQT,
-                     _BEE.OBABEL_OUTPUT_FORMAT_SDF,
-                     "".join([_BEE.OBABEL_O, output_path_sdf])]
-        self._OpenBabel_executor.execute(command=_BEE.OBABEL,
-                                         arguments=arguments,
-                                         check=False)
-        self._delay4file_system(path=output_path_sdf)
+        for input_path_pdbqt, tmp_pdbqt_docked, output_path_sdf, molecule, identifier in \
+                zip(input_paths_pdbqt, docked_paths, output_paths_sdf, molecules, identifiers):
+            if not os.path.isfile(tmp_pdbqt_docked):
+                continue
+            poses = self._read_poses(input_path_pdbqt, tmp_pdbqt_docked, output_path_sdf, molecule, identifier)
+
+            # hand the poses over to the main process as binaries
+            write_binaries(poses, get_binaries_path(output_path_sdf))
 
     def write_docked_ligands(self, path, mode="all"):
         """This method overrides the parent class, docker.py write_docked_ligands method. This method writes docked
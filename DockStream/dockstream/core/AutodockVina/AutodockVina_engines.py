@@ -0,0 +1,66 @@
+import re
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from dockstream.utils.enums.AutodockVina_enums import AutodockVinaExecutablesEnum, AutodockVinaOutputEnum
+from dockstream.utils.enums.AutodockVina_engine_enums import AutodockVinaEngineEnum
+from dockstream.utils.enums.AutodockVina_pdbqt_enums import AutodockVinaPDBQTEnum
+from dockstream.utils.enums.rescoring_enums import RescoringEnum
+
+_EE = AutodockVinaExecutablesEnum()
+_ROE = AutodockVinaOutputEnum()
+_VE = AutodockVinaEngineEnum()
+_PE = AutodockVinaPDBQTEnum()
+_RS = RescoringEnum()
+
+
+class VinaEngineAdapter(BaseModel):
+    """Describes how to call a "AutoDock Vina"-compatible engine and how to read its output. All engines take the same
+       PDBQT inputs and box, seed, CPU and pose number flags; they differ in the binary, additional arguments, the
+       support of "--batch", the remark line holding the score and the line reporting the affinity when rescoring."""
+
+    binary: str
+    extra_arguments: List[str] = []
+    supports_batch: bool = False
+
+    # remark line holding the score in the output PDBQT (as written) ...
+    result_line: str = _PE.RESULT_LINE
+    result_line_pos_score: int = _PE.RESULT_LINE_POS_SCORE
+
+    # ... and in the "REMARK" tag of poses translated by "OpenBabel"
+    remark_identifier: str = _ROE.RESULT_LINE_IDENTIFIER
+    remark_pos_score: int = _ROE.RESULT_LINE_POS_SCORE
+
+    # patterns (with the score as first group) of the affinity printed with "--score_only" and "--local_only"
+    affinity_patterns: List[str] = [_RS.VINA_AFFINITY_PATTERN, _RS.VINA_FREE_ENERGY_PATTERN]
+
+    def get_score_from_remark(self, remark: str) -> str:
+        result_line = [line for line in remark.split("\n") if self.remark_identifier in line][0]
+        return result_line.split()[self.remark_pos_score]
+
+    def get_affinity(self, stdout: str) -> Optional[str]:
+        for line in str(stdout).split("\n"):
+            for pattern in self.affinity_patterns:
+                match = re.match(pattern, line)
+                if match is not None:
+                    return match.group(1)
+        return None
+
+
+_ADAPTERS = {
+    _VE.ENGINE_VINA: VinaEngineAdapter(binary=_EE.VINA, supports_batch=True),
+    _VE.ENGINE_QVINA2: VinaEngineAdapter(binary=_VE.BINARY_QVINA2),
+    _VE.ENGINE_QVINAW: VinaEngineAdapter(binary=_VE.BINARY_QVINAW),
+    _VE.ENGINE_SMINA: VinaEngineAdapter(binary=_VE.BINARY_SMINA,
+                                        result_line=_VE.SMINA_RESULT_LINE,
+                                        result_line_pos_score=_VE.SMINA_RESULT_LINE_POS_SCORE,
+                                        remark_identifier=_VE.SMINA_REMARK_IDENTIFIER,
+                                        remark_pos_score=_VE.SMINA_REMARK_POS_SCORE)
+}
+
+
+def get_engine_adapter(engine: str) -> VinaEngineAdapter:
+    if engine not in _ADAPTERS:
+        raise ValueError(f"Unknown AutoDock Vina engine {engine}, use one of {list(_ADAPTERS.keys())}.")
+    return _ADAPTERS[engine]
@@ -0,0 +1,142 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import rdkit.Chem as Chem
+from rdkit.Geometry import Point3D
+
+from dockstream.utils.enums.AutodockVina_pdbqt_enums import AutodockVinaPDBQTEnum
+
+_PE = AutodockVinaPDBQTEnum()
+
+
+def _parse_coordinates(line: str) -> Tuple[float, float, float]:
+    return (float(line[_PE.COLUMNS_X[0]:_PE.COLUMNS_X[1]]),
+            float(line[_PE.COLUMNS_Y[0]:_PE.COLUMNS_Y[1]]),
+            float(line[_PE.COLUMNS_Z[0]:_PE.COLUMNS_Z[1]]))
+
+
+def _is_atom_record(line: str) -> bool:
+    return line.startswith(_PE.ATOM) or line.startswith(_PE.HETATM)
+
+
+def read_pdbqt_coordinates(path: str) -> np.ndarray:
+    """Returns the coordinates of all atoms of a (single model) PDBQT file in the order they are written."""
+    with open(path, 'r') as file:
+        return np.array([_parse_coordinates(line) for line in file if _is_atom_record(line)], dtype=float)
+
+
+def read_pdbqt_models(path: str, result_line: str = _PE.RESULT_LINE,
+                      result_line_pos_score: int = _PE.RESULT_LINE_POS_SCORE) -> List[Tuple[Optional[float], np.ndarray]]:
+    """Returns the score and coordinates of every "MODEL" block of an "AutoDock Vina" output PDBQT file; the score is
+       read from the remark line starting with "result_line" (engines other than "AutoDock Vina" may use another).
+       A file without "MODEL" blocks (e.g. written by "--local_only") is returned as a single model."""
+    models = []
+    score = None
+    coordinates = []
+    with open(path, 'r') as file:
+        for line in file:
+            if line.startswith(_PE.MODEL):
+                score = None
+                coordinates = []
+            elif line.startswith(result_line):
+                score = float(line.split()[result_line_pos_score])
+            elif _is_atom_record(line):
+                coordinates.append(_parse_coordinates(line))
+            elif line.startswith(_PE.ENDMDL):
+                models.append((score, np.array(coordinates, dtype=float)))
+                coordinates = []
+    if len(models) == 0 and len(coordinates) > 0:
+        models.append((score, np.array(coordinates, dtype=float)))
+    return models
+
+
+class AutodockVinaPDBQTParser:
+    """Maps the poses of an "AutoDock Vina" output PDBQT back onto the RDKit molecule the input PDBQT was written
+       from. Vina keeps the atom order of the input PDBQT, so the atoms of the input are matched once (by their
+       coordinates) to the atoms of the molecule, which keeps its bond orders and properties. Non-polar hydrogens,
+       which are merged into their heavy atoms in PDBQT, are placed again based on the docked heavy atoms."""
+
+    def __init__(self, molecule: Chem.Mol, input_pdbqt_path: str):
+        self._molecule = molecule
+        self._atom_map = self._match_atoms(read_pdbqt_coordinates(input_pdbqt_path))
+
+    def _match_atoms(self, pdbqt_coordinates: np.ndarray) -> Optional[List[int]]:
+        # returns the index of the molecule's atom for every atom of the PDBQT (or None, if they cannot be matched)
+        if self._molecule.GetNumConformers() == 0 or len(pdbqt_coordinates) == 0:
+            return None
+        positions = self._molecule.GetConformer().GetPositions()
+        distances = np.linalg.norm(pdbqt_coordinates[:, np.newaxis, :] - positions[np.newaxis, :, :], axis=2)
+        atom_map = [int(index) for index in distances.argmin(axis=1)]
+        if distances.min(axis=1).max() > _PE.MATCHING_TOLERANCE or len(set(atom_map)) != len(atom_map):
+            return None
+
+        # only hydrogens may be missing from the PDBQT
+        missing = set(range(self._molecule.GetNumAtoms())) - set(atom_map)
+        if any(self._molecule.GetAtomWithIdx(index).GetAtomicNum() != 1 for index in missing):
+            return None
+        return atom_map
+
+    def is_matched(self) -> bool:
+        return self._atom_map is not None
+
+    def _place_missing_hydrogens(self, pose: Chem.Mol, missing: list) -> Optional[Chem.Mol]:
+        number_atoms = pose.GetNumAtoms()
+        parents = {index: pose.GetAtomWithIdx(index).GetNeighbors()[0].GetIdx() for index in missing}
+        for parent in parents.values():
+            pose.GetAtomWithIdx(parent).SetNoImplicit(False)
+
+        # remove the hydrogens and add them again (with coordinates), they are appended at the end
+        stripped = Chem.RWMol(pose)
+        for index in sorted(missing, reverse=True):
+            stripped.RemoveAtom(index)
+        stripped = stripped.GetMol()
+        Chem.SanitizeMol(stripped, catchErrors=True)
+        kept = [index for index in range(number_atoms) if index not in parents]
+        new_indices = {old_index: new_index for new_index, old_index in enumerate(kept)}
+        completed = Chem.AddHs(stripped, addCoords=True,
+                               onlyOnAtoms=tuple(sorted({new_indices[parent] for parent in parents.values()})))
+        if completed.GetNumAtoms() != number_atoms:
+            return None
+
+        # restore the original atom order: the added hydrogens are assigned to the missing ones of the same parent
+        added = {}
+        for index in range(len(kept), number_atoms):
+            parent = kept[completed.GetAtomWithIdx(index).GetNeighbors()[0].GetIdx()]
+            added.setdefault(parent, []).append(index)
+        order = [0] * number_atoms
+        for new_index, old_index in enumerate(kept):
+            order[old_index] = new_index
+        for index in sorted(missing):
+            order[index] = added[parents[index]].pop(0)
+        return Chem.RenumberAtoms(completed, order)
+
+    def get_poses(self, output_pdbqt_path: str, result_line: str = _PE.RESULT_LINE,
+                  result_line_pos_score: int = _PE.RESULT_LINE_POS_SCORE) -> List[Tuple[Chem.Mol, Optional[float]]]:
+        """Returns the poses (copies of the molecule with the docked coordinates) and their scores.
+
+        :param output_pdbqt_path: The output PDBQT written by "AutoDock Vina"
+        :param result_line: The start of the remark line holding the score (see "read_pdbqt_models()")
+        :param result_line_pos_score: The position of the score in that line
+        :return: list of (pose, score) tuples, in the order of the "MODEL" blocks (empty if the atoms did not match)
+        """
+        if self._atom_map is None:
+            return []
+        missing = sorted(set(range(self._molecule.GetNumAtoms())) - set(self._atom_map))
+        poses = []
+        for score, coordinates in read_pdbqt_models(output_pdbqt_path, result_line, result_line_pos_score):
+            if len(coordinates) != len(self._atom_map):
+                continue
+            pose = Chem.Mol(self._molecule)
+            for name in pose.GetPropNames():
+                pose.ClearProp(name)
+            pose.RemoveAllConformers()
+            conformer = Chem.Conformer(pose.GetNumAtoms())
+            for (x, y, z), index in zip(coordinates, self._atom_map):
+                conformer.SetAtomPosition(index, Point3D(x, y, z))
+            pose.AddConformer(conformer, assignId=True)
+            if len(missing) > 0:
+                pose = self._place_missing_hydrogens(pose, missing)
+                if pose is None:
+                    continue
+            poses.append((pose, score))
+        return poses
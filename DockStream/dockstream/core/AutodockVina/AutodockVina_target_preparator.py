@@ -1,15 +1,50 @@
+import json
+
 from rdkit import Chem
 
 from dockstream.utils.dockstream_exceptions import TargetPreparationFailed
 
 from dockstream.core.target_preparator import TargetPreparator
+from dockstream.core.AutodockVina.AutodockVina_docker import SearchSpace
 from dockstream.utils.execute_external.OpenBabel import OpenBabelExecutor
 from dockstream.utils.enums.AutodockVina_enums import AutodockTargetPreparationEnum
+from dockstream.utils.enums.AutodockVina_search_space_enums import AutodockSearchSpaceEnum
+from dockstream.utils.enums.docking_enum import DockingConfigurationEnum
 from dockstream.utils.enums.OpenBabel_enums import OpenBabelExecutablesEnum
+from dockstream.utils.files_paths import generate_folder_structure
 from dockstream.containers.target_preparation_container import TargetPreparationContainer
 
 from dockstream.utils.general_utils import *
 
+_SE = AutodockSearchSpaceEnum()
+_DE = DockingConfigurationEnum()
+
+
+def patch_docking_configuration(path: str, search_space: dict) -> int:
+    """Overwrites the "search_space" block of all "AutoDock Vina" runs in a docking configuration (JSON) file.
+
+    :param path: The docking configuration to be patched
+    :param search_space: The search space (center and size) to be set
+    :return: number of runs patched
+    """
+    if not os.path.isfile(path):
+        raise TargetPreparationFailed(f"Docking configuration {path} to be patched does not exist.")
+    with open(path, 'r') as f:
+        docking_conf = json.load(f)
+
+    number_patched = 0
+    docking_runs = nested_get(docking_conf, [_DE.DOCKING, _DE.DOCKING_RUNS], default=[])
+    if not isinstance(docking_runs, list):
+        docking_runs = [docking_runs]
+    for docking_run in docking_runs:
+        if docking_run.get(_DE.BACKEND) == _DE.BACKEND_AUTODOCKVINA:
+            docking_run.setdefault(_DE.PARAMS, {})[_SE.SEARCH_SPACE] = dict(search_space)
+            number_patched += 1
+
+    with open(path, 'w') as f:
+        json.dump(docking_conf, f, indent=2)
+    return number_patched
+
 
 class AutodockVinaTargetPreparator(TargetPreparator):
     """Class that deals with all the target preparatory steps needed before docking using "Autodock Vina" can commence.
@@ -20,6 +55,8 @@ class AutodockVinaTargetPreparator(TargetPreparator):
 
     def __init__(self, conf: TargetPreparationContainer, target, run_number=0):
         self._TP = AutodockTargetPreparationEnum()
+        self._SE = AutodockSearchSpaceEnum()
+        self._DE = DockingConfigurationEnum()
         self._EE = OpenBabelExecutablesEnum()
 
         # invoke base class's constructor first
@@ -126,6 +163,53 @@ class AutodockVinaTargetPreparator(TargetPreparator):
                 self._logger.log(f"In order extract the box, both {self._TP.EXTRACT_BOX_REFERENCE_LIGAND_PATH} and {self._TP.EXTRACT_BOX_REFERENCE_LIGAND_FORMAT} must be defined.")
                 return None, None, None
 
+    def get_search_space(self):
+        """Derives a ready-to-use "search_space" block for "AutoDock Vina" from the reference ligand: the box is
+        centered on the ligand and its size is the ligand's extent plus a margin on every side. Returns a dictionary
+        with the same keys as the "search_space" block of a docking run or None, if no reference ligand is set."""
+        if not in_keys(self._run_parameters, [self._TP.RUNS_PARAM, self._TP.EXTRACT_BOX]):
+            return None
+        x_coords, y_coords, z_coords = self._extract_box()
+        if x_coords is None:
+            return None
+        margin = self._get_box_margin()
+
+        def center(coords):
+            return round((min(coords) + max(coords)) / 2, ndigits=3)
+
+        def size(coords):
+            return round(max(coords) - min(coords) + 2 * margin, ndigits=3)
+
+        search_space = SearchSpace(center_x=center(x_coords), center_y=center(y_coords), center_z=center(z_coords),
+                                   size_x=size(x_coords), size_y=size(y_coords), size_z=size(z_coords))
+        return search_space.dict(by_alias=True)
+
+    def _get_box_margin(self) -> float:
+        margin = float(nested_get(self._run_parameters, [self._TP.RUNS_PARAM,
+                                                         self._TP.EXTRACT_BOX,
+                                                         self._SE.EXTRACT_BOX_MARGIN],
+                                  default=self._SE.EXTRACT_BOX_MARGIN_DEFAULT))
+        if margin < 0:
+            raise TargetPreparationFailed(f"Parameter {self._SE.EXTRACT_BOX_MARGIN} must not be negative.")
+        return margin
+
+    def _log_search_space(self, search_space: dict):
+        self._logger.log(f"Suggested search space (margin of {self._get_box_margin()} A on every side):",
+                         self._TL.INFO)
+        for key, value in search_space.items():
+            self._logger_blank.log(f"{key}: {value}", self._TL.INFO)
+
+    def _write_search_space(self, path: str, search_space: dict):
+        generate_folder_structure(filepath=path)
+        with open(path, 'w') as f:
+            json.dump({self._SE.SEARCH_SPACE: search_space}, f, indent=2)
+        self._logger.log(f"Wrote search space to file {path}.", self._TL.DEBUG)
+
+    def _patch_docking_configuration(self, path: str, search_space: dict):
+        number_patched = patch_docking_configuration(path, search_space)
+        self._logger.log(f"Patched search space of {number_patched} AutoDock Vina run(s) in docking configuration {path}.",
+                         self._TL.INFO)
+
     def specify_cavity(self):
         # write out the input PDB as PDBQT file
         self._export_as_pdb2pdbqt(self._run_parameters[self._TP.RUNS_OUTPUT][self._TP.RECEPTOR_PATH])
@@ -133,6 +217,23 @@ class AutodockVinaTargetPreparator(TargetPreparator):
         # if there is a reference ligand provided, calculate mean, minimum and maximum coordinates and log out
         self._log_extract_box()
 
+        # derive a tight search space from the reference ligand; if specified, write it out and update a docking
+        # configuration with it
+        search_space = self.get_search_space()
+        if search_space is not None:
+            self._log_search_space(search_space)
+            search_space_path = nested_get(self._run_parameters, [self._TP.RUNS_OUTPUT, self._SE.SEARCH_SPACE_PATH],
+                                           default=None)
+            if search_space_path is not None:
+                self._write_search_space(search_space_path, search_space)
+            patch_path = nested_get(self._run_parameters, [self._TP.RUNS_PARAM,
+                                                           self._TP.EXTRACT_BOX,
+                                                           self._SE.EXTRACT_BOX_PATCH_DOCKING_CONFIGURATION],
+                                    default=None)
+            if patch_path is not None:
+                self._patch_docking_configuration(patch_path, search_space)
+        return search_space
+
     def write_target(self, path):
         # TODO: move writing functionality here (and for rDock) to this method, respectively
         pass
@@ -16,7 +16,6 @@ from dockstream.core.ligand_preparator import LigandPreparator, _LE
 from dockstream.utils.dockstream_exceptions import LigandPreparationFailed
 from dockstream.utils.general_utils import gen_temp_file
 
-from dockstream.utils.smiles import to_mol
 from dockstream.utils.execute_external.Corina import CorinaExecutor
 from dockstream.utils.enums.Corina_enums import CorinaLigandPreparationEnum, CorinaExecutablesEnum
 
@@ -125,7 +124,7 @@ class CorinaLigandPreparator(LigandPreparator, BaseModel):
 
     def _smiles_to_molecules(self, ligands: List[Ligand]) -> List[Ligand]:
         for lig in ligands:
-            mol = to_mol(lig.get_smile())
+            mol = lig.get_graph_copy()
             lig.set_molecule(mol)
             lig.set_mol_type(_LP.TYPE_CORINA)
         return ligands
@@ -1,9 +1,8 @@
 import os
 import tempfile
 import shutil
-import multiprocessing
 import pickle
-from copy import deepcopy
+import hashlib
 from enum import Enum
 from typing import Optional, List, Tuple, Dict, Any
 from typing_extensions import Literal
@@ -21,8 +20,10 @@ from dockstream.utils.execute_external.Gold import GoldExecutor
 
 from dockstream.core.docker import Docker
 from dockstream.core.Gold.Gold_result_parser import GoldResultParser
+from dockstream.core.result_ingestion import convert_to_binaries, read_result_molecules
 from dockstream.utils.enums.Gold_enums import GoldLigandPreparationEnum
 from dockstream.utils.enums.Gold_enums import GoldTargetKeywordEnum, GoldExecutablesEnum, GoldOutputEnum
+from dockstream.utils.enums.Gold_template_enums import GoldTemplateEnum
 from dockstream.utils.general_utils import gen_temp_file
 
 from dockstream.utils.translations.molecule_translator import MoleculeTranslator
@@ -53,6 +54,7 @@ class GoldParameters(BaseModel):
     autoscale: float  # Autoscale percentage. very fast: 10, medium: 50, very slow: 100.
     ndocks: int = 10
     diverse_solutions: Optional[Tuple[bool, Optional[int], Optional[float]]] = None   # If diverse solutions is enabled this will be (True, cluster size, rmsd), otherwise (False, None, None). TODO: rework for GUI.
+    prepared_target_folder: Optional[str] = None    # where prepared targets are kept for reuse; default: the system's temporary folder
 
     def get(self, key: str) -> Any:
         """Temporary method to support nested_get"""
@@ -63,6 +65,7 @@ _TK = GoldTargetKeywordEnum()
 _EE = GoldExecutablesEnum()
 _ROE = GoldOutputEnum()
 _LE = LoggingConfigEnum()
+_GT = GoldTemplateEnum()
 
 
 class Gold(Docker):
@@ -74,6 +77,7 @@ class Gold(Docker):
     _target_dict: Dict = None
     _Gold_executor: GoldExecutor = None
     _scoring_function_parameters: Dict[str, str] = None
+    _settings_template_path: str = None
 
     class Config:
         underscore_attrs_are_private = True
@@ -102,48 +106,100 @@ class Gold(Docker):
     def _parse_fitness_function(self):
         self._logger.log(f"Set fitness function to {self.parameters.fitness_function} and response value to {self.parameters.response_value}.", _LE.DEBUG)
 
-    def _initialize_cavity(self, settings):
-        # load the target dictionary specification and initialize the cavity
+    def _load_target_dict(self) -> dict:
+        # load the target dictionary specification
         target_path = self.parameters.receptor_paths[0]
         with open(target_path, "rb") as file:
-            self._target_dict = pickle.load(file)
+            target_dict = pickle.load(file)
             self._logger.log(f"Loaded pickled cavity dictionary stored in file {target_path}.", _LE.DEBUG)
-            if self._target_dict[_TK.VERSION] != _TK.CURRENT_VERSION:
-                self._logger.log(f"Version of pickled target ({self._target_dict[_TK.VERSION]}) is not the same as DockStream's ({_TK.CURRENT_VERSION}).", _LE.WARNING)
+            if target_dict[_TK.VERSION] != _TK.CURRENT_VERSION:
+                self._logger.log(f"Version of pickled target ({target_dict[_TK.VERSION]}) is not the same as DockStream's ({_TK.CURRENT_VERSION}).", _LE.WARNING)
         self._logger.log(f"Unpacked the target dictionary.", _LE.DEBUG)
+        return target_dict
 
-        tmpdir = tempfile.mkdtemp()
+    def _get_prepared_target_folder(self) -> str:
+        """Prepares the protein and writes the reference ligand once per pickled target: the files are stored in a
+           folder named by the hash of the pickle's content, which is reused by later runs (and other processes).
+           The folder is placed in "prepared_target_folder" (if set) or in the system's temporary folder; it is
+           never removed by DockStream."""
+        target_path = self.parameters.receptor_paths[0]
+        hasher = hashlib.new(_GT.HASH_ALGORITHM)
+        with open(target_path, "rb") as file:
+            hasher.update(file.read())
+        base_folder = self.parameters.prepared_target_folder
+        if base_folder is None:
+            base_folder = tempfile.gettempdir()
+        os.makedirs(base_folder, exist_ok=True)
+        folder = os.path.join(base_folder, _GT.TARGET_FOLDER_PREFIX + hasher.hexdigest())
+        if os.path.isdir(folder):
+            self._logger.log(f"Using prepared target in folder {folder}.", _LE.DEBUG)
+            return folder
+
+        # build the folder under a temporary name and move it in place once complete
+        tmp_folder = tempfile.mkdtemp(dir=base_folder)
+        self._target_dict = self._load_target_dict()
         if self._target_dict[_TK.CAVITY_METHOD] == _TK.CAVITY_METHOD_REFERENCE:
-            # write ligand to temporary file (ending copied over in settings)
-            tmp_ref_ligand_path = gen_temp_file(suffix=self._target_dict[_TK.REFERENCE_LIGAND_FILENAME], dir=tmpdir)
-            with open(tmp_ref_ligand_path, 'w') as file:
+            # write ligand to file (ending copied over in settings)
+            ref_ligand_path = os.path.join(tmp_folder, _GT.REFERENCE_LIGAND_NAME + self._target_dict[_TK.REFERENCE_LIGAND_FILENAME])
+            with open(ref_ligand_path, 'w') as file:
                 for line in self._target_dict[_TK.REFERENCE_LIGAND]:
                     file.write(line)
-                self._logger.log(f"Wrote temporary ligand file {tmp_ref_ligand_path} with {len(self._target_dict[_TK.REFERENCE_LIGAND])} lines.", _LE.DEBUG)
+                self._logger.log(f"Wrote ligand file {ref_ligand_path} with {len(self._target_dict[_TK.REFERENCE_LIGAND])} lines.", _LE.DEBUG)
 
-            # write target PDB to temporary file
-            tmp_target_path = gen_temp_file(suffix=".pdb", dir=tmpdir)
-            with open(tmp_target_path, 'w') as file:
+            # write target PDB to file and prepare the protein
+            target_pdb_path = os.path.join(tmp_folder, _GT.TARGET_PDB_NAME)
+            with open(target_pdb_path, 'w') as file:
                 for line in self._target_dict[_TK.TARGET_PDB]:
                     file.write(line)
-                self._logger.log(f"Wrote temporary target file {tmp_target_path} with {len(self._target_dict[_TK.TARGET_PDB])} lines.", _LE.DEBUG)
-
-            # build the cavity
-            ref_ligand = MoleculeReader(filename=tmp_ref_ligand_path)[0]
-            self._prepare_protein(settings, tmp_target_path)
-            protein = settings.proteins[0]
-            settings.binding_site = settings.BindingSiteFromLigand(protein,
-                                                                   ref_ligand,
-                                                                   distance=self._target_dict[_TK.CAVITY_REFERENCE_DISTANCE])
-            settings.reference_ligand_file = tmp_ref_ligand_path
+                self._logger.log(f"Wrote target file {target_pdb_path} with {len(self._target_dict[_TK.TARGET_PDB])} lines.", _LE.DEBUG)
+            self._prepare_protein(target_pdb_path, os.path.join(tmp_folder, _GT.PROTEIN_MOL2_NAME))
         elif self._target_dict[_TK.CAVITY_METHOD] == _TK.CAVITY_METHOD_POINT:
+            shutil.rmtree(tmp_folder)
             raise NotImplementedError
             # origin (x,x,x)
             # distance x
         else:
+            shutil.rmtree(tmp_folder)
             raise DockingRunFailed("Specified cavity determination method not defined for GOLD.")
+
+        try:
+            os.rename(tmp_folder, folder)
+        except OSError:
+            # another process has prepared the same target in the meantime
+            shutil.rmtree(tmp_folder)
+        self._logger.log(f"Prepared target in folder {folder}.", _LE.DEBUG)
+        return folder
+
+    def _write_settings_template(self, target_folder: str, run_folder: str) -> str:
+        """Writes the settings shared by all subjobs of a run (protein, binding site and docking parameters); the
+           subjobs only add their ligand file and output path."""
+        if self._target_dict is None:
+            self._target_dict = self._load_target_dict()
+        settings = DockerGold().settings
+        settings.output_directory = run_folder
+        settings.output_format = "sdf"
+        settings.fitness_function = self.parameters.fitness_function
+        settings.early_termination = self.parameters.early_termination
+        settings.autoscale = self.parameters.autoscale
+
+        if self.parameters.diverse_solutions is not None:
+            settings.diverse_solutions = self.parameters.diverse_solutions
+
+        # build the cavity
+        ref_ligand_path = os.path.join(target_folder, _GT.REFERENCE_LIGAND_NAME + self._target_dict[_TK.REFERENCE_LIGAND_FILENAME])
+        ref_ligand = MoleculeReader(filename=ref_ligand_path)[0]
+        settings.add_protein_file(os.path.join(target_folder, _GT.PROTEIN_MOL2_NAME))
+        protein = settings.proteins[0]
+        settings.binding_site = settings.BindingSiteFromLigand(protein,
+                                                               ref_ligand,
+                                                               distance=self._target_dict[_TK.CAVITY_REFERENCE_DISTANCE])
+        settings.reference_ligand_file = ref_ligand_path
         self._logger.log(f"Initialized GOLD Protein.BindingSite with method {self._target_dict[_TK.CAVITY_METHOD]}.", _LE.DEBUG)
 
+        settings_template_path = os.path.join(run_folder, _GT.SETTINGS_TEMPLATE_NAME)
+        settings.write(settings_template_path)
+        return settings_template_path
+
     def add_molecules(self, molecules: list):
         """This method overrides the parent class, docker.py add_molecules method. This method appends prepared
         ligands to a list for subsequent docking. Note, that while internally we will store the ligands for "GOLD"
@@ -169,6 +225,7 @@ class Gold(Docker):
         tmp_output_dirs = []
         tmp_input_sdf_paths = []
         tmp_output_sdf_paths = []
+        ligand_identifiers = []
         for start_index, sublist in zip(start_indices, sublists):
             # generate temporary input files and output directory
             cur_tmp_output_dir = tempfile.mkdtemp()
@@ -177,12 +234,14 @@ class Gold(Docker):
             # write-out the temporary input file
             writer = Chem.SDWriter(cur_tmp_sdf)
             one_written = False
+            cur_identifiers = []
             for ligand in sublist:
                 # initialize all ligands (as they could have failed)
                 if ligand.get_molecule() is not None:
-                    mol = deepcopy(ligand.get_molecule())
+                    mol = ligand.get_mutable_molecule()
                     mol.SetProp("_Name", ligand.get_identifier())
                     one_written = True
+                    cur_identifiers.append(ligand.get_identifier())
                     writer.write(mol)
             writer.close()
             if one_written is False:
@@ -195,7 +254,8 @@ class Gold(Docker):
             tmp_output_dirs.append(cur_tmp_output_dir)
             tmp_output_sdf_paths.append(output_sdf_path)
             tmp_input_sdf_paths.append(cur_tmp_sdf)
-        return tmp_output_dirs, tmp_input_sdf_paths, tmp_output_sdf_paths
+            ligand_identifiers.append(cur_identifiers)
+        return tmp_output_dirs, tmp_input_sdf_paths, tmp_output_sdf_paths, ligand_identifiers
 
     def _dock(self, number_cores: int):
         # partition ligands into sublists and distribute to processor cores for docking
@@ -204,59 +264,58 @@ class Gold(Docker):
         self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
-
-        while sublists_submitted < len(sublists):
-            upper_bound_slice = min((sublists_submitted + slices_per_iteration), len(sublists))
-            cur_slice_start_indices = start_indices[sublists_submitted:upper_bound_slice]
-            cur_slice_sublists = sublists[sublists_submitted:upper_bound_slice]
-
-            # generate paths and initialize molecules (so that if they fail, this can be covered)
-            tmp_output_dirs, tmp_input_sdf_paths, \
-            tmp_output_sdf_paths = self._generate_temporary_input_output_files(cur_slice_start_indices,
-                                                                               cur_slice_sublists)
-
-            # run in parallel; wait for all subjobs to finish before proceeding
-            processes = []
-            for chunk_index in range(len(tmp_output_dirs)):
-                p = multiprocessing.Process(target=self._dock_subjob, args=(tmp_input_sdf_paths[chunk_index],
-                                                                            tmp_output_sdf_paths[chunk_index],
-                                                                            tmp_output_dirs[chunk_index]))
-                processes.append(p)
-                p.start()
-            for p in processes:
-                p.join()
-
-            # add the number of input sublists rather than the output temporary folders to account for cases where
-            # entire sublists failed to produce an input structure
-            sublists_submitted += len(cur_slice_sublists)
-
-            # load the chunks and recombine the result; add conformations
-            for chunk_index in range(len(tmp_output_dirs)):
-                # this is a protection against the case where empty (file size == 0 bytes) files are generated due to
-                # a failure during docking
-                if not os.path.isfile(tmp_output_sdf_paths[chunk_index]) or os.path.getsize(tmp_output_sdf_paths[chunk_index]) == 0:
-                    continue
-
-                for molecule in Chem.SDMolSupplier(tmp_output_sdf_paths[chunk_index], removeHs=False):
-
-                    # it can happen, that ligands have "impossible chemistry" and will be loaded by RDkit as "None"
-                    if molecule is None:
-                        continue
-
-                    # parse the molecule name (sorted by FITNESS not the score) which looks like:
-                    # "0:0|0xa6enezm|sdf|1|dock6"
-                    cur_conformer_name = str(molecule.GetProp("_Name")).split(sep='|')[0]
-
-                    # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_conformer_name:
+        ligands_by_identifier = self._get_ligands_by_identifier()
+
+        # prepare the protein and binding site once; the subjobs share the settings template (read-only)
+        tmp_run_folder = tempfile.mkdtemp()
+        try:
+            self._settings_template_path = self._write_settings_template(self._get_prepared_target_folder(),
+                                                                         tmp_run_folder)
+
+            while sublists_submitted < len(sublists):
+                # stop dispatching once the deadline has passed; the remaining ligands will not be docked
+                if self._deadline_reached():
+                    self._skip_sublists(sublists[sublists_submitted:])
+                    break
+
+                upper_bound_slice = min((sublists_submitted + slices_per_iteration), len(sublists))
+                cur_slice_start_indices = start_indices[sublists_submitted:upper_bound_slice]
+                cur_slice_sublists = sublists[sublists_submitted:upper_bound_slice]
+
+                # generate paths and initialize molecules (so that if they fail, this can be covered)
+                tmp_output_dirs, tmp_input_sdf_paths, \
+                tmp_output_sdf_paths, ligand_identifiers = self._generate_temporary_input_output_files(cur_slice_start_indices,
+                                                                                                       cur_slice_sublists)
+
+                # run in parallel; subjobs still running at the deadline are killed and their ligands recorded
+                self._run_subjobs(target=self._dock_subjob,
+                                  list_arguments=[(input_sdf_path, output_sdf_path, output_dir)
+                                                  for input_sdf_path, output_sdf_path, output_dir
+                                                  in zip(tmp_input_sdf_paths, tmp_output_sdf_paths, tmp_output_dirs)],
+                                  list_identifiers=ligand_identifiers)
+
+                # add the number of input sublists rather than the output temporary folders to account for cases
+                # where entire sublists failed to produce an input structure
+                sublists_submitted += len(cur_slice_sublists)
+
+                # load the chunks (parsed by the subjobs already) and recombine the result; add conformations
+                for chunk_index in range(len(tmp_output_dirs)):
+                    for molecule in read_result_molecules(tmp_output_sdf_paths[chunk_index]):
+                        # parse the molecule name (sorted by FITNESS not the score) which looks like:
+                        # "0:0|0xa6enezm|sdf|1|dock6"
+                        cur_conformer_name = str(molecule.GetProp("_Name")).split(sep='|')[0]
+
+                        # add molecule to the appropriate ligand
+                        ligand = ligands_by_identifier.get(cur_conformer_name)
+                        if ligand is not None:
                             ligand.add_conformer(molecule)
-                            break
 
-            # clean-up
-            for path in tmp_output_dirs:
-                shutil.rmtree(path)
-            self._log_docking_progress(number_done=sublists_submitted, number_total=number_sublists)
+                # clean-up
+                for path in tmp_output_dirs:
+                    shutil.rmtree(path)
+                self._log_docking_progress(number_done=sublists_submitted, number_total=number_sublists)
+        finally:
+            shutil.rmtree(tmp_run_folder)
 
         # update conformer names to contain the conformer id
         # -> <ligand_number>:<enumeration>:<conformer_number>
@@ -271,7 +330,7 @@ class Gold(Docker):
         self._docking_fail_check()
 
         # generate docking results as dataframe
-        result_parser = GoldResultParser(ligands=[ligand.get_clone() for ligand in self.ligands],
+        result_parser = GoldResultParser(ligands=self.ligands,
                                          fitness_function=self.parameters.fitness_function,
                                          response_value=self.parameters.response_value)
         self._df_results = result_parser.as_dataframe()
@@ -280,21 +339,12 @@ class Gold(Docker):
         self._docking_performed = True
 
     def _dock_subjob(self, sdf_ligand_path, path_sdf_results, tmp_output_dir):
-        # 1) prepare Gold docker: (i) "clone" the docker instance, (ii) set remaining, ligang-specific settings and
-        #                         (iii) initialize this chunk's ligands
-        cur_docker = DockerGold()
-        settings = cur_docker.settings
+        # 1) prepare Gold docker: (i) load the settings template of this run (protein, binding site and parameters),
+        #                         (ii) set the output and (iii) initialize this chunk's ligands
+        settings = DockerGold.Settings.from_file(self._settings_template_path)
         settings.output_directory = tmp_output_dir
         settings.output_file = os.path.basename(path_sdf_results)
         settings.output_format = "sdf"
-        settings.fitness_function = self.parameters.fitness_function
-        settings.early_termination = self.parameters.early_termination
-        settings.autoscale = self.parameters.autoscale
-
-        if self.parameters.diverse_solutions is not None:
-            settings.diverse_solutions = self.parameters.diverse_solutions
-
-        self._initialize_cavity(settings)
 
         settings.add_ligand_file(sdf_ligand_path, ndocks=self.parameters.ndocks)
 
@@ -312,9 +362,12 @@ class Gold(Docker):
                                                        arguments=arguments,
                                                        check=False)
         self._delay4file_system(path=path_sdf_results)
+
+        # 4) parse the poses here rather than on the main process
+        convert_to_binaries(path_sdf_results)
         self._logger.log(f"Finished sublist (input: {sdf_ligand_path}, output directory: {tmp_output_dir}), with return code '{execution_result.returncode}'.", _LE.DEBUG)
 
-    def _prepare_protein(self, settings, tmp_protein_path):
+    def _prepare_protein(self, tmp_protein_path, protein_file_name):
         protein = Protein.from_file(tmp_protein_path)
         protein.remove_all_waters()
         protein.remove_unknown_atoms()
@@ -323,11 +376,9 @@ class Gold(Docker):
         ligands = protein.ligands
         for l in ligands:
             protein.remove_ligand(l.identifier)
-        protein_file_name = os.path.join(settings.output_directory, 'clean_%s.mol2' % protein.identifier)
 
         with EntryWriter(protein_file_name) as writer:
             writer.write(protein)
-        settings.add_protein_file(protein_file_name)
         return ligands
 
     def write_docked_ligands(self, path, mode="all"):
@@ -378,6 +429,9 @@ class Gold(Docker):
     def _get_score_from_conformer(self, conformer):
         return float(conformer.GetProp(self._scoring_function_parameters[_ROE.TAG]))
 
+    def _get_best(self) -> str:
+        return self._scoring_function_parameters[_ROE.BEST]
+
     def _sort_conformers(self, conformers: list, best=None) -> list:
         return super()._sort_conformers(conformers=conformers,
                                         best=self._scoring_function_parameters[_ROE.BEST])
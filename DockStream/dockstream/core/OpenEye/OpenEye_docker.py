@@ -143,22 +143,25 @@ class OpenEye(Docker):
 
         sublists_submitted = 0
         while sublists_submitted < len(sublists):
-            processes = []
-            return_queues = []
-            for _ in range(number_cores):
-                if sublists_submitted >= len(sublists):
+            # stop dispatching once the deadline has passed; the remaining ligands will not be docked
+            if self._deadline_reached():
+                self._skip_sublists(sublists[sublists_submitted:])
+                break
+
+            # run in parallel; subjobs still running at the deadline are killed and their ligands recorded
+            cur_slice_sublists = sublists[sublists_submitted:sublists_submitted + number_cores]
+            return_queues = [multiprocessing.Queue() for _ in cur_slice_sublists]
+            self._run_subjobs(target=self._dock_subjob,
+                              list_arguments=list(zip(cur_slice_sublists, return_queues)),
+                              list_identifiers=[[ligand.get_identifier() for ligand in sublist]
+                                                for sublist in cur_slice_sublists])
+            sublists_submitted += len(cur_slice_sublists)
+
+            for sublist, return_queue in zip(cur_slice_sublists, return_queues):
+                # subjobs that were killed or terminated with an error did not hand over their (complete) result
+                if any([ligand.get_identifier() in self._failure_reasons for ligand in sublist]):
                     continue
-                cur_queue = multiprocessing.Queue()
-                p = multiprocessing.Process(target=self._dock_subjob, args=(sublists[sublists_submitted],
-                                                                            cur_queue))
-                processes.append(p)
-                p.start()
-                return_queues.append(cur_queue)
-                sublists_submitted += 1
-            for p in processes:
-                p.join()
-
-            for cur_slice in [q.get() for q in return_queues]:
+                cur_slice = return_queue.get()
                 for cur_ligand_name in cur_slice.keys():
                     for ligand in self.ligands:
                         if cur_ligand_name == ligand.get_identifier():
@@ -172,7 +175,7 @@ class OpenEye(Docker):
 
         # use self.docker.GetHighScoresAreBetter() to get a boolean indicating whether the particular scoring function
         # used considers "lower" values to be better or not; but the compounds are ordered properly here
-        result_parser = OpenEyeResultParser(ligands=[ligand.get_clone() for ligand in self.ligands])
+        result_parser = OpenEyeResultParser(ligands=self.ligands)
         self._df_results = result_parser.as_dataframe()
         self._logger.log(f"Successfully docked {len(self.ligands)} molecules.", _LE.DEBUG)
 
@@ -132,7 +132,8 @@ class OpenEyeLigandPreparator(LigandPreparator, BaseModel):
         ofs = oechem.oemolostream()
         format = format.upper()
 
-        ligands_copy = [deepcopy(lig) for lig in self.ligands]
+        # copy-on-write clones: only the molecules are copied, when tagged
+        ligands_copy = [lig.get_clone() for lig in self.ligands]
 
         # check and specify format of file
         if format == _LP.OUTPUT_FORMAT_SDF:
@@ -146,7 +147,7 @@ class OpenEyeLigandPreparator(LigandPreparator, BaseModel):
             for lig in ligands_copy:
                 lig.add_tags_to_molecule()
                 if lig.get_molecule() is not None:
-                    mol = deepcopy(lig.get_molecule())
+                    mol = lig.get_mutable_molecule()
                     mol.SetTitle(lig.get_identifier())
                     oechem.OEWriteMolecule(ofs, mol)
         else:
@@ -22,7 +22,7 @@ from dockstream.loggers.blank_logger import BlankLogger
 from dockstream.utils.dockstream_exceptions import LigandPreparationFailed
 
 from dockstream.utils.translations.molecule_translator import MoleculeTranslator
-from dockstream.utils.smiles import to_mol, to_smiles
+from dockstream.utils.smiles import to_smiles
 
 from dockstream.utils.execute_external.Omega import OmegaExecutor
 from dockstream.utils.enums.Omega_enums import OmegaExecutablesEnum, OmegaOutputEnum
@@ -75,7 +75,7 @@ class OmegaLigandPreparator(LigandPreparator, BaseModel):
         if mol_type is None:
             # no molecule attached -> transform smiles into rdkit molecules
             for lig in self.ligands:
-                mol = to_mol(lig.get_smile())
+                mol = lig.get_graph_copy()
                 lig.set_molecule(mol)
                 lig.set_mol_type(_OE.TYPE_OMEGA)
         else:
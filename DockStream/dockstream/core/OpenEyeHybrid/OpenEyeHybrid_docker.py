@@ -1,8 +1,6 @@
 import tempfile
 import os
 import shutil
-from copy import deepcopy
-import multiprocessing
 from enum import Enum
 from typing import Optional, List, Any
 
@@ -16,6 +14,7 @@ from dockstream.utils.execute_external.OE_Hybrid import OpenEyeHybridExecutor
 
 from dockstream.core.docker import Docker
 from dockstream.core.OpenEyeHybrid.OpenEyeHybrid_result_parser import OpenEyeHybridResultParser
+from dockstream.core.result_ingestion import convert_to_binaries, read_result_molecules
 from dockstream.utils.enums.OE_Hybrid_enums import OpenEyeHybridLigandPreparationEnum
 from dockstream.utils.enums.OE_Hybrid_enums import OpenEyeHybridExecutablesEnum, OpenEyeHybridOutputKeywordsEnum
 from dockstream.utils.general_utils import gen_temp_file
@@ -99,6 +98,7 @@ class OpenEyeHybrid(Docker):
         tmp_output_dirs = []
         tmp_input_sdf_paths = []
         tmp_output_sdf_paths = []
+        ligand_identifiers = []
         for start_index, sublist in zip(start_indices, sublists):
             # generate temporary input files and output directory
             cur_tmp_output_dir = tempfile.mkdtemp()
@@ -106,13 +106,15 @@ class OpenEyeHybrid(Docker):
 
             # write-out the temporary input file
             one_written = False
+            cur_identifiers = []
             writer = Chem.SDWriter(cur_tmp_sdf)
             for ligand in sublist:
                 # initialize all ligands (as they could have failed)
                 if ligand.get_molecule() is not None:
-                    mol = deepcopy(ligand.get_molecule())
+                    mol = ligand.get_mutable_molecule()
                     mol.SetProp("_Name", ligand.get_identifier())
                     one_written = True
+                    cur_identifiers.append(ligand.get_identifier())
                     writer.write(mol)
             writer.close()
             if one_written is False:
@@ -126,7 +128,8 @@ class OpenEyeHybrid(Docker):
             # add the path to which "_dock_subjob()" will write the result SDF
             output_sdf_path = gen_temp_file(prefix=str(start_index), suffix="_result.sdf", dir=cur_tmp_output_dir)
             tmp_output_sdf_paths.append(output_sdf_path)
-        return tmp_output_dirs, tmp_input_sdf_paths, tmp_output_sdf_paths
+            ligand_identifiers.append(cur_identifiers)
+        return tmp_output_dirs, tmp_input_sdf_paths, tmp_output_sdf_paths, ligand_identifiers
 
     def _dock(self, number_cores: int):
         # partition ligands into sublists and distribute to processor cores for docking
@@ -135,50 +138,41 @@ class OpenEyeHybrid(Docker):
         self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
+        ligands_by_identifier = self._get_ligands_by_identifier()
 
         while sublists_submitted < len(sublists):
+            # stop dispatching once the deadline has passed; the remaining ligands will not be docked
+            if self._deadline_reached():
+                self._skip_sublists(sublists[sublists_submitted:])
+                break
+
             upper_bound_slice = min((sublists_submitted + slices_per_iteration), len(sublists))
             cur_slice_start_indices = start_indices[sublists_submitted:upper_bound_slice]
             cur_slice_sublists = sublists[sublists_submitted:upper_bound_slice]
 
             # generate paths and initialize molecules (so that if they fail, this can be covered)
             tmp_output_dirs, tmp_input_sdf_paths, \
-            tmp_output_sdf_paths = self._generate_temporary_input_output_files(cur_slice_start_indices,
-                                                                               cur_slice_sublists)
+            tmp_output_sdf_paths, ligand_identifiers = self._generate_temporary_input_output_files(cur_slice_start_indices,
+                                                                                                   cur_slice_sublists)
 
-            # run in parallel; wait for all subjobs to finish before proceeding
-            processes = []
-            for chunk_index in range(len(tmp_output_dirs)):
-                p = multiprocessing.Process(target=self._dock_subjob, args=(tmp_input_sdf_paths[chunk_index],
-                                                                            tmp_output_sdf_paths[chunk_index],
-                                                                            tmp_output_dirs[chunk_index]))
-                processes.append(p)
-                p.start()
-            for p in processes:
-                p.join()
+            # run in parallel; subjobs still running at the deadline are killed and their ligands recorded
+            self._run_subjobs(target=self._dock_subjob,
+                              list_arguments=[(input_sdf_path, output_sdf_path, output_dir)
+                                              for input_sdf_path, output_sdf_path, output_dir
+                                              in zip(tmp_input_sdf_paths, tmp_output_sdf_paths, tmp_output_dirs)],
+                              list_identifiers=ligand_identifiers)
 
             # add the number of input sublists rather than the output temporary folders to account for cases where
             # entire sublists failed to produce an input structure
             sublists_submitted += len(cur_slice_sublists)
 
-            # load the chunks and recombine the result; add conformations
+            # load the chunks (parsed by the subjobs already) and recombine the result; add conformations
             for chunk_index in range(len(tmp_output_dirs)):
-                # this is a protection against the case where empty (file size == 0 bytes) files are generated due to
-                # a failure during docking
-                if not os.path.isfile(tmp_output_sdf_paths[chunk_index]) or os.path.getsize(tmp_output_sdf_paths[chunk_index]) == 0:
-                    continue
-                for molecule in Chem.SDMolSupplier(tmp_output_sdf_paths[chunk_index], removeHs=False):
-                    # it can happen, that ligands have "impossible chemistry" and will be loaded by RDkit as "None"
-                    if molecule is None:
-                        continue
-
-                    cur_conformer_name = str(molecule.GetProp("_Name"))
-
+                for molecule in read_result_molecules(tmp_output_sdf_paths[chunk_index]):
                     # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_conformer_name:
-                            ligand.add_conformer(molecule)
-                            break
+                    ligand = ligands_by_identifier.get(str(molecule.GetProp("_Name")))
+                    if ligand is not None:
+                        ligand.add_conformer(molecule)
 
             # clean-up
             for path in tmp_output_dirs:
@@ -197,7 +191,7 @@ class OpenEyeHybrid(Docker):
         self._docking_fail_check()
 
         # parse the result of the docking step
-        result_parser = OpenEyeHybridResultParser(ligands=[ligand.get_clone() for ligand in self.ligands])
+        result_parser = OpenEyeHybridResultParser(ligands=self.ligands)
         self._df_results = result_parser.as_dataframe()
 
         # set docking flag
@@ -227,6 +221,8 @@ class OpenEyeHybrid(Docker):
                                                                 check=False)
         self._delay4file_system(path=output_sdf_path)
 
+        # parse the poses here rather than on the main process
+        convert_to_binaries(output_sdf_path)
         self._logger.log(f"Finished sublist (input: {input_sdf_path}, output directory: {output_dir}), with return code '{execution_result.returncode}'.", _LE.DEBUG)
 
     def write_docked_ligands(self, path, mode="all"):
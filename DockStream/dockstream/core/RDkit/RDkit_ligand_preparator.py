@@ -12,8 +12,8 @@ from dockstream.utils.dockstream_exceptions import LigandPreparationFailed
 
 from dockstream.core.ligand_preparator import LigandPreparator, _LE
 from dockstream.utils.enums.RDkit_enums import RDkitLigandPreparationEnum
-from dockstream.utils.smiles import to_mol
 from dockstream.core.ligand.ligand import Ligand
+from dockstream.core.RDkit.RDkit_stereo_enumerator import take_stereo_embedded_molecule
 
 _LP = RDkitLigandPreparationEnum()
 
@@ -63,31 +63,44 @@ class RDkitLigandPreparator(LigandPreparator, BaseModel):
         self._references = references
         self._logger.log(f"Stored {len(references)} reference molecules.", _LE.DEBUG)
 
+    def _reuses_stereo_embeddings(self) -> bool:
+        return True
+
     def _smiles_to_molecules(self, ligands: List[Ligand]) -> List[Ligand]:
         for lig in ligands:
-            mol = to_mol(lig.get_smile())
+            mol = lig.get_graph_copy()
             lig.set_molecule(mol)
             lig.set_mol_type(_LP.TYPE_RDKIT)
         return ligands
 
     def generate3Dcoordinates(self, converged_only=False):
-        """Method to generate 3D coordinates, in case the molecules have been built from SMILES."""
+        """Method to generate 3D coordinates, in case the molecules have been built from SMILES. Conformers already
+           embedded during stereo-enumeration are only optimized (and protonated)."""
 
+        pre_embedded = [take_stereo_embedded_molecule(lig) for lig in self.ligands]
         for lig in self.ligands:
             lig.set_molecule(None)
             lig.set_mol_type(None)
-        ligand_list = self._smiles_to_molecules(deepcopy(self.ligands))
+        ligand_list = deepcopy(self.ligands)
+        self._smiles_to_molecules([lig for lig, mol in zip(ligand_list, pre_embedded) if mol is None])
 
         failed = 0
         succeeded = 0
+        reused = 0
         for idx, lig_obj in enumerate(ligand_list):
-            ligand = lig_obj.get_molecule()
-            if ligand is None:
-                continue
+            if pre_embedded[idx] is not None:
+                ligand = pre_embedded[idx]
+                lig_obj.set_mol_type(_LP.TYPE_RDKIT)
+                embed_code = 0
+                reused += 1
+            else:
+                ligand = lig_obj.get_molecule()
+                if ligand is None:
+                    continue
 
-            # note, that parameter "useRandomCoords" needs to be "True", which is often required for larger molecules
-            # as the embedding sometimes fails
-            embed_code = AllChem.EmbedMolecule(ligand, randomSeed=42, useRandomCoords=True)
+                # note, that parameter "useRandomCoords" needs to be "True", which is often required for larger
+                # molecules as the embedding sometimes fails
+                embed_code = AllChem.EmbedMolecule(ligand, randomSeed=42, useRandomCoords=True)
 
             # while MMFF sometimes gives better geometries, UFF has a wider range of parameters and thus will fail less
             # often and is also much quicker
@@ -126,7 +139,7 @@ class RDkitLigandPreparator(LigandPreparator, BaseModel):
         if failed > 0:
             self._logger.log(f"Of {len(self.ligands)}, {failed} could not be embedded.",
                              _LE.WARNING)
-        self._logger.log(f"In total, {succeeded} ligands were successfully embedded (RDkit).", _LE.DEBUG)
+        self._logger.log(f"In total, {succeeded} ligands were successfully embedded (RDkit), {reused} of which were embedded during stereo-enumeration.", _LE.DEBUG)
 
     def align_ligands(self):
         """This method loops over the molecules stored and structurally aligns them to a reference molecule. If
@@ -251,7 +264,7 @@ class RDkitLigandPreparator(LigandPreparator, BaseModel):
         # for rDock, specify the atoms to which the molecule is to be tethered during docking under a
         # hard-coded tag (from source in rDock); here, use the atoms used for alignment earlier
         for lig in self.ligands:
-            lig.get_molecule().SetProp(_LP.TAG_RDOCK_TETHERED_ATOMS,
-                                       lig.get_molecule().GetProp(_LP.TAG_ALIGNED_ATOMS))
+            lig.get_mutable_molecule().SetProp(_LP.TAG_RDOCK_TETHERED_ATOMS,
+                                               lig.get_molecule().GetProp(_LP.TAG_ALIGNED_ATOMS))
 
         self._logger.log(f"Set tethering tag (rDock) for {len(self.ligands)} molecules.", _LE.DEBUG)
@@ -9,6 +9,26 @@ from rdkit.Chem.EnumerateStereoisomers import EnumerateStereoisomers, StereoEnum
 
 from dockstream.core.stereo_enumerator import StereoEnumerator
 from dockstream.core.ligand.ligand import Ligand, get_next_enumeration_number_for_ligand
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+
+_LP = LigandPreparationEnum()
+
+# private property (not written out), holding the smile the attached conformer was embedded for
+_TAG_EMBEDDED_SMILE = "_StereoEmbeddedSmile"
+
+
+def take_stereo_embedded_molecule(ligand: Ligand):
+    """Detaches and returns the conformer embedded during stereo-enumeration, if it is attached to the ligand and still
+       matches its smile (i.e. was not invalidated by a transformation afterwards), and returns None otherwise."""
+    molecule = ligand.get_molecule()
+    if not isinstance(molecule, Chem.Mol) or not molecule.HasProp(_TAG_EMBEDDED_SMILE):
+        return None
+    if molecule.GetProp(_TAG_EMBEDDED_SMILE) != ligand.get_smile():
+        return None
+    molecule.ClearProp(_TAG_EMBEDDED_SMILE)
+    ligand.set_molecule(None)
+    ligand.set_mol_type(None)
+    return molecule
 
 
 class RDKitStereoEnumeratorParameters(BaseModel):
@@ -26,14 +46,17 @@ class RDKitStereoEnumerator(StereoEnumerator, BaseModel):
     def __init__(self, **data):
         super().__init__(**data)
 
-    def enumerate(self, ligands: List[Ligand]) -> List[Ligand]:
+    def enumerate(self, ligands: List[Ligand], keep_embeddings: bool = False) -> List[Ligand]:
+        # RDKit attaches the conformer of its feasibility check to every isomer it yields (and only counts those towards
+        # "maxIsomers"); if the embeddings are to be kept, that conformer is handed on, so every isomer is embedded once
+        embed_isomers = self.parameters.try_embedding and keep_embeddings
         new_ligands_list = []
         opts = StereoEnumerationOptions(tryEmbedding=self.parameters.try_embedding,
                                         unique=self.parameters.unique,
                                         maxIsomers=self.parameters.max_isomers,
                                         rand=self.parameters.rand)
         for ligand in ligands:
-            molecule = Chem.MolFromSmiles(ligand.get_smile())
+            molecule = ligand.get_graph_copy()
             if not molecule:
                 # could not build molecule, keep the original ligand
                 new_ligands_list.append(deepcopy(ligand))
@@ -46,13 +69,18 @@ class RDKitStereoEnumerator(StereoEnumerator, BaseModel):
                 continue
 
             # loop over stereo-isomers, translate them into smiles and create new ligand objects from them
-            for new_smile_id, new_smile in enumerate(sorted(Chem.MolToSmiles(x, isomericSmiles=True) for x in isomers)):
+            isomers = sorted(((Chem.MolToSmiles(x, isomericSmiles=True), x) for x in isomers), key=lambda x: x[0])
+            for new_smile, isomer in isomers:
+                # molecules without stereo-centers are passed through by RDKit without being embedded
+                keep_isomer = embed_isomers and isomer.GetNumConformers() > 0
+                if keep_isomer:
+                    isomer.SetProp(_TAG_EMBEDDED_SMILE, new_smile)
                 new_ligands_list.append(Ligand(smile=new_smile,
                                                original_smile=ligand.get_original_smile(),
                                                ligand_number=ligand.get_ligand_number(),
                                                enumeration=get_next_enumeration_number_for_ligand(new_ligands_list,
                                                                                                   ligand.get_ligand_number()),
-                                               molecule=None,
-                                               mol_type=None,
+                                               molecule=isomer if keep_isomer else None,
+                                               mol_type=_LP.TYPE_RDKIT if keep_isomer else None,
                                                name=ligand.get_name()))
         return new_ligands_list
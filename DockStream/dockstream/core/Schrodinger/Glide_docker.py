@@ -1,9 +1,8 @@
 import tempfile
-import multiprocessing
 import os
 import time
-import gzip
 import shutil
+import math
 from enum import Enum
 from typing import Optional, Dict, List, Union, Iterable
 from typing_extensions import Literal  # Required for Python 3.7. From 3.8 Literal is in typing.
@@ -11,16 +10,18 @@ from typing_extensions import Literal  # Required for Python 3.7. From 3.8 Liter
 from copy import deepcopy
 
 import rdkit.Chem as Chem
-from pydantic import PrivateAttr, BaseModel, Field
+from pydantic import PrivateAttr, BaseModel, Field, validator
 
 from dockstream.core.docker import Docker, _LE
 from dockstream.core.Schrodinger.license_token_guard import SchrodingerLicenseTokenGuard
 from dockstream.core.Schrodinger.Glide_result_parser import GlideResultParser
+from dockstream.core.result_ingestion import convert_to_binaries, read_result_molecules
 from dockstream.utils.execute_external.Schrodinger import SchrodingerExecutor
 from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
 from dockstream.utils.enums.Schrodinger_enums import SchrodingerExecutablesEnum, \
                                                  SchrodingerDockingConfigurationEnum, \
                                                  SchrodingerOutputEnum
+from dockstream.utils.enums.Glide_funnel_enums import GlideFunnelEnum
 from dockstream.utils.general_utils import gen_temp_file
 
 from dockstream.utils.translations.molecule_translator import MoleculeTranslator
@@ -31,6 +32,7 @@ _LP = LigandPreparationEnum()
 _CE = SchrodingerDockingConfigurationEnum()
 _EE = SchrodingerExecutablesEnum()
 _ROE = SchrodingerOutputEnum()
+_GF = GlideFunnelEnum()
 
 
 class Parallelization(BaseModel):
@@ -115,6 +117,44 @@ class AdvancedGlideKeywords(BaseModel):
     REF_LIGAND_FILE: Optional[str] = Field(default=None, title="Reference ligand file", description="Reference ligand file (required if USE_REF_LIGAND is set to True).")
 
 
+class GlideFunnelStage(BaseModel):
+    precision: GlidePrecision
+    fraction: float = Field(default=1.0, gt=0, le=1, description="Fraction of the ligands docked in the previous stage (best first) handed over to this stage; ignored for the first stage.")
+
+    class Config:
+        use_enum_values = True
+
+
+class GlideFunnel(BaseModel):
+    """Docking funnel: all ligands are docked with the precision of the first stage and the best fraction of them is
+    handed over to the next stage (e.g. HTVS, then SP, then XP). All stages use the same grid and keywords (apart from
+    the precision). The poses and score of a ligand are taken from the deepest stage it reached.
+    """
+
+    stages: List[GlideFunnelStage] = [GlideFunnelStage(precision=GlidePrecision.HTVS),
+                                      GlideFunnelStage(precision=GlidePrecision.SP, fraction=0.1),
+                                      GlideFunnelStage(precision=GlidePrecision.XP, fraction=0.1)]
+
+    @validator("stages")
+    def _check_stages(cls, stages):
+        if len(stages) == 0:
+            raise ValueError("A funnel requires at least one stage.")
+        return stages
+
+
+def select_top_fraction(best_scores: dict, fraction: float) -> list:
+    """Returns the identifiers of the best (lowest scoring) fraction of the ligands, at least one if any.
+
+    :param best_scores: dictionary, mapping ligand identifiers to their best score
+    :param fraction: The fraction of ligands to be selected
+    :return: list of the selected identifiers, best first
+    """
+    if len(best_scores) == 0:
+        return []
+    number_selected = max(1, math.ceil(round(fraction * len(best_scores), 6)))
+    return sorted(best_scores.keys(), key=lambda identifier: best_scores[identifier])[:number_selected]
+
+
 class GlideParameters(BaseModel):
     prefix_execution: Optional[str] = None
     binary_location: Optional[str] = None
@@ -124,6 +164,7 @@ class GlideParameters(BaseModel):
     glide_flags: Optional[Dict]
     glide_keywords: Optional[GlideKeywords]
     advanced_glide_keywords: Optional[AdvancedGlideKeywords]
+    funnel: Optional[GlideFunnel] = None
 
 
 def stringify(obj):
@@ -360,6 +401,7 @@ class Glide(Docker, BaseModel):
         tmp_output_dirs = []
         tmp_input_mae_paths = []
         tmp_output_sdf_paths = []
+        ligand_identifiers = []
         for start_index, sublist in zip(start_indices, sublists):
             # generate temporary input files and output directory
             cur_tmp_output_dir = tempfile.mkdtemp()
@@ -369,12 +411,14 @@ class Glide(Docker, BaseModel):
             # write-out the temporary input file
             writer = Chem.SDWriter(cur_tmp_sdf)
             one_written = False
+            cur_identifiers = []
             for ligand in sublist:
                 # initialize all ligands (as they could have failed)
                 if ligand.get_molecule() is not None:
-                    mol = deepcopy(ligand.get_molecule())
+                    mol = ligand.get_mutable_molecule()
                     mol.SetProp("_Name", ligand.get_identifier())
                     one_written = True
+                    cur_identifiers.append(ligand.get_identifier())
                     writer.write(mol)
             writer.close()
             if one_written is False:
@@ -390,9 +434,71 @@ class Glide(Docker, BaseModel):
             tmp_output_sdf_paths.append(output_sdf_path)
             tmp_input_mae_paths.append(cur_tmp_mae)
             tmp_output_dirs.append(cur_tmp_output_dir)
-        return tmp_output_dirs, tmp_input_mae_paths, tmp_output_sdf_paths
+            ligand_identifiers.append(cur_identifiers)
+        return tmp_output_dirs, tmp_input_mae_paths, tmp_output_sdf_paths, ligand_identifiers
 
     def _dock(self, number_cores: int):
+        if self.parameters.funnel is None:
+            self._dock_stage(number_cores=number_cores)
+        else:
+            self._dock_funnel(number_cores=number_cores)
+
+        # sort the conformers (best to worst) and update their names to contain the conformer id
+        # -> <ligand_number>:<enumeration>:<conformer_number>
+        for ligand in self.ligands:
+            ligand.set_conformers(sorted(ligand.get_conformers(),
+                                         key=lambda x: float(x.GetProp(_ROE.GLIDE_DOCKING_SCORE)), reverse=False))
+            ligand.add_tags_to_conformers()
+
+        # log any docking fails
+        self._docking_fail_check()
+
+        # generate docking results as dataframe
+        result_parser = GlideResultParser(ligands=self.ligands)
+        self._df_results = result_parser.as_dataframe()
+
+        # set docking flag
+        self._docking_performed = True
+
+    def _dock_funnel(self, number_cores: int):
+        all_ligands = self.ligands
+        candidates = all_ligands
+        docked = []
+        try:
+            for stage_number, stage in enumerate(self.parameters.funnel.stages):
+                # hand over the best fraction of the ligands docked in the previous stage (by their best score there);
+                # ligands that failed it keep their earlier poses, but are not ranked against the new scores
+                if stage_number > 0:
+                    best_scores = {ligand.get_identifier(): min([self._get_score_from_conformer(conformer)
+                                                                 for conformer in ligand.get_conformers()])
+                                   for ligand in docked}
+                    selected = set(select_top_fraction(best_scores, stage.fraction))
+                    candidates = [ligand for ligand in docked if ligand.get_identifier() in selected]
+                    if len(candidates) == 0:
+                        break
+
+                # keep the poses of the previous stage in case a ligand fails in this one
+                previous_conformers = {ligand.get_identifier(): ligand.get_conformers() for ligand in candidates}
+                for ligand in candidates:
+                    ligand.clear_conformers()
+                self.ligands = candidates
+                self._dock_stage(number_cores=number_cores, precision=stage.precision)
+
+                docked = []
+                for ligand in candidates:
+                    if len(ligand.get_conformers()) > 0:
+                        docked.append(ligand)
+                        for conformer in ligand.get_mutable_conformers():
+                            conformer.SetProp(_GF.TAG_FUNNEL_STAGE, str(stage_number + 1))
+                    elif len(previous_conformers[ligand.get_identifier()]) > 0:
+                        ligand.set_conformers(previous_conformers[ligand.get_identifier()])
+                        self._failure_reasons.pop(ligand.get_identifier(), None)
+                self._logger.log(f"Funnel stage {stage_number + 1} ({stage.precision}): docked {len(docked)} of {len(candidates)} ligands.",
+                                 _LE.INFO)
+        finally:
+            self.ligands = all_ligands
+
+    def _dock_stage(self, number_cores: int, precision: Optional[str] = None):
         # partition ligands into sublists and distribute to processor cores for docking
         start_indices, sublists = self.get_sublists_for_docking(number_cores=number_cores)
         number_sublists = len(sublists)
@@ -400,80 +506,59 @@ class Glide(Docker, BaseModel):
         self._logger.log(f"Split ligands into {number_sublists} sublists for docking.", _LE.DEBUG)
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
+        ligands_by_identifier = self._get_ligands_by_identifier()
 
         while sublists_submitted < len(sublists):
+            # stop dispatching once the deadline has passed; the remaining ligands will not be docked
+            if self._deadline_reached():
+                self._skip_sublists(sublists[sublists_submitted:])
+                break
+
             upper_bound_slice = min((sublists_submitted + slices_per_iteration), len(sublists))
             cur_slice_start_indices = start_indices[sublists_submitted:upper_bound_slice]
             cur_slice_sublists = sublists[sublists_submitted:upper_bound_slice]
 
             # generate paths and initialize molecules (so that if they fail, this can be covered)
             tmp_output_dirs, tmp_input_mae_paths, \
-            tmp_output_sdf_paths = self._generate_temporary_input_output_files(cur_slice_start_indices,
-                                                                               cur_slice_sublists)
+            tmp_output_sdf_paths, ligand_identifiers = self._generate_temporary_input_output_files(cur_slice_start_indices,
+                                                                                                   cur_slice_sublists)
 
             # call "token guard" method (only executed, if block is specified in the configuration), which will wait
             # with the execution if not enough tokens are available at the moment
             self._apply_token_guard()
 
-            # run in parallel; wait for all subjobs to finish before proceeding
-            processes = []
-            for chunk_index in range(len(tmp_output_dirs)):
-                p = multiprocessing.Process(target=self._dock_subjob, args=(tmp_input_mae_paths[chunk_index],
-                                                                            tmp_output_sdf_paths[chunk_index],
-                                                                            tmp_output_dirs[chunk_index],
-                                                                            number_ligands_per_sublist))
-                processes.append(p)
-                p.start()
-            for p in processes:
-                p.join()
+            # run in parallel; subjobs still running at the deadline are killed and their ligands recorded
+            self._run_subjobs(target=self._dock_subjob,
+                              list_arguments=[(input_mae_path, output_sdf_path, output_dir,
+                                               number_ligands_per_sublist, precision)
+                                              for input_mae_path, output_sdf_path, output_dir
+                                              in zip(tmp_input_mae_paths, tmp_output_sdf_paths, tmp_output_dirs)],
+                              list_identifiers=ligand_identifiers)
 
             # add the number of input sublists rather than the output temporary folders to account for cases where
             # entire sublists failed to produce an input structure
             sublists_submitted += len(cur_slice_sublists)
 
-            # parse the resulting sdf files
+            # collect the results, which have been parsed by the subjobs already
             for path_sdf_results in tmp_output_sdf_paths:
-                # this is a protection against the case where empty (file size == 0 bytes) files are generated due to
-                # a failure during docking
-                if not os.path.isfile(path_sdf_results) or os.path.getsize(path_sdf_results) == 0:
-                    continue
-
-                for molecule in Chem.SDMolSupplier(path_sdf_results, removeHs=False):
-                    if molecule is None:
-                        continue
-                    cur_conformer_name = str(molecule.GetProp("_Name"))
-
+                for molecule in read_result_molecules(path_sdf_results):
                     # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_conformer_name:
-                            ligand.add_conformer(molecule)
-                            break
+                    ligand = ligands_by_identifier.get(str(molecule.GetProp("_Name")))
+                    if ligand is not None:
+                        ligand.add_conformer(molecule)
 
             # clean-up
             for path in tmp_output_dirs:
                 shutil.rmtree(path)
             self._log_docking_progress(number_done=sublists_submitted, number_total=number_sublists)
 
-        # sort the conformers (best to worst) and update their names to contain the conformer id
-        # -> <ligand_number>:<enumeration>:<conformer_number>
-        for ligand in self.ligands:
-            ligand.set_conformers(sorted(ligand.get_conformers(),
-                                         key=lambda x: float(x.GetProp(_ROE.GLIDE_DOCKING_SCORE)), reverse=False))
-            ligand.add_tags_to_conformers()
-
-        # log any docking fails
-        self._docking_fail_check()
-
-        # generate docking results as dataframe
-        result_parser = GlideResultParser(ligands=[ligand.get_clone() for ligand in self.ligands])
-        self._df_results = result_parser.as_dataframe()
-
-        # set docking flag
-        self._docking_performed = True
-
-    def _dock_subjob(self, mae_ligand_path, path_sdf_results, tmp_output_dir, chunk_size):
+    def _dock_subjob(self, mae_ligand_path, path_sdf_results, tmp_output_dir, chunk_size, precision=None):
         keywords = self._all_keywords()
 
+        # in funnel mode, the precision is set by the stage
+        if precision is not None:
+            keywords[_GF.GLIDE_PRECISION] = str(precision)
+
         # 1) add "LIGANDFILE" keyword to list of keywords: full path to "mae" formatted ligands
         keywords[_EE.GLIDE_LIGANDFILE] = mae_ligand_path
 
@@ -531,11 +616,12 @@ class Glide(Docker, BaseModel):
         else:
             self._print_log_file(path_tmp_log)
 
-        # 7) collect the results; Glide outputs the sdf with a given, semi-hard-coded path; extract the sdf file
+        # 7) collect the results; Glide outputs the gzipped sdf with a given, semi-hard-coded path, which is moved
+        #    (still compressed) to the result path first, so that the main process can fall back to parsing it if
+        #    no binaries are written; it is then parsed directly and handed over as binaries
         if os.path.isfile(path_tmp_results):
-            with gzip.open(path_tmp_results, "rb") as fin:
-                with open(path_sdf_results, "wb") as fout:
-                    shutil.copyfileobj(fin, fout)
+            shutil.move(path_tmp_results, path_sdf_results)
+            convert_to_binaries(path_sdf_results)
 
     def write_docked_ligands(self, path, mode="all"):
         """This method overrides the parent class, docker.py write_docked_ligands method. This method writes docked
@@ -2,6 +2,7 @@ import pandas as pd
 from dockstream.core.result_parser import ResultParser
 
 from dockstream.utils.enums.Schrodinger_enums import SchrodingerOutputEnum
+from dockstream.utils.enums.Glide_funnel_enums import GlideFunnelEnum
 
 
 class GlideResultParser(ResultParser):
@@ -16,4 +17,11 @@ class GlideResultParser(ResultParser):
             _ROE = SchrodingerOutputEnum()
             return float(conformer.GetProp(_ROE.GLIDE_DOCKING_SCORE))
 
-        return super()._construct_dataframe_with_funcobject(func_get_score)
+        df = super()._construct_dataframe_with_funcobject(func_get_score)
+
+        # add the funnel stage the poses were taken from, if run in funnel mode (same order as the rows)
+        _GF = GlideFunnelEnum()
+        conformers = [conformer for ligand in self._ligands for conformer in ligand.get_conformers()]
+        if len(conformers) > 0 and all(conformer.HasProp(_GF.TAG_FUNNEL_STAGE) for conformer in conformers):
+            df[_GF.DF_FUNNEL_STAGE] = [int(conformer.GetProp(_GF.TAG_FUNNEL_STAGE)) for conformer in conformers]
+        return df
@@ -1,13 +1,24 @@
+import os
 import abc
+import json
 import time
-from copy import deepcopy
+import signal
+import resource
 import multiprocessing
 from enum import Enum
 from typing import List, Optional, Union
 
 import pandas as pd
-from pydantic import BaseModel, PrivateAttr
-
+from pydantic import BaseModel, Field, PrivateAttr
+from typing_extensions import Literal
+
+from dockstream.core.ligand.ligand_deduplication import expand_duplicates
+from dockstream.core.ligand.ligand_input_parser import LigandInputParser
+from dockstream.core.ligand_preparator import Input
+from dockstream.core.ligand_filter import LigandFilter
+from dockstream.core.pose_archive import PoseArchive, is_pose_archive_path
+from dockstream.core.result_parser import set_result_column_types
+from dockstream.core.surrogate import Surrogate
 from dockstream.loggers.docking_logger import DockingLogger
 from dockstream.loggers.blank_logger import BlankLogger
 from dockstream.utils.dockstream_exceptions import DockingRunFailed
@@ -17,12 +28,16 @@ from dockstream.utils.parallelization.general_utils import split_into_sublists,
 from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
 from dockstream.utils.enums.docking_enum import DockingConfigurationEnum, ResultKeywordsEnum
 from dockstream.utils.enums.logging_enums import LoggingConfigEnum
+from dockstream.utils.enums.score_assignment_enums import ScoreAssignmentEnum
+from dockstream.utils.enums.result_output_enums import ResultOutputEnum
 from dockstream.utils.general_utils import *
 
 _DE = DockingConfigurationEnum()
 _RK = ResultKeywordsEnum()
 _LE = LoggingConfigEnum()
 _LPE = LigandPreparationEnum()
+_SA = ScoreAssignmentEnum()
+_RO = ResultOutputEnum()
 
 
 class OutputMode(str, Enum):
@@ -61,12 +76,62 @@ class Output(BaseModel):
     scores: Scores
 
 
+class SubjobLimits(BaseModel):
+    """Resource limits for docking subjobs.
+
+    The wall-clock limit is given per ligand and multiplied by the number of ligands in a subjob; the memory limit
+    caps the address space of the subjob and every process it spawns (i.e. the backend binary).
+    """
+
+    time_limit_per_ligand: Optional[float] = Field(default=None, gt=0)
+    memory_limit_mb: Optional[int] = Field(default=None, gt=0)
+
+
+class Rescoring(BaseModel):
+    """Rescoring of existing poses instead of a docking search.
+
+    The poses are read from the SDF specified as "input" (parsed like the SDF input of a ligand preparation, so the
+    ligand numbers follow the "initialization_mode") and handed over to the backend without embedding. Without an
+    "input", the molecules of the input pools are rescored as they are. Mode "score_only" scores the poses as they
+    are, "local_only" optimizes them locally first.
+    """
+
+    mode: Literal["score_only", "local_only"] = "score_only"
+    input: Optional[Input] = None
+
+
+_MISSED_DEADLINE = "missed the deadline"
+
+
+def _run_limited_subjob(target, arguments, memory_limit_mb):
+    # executed in the child process: use an own process group, so that the backend binaries can be killed alongside
+    # and set the memory limit, which is inherited by all processes started from here
+    try:
+        os.setpgid(0, 0)
+    except OSError:
+        pass
+    if memory_limit_mb is not None:
+        limit = int(memory_limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    target(*arguments)
+
+
+def _kill_subjob(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+    process.join()
+
+
 class Docker(BaseModel, metaclass=abc.ABCMeta):
     """Virtual class implementing the interface to the actual docking backends."""
 
     input_pools: Union[str, List[str]]
     output: Optional[Output]
     run_id: Optional[str]
+    ligand_filter: Optional[LigandFilter] = None
+    surrogate: Optional[Surrogate] = None
 
     ligands: List = []
 
@@ -76,6 +141,10 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
     _df_results = PrivateAttr()
     _run_parameters = PrivateAttr()
     _docking_performed = PrivateAttr()
+    _failure_reasons = PrivateAttr()
+    _deadline = PrivateAttr()
+    _assigned_scores = PrivateAttr()
+    _pose_archive_step = PrivateAttr()
 
     class Config:
         underscore_attrs_are_private = True
@@ -97,6 +166,10 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
         self.ligands = []
 
         self._docking_performed = False
+        self._failure_reasons = {}
+        self._deadline = None
+        self._assigned_scores = {}
+        self._pose_archive_step = None
 
     def add_molecules(self, molecules: list):
         """This method appends prepared ligands for docking to a list. It must be overrode by an add_molecules method
@@ -113,9 +186,10 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
         if len(self.ligands) == 0:
             raise Exception("Add molecules to dock first.")
 
-        # delete conformers
+        # delete conformers and failures of previous runs
         for ligand in self.ligands:
             ligand.clear_conformers()
+        self._failure_reasons = {}
 
         # prepare the parallelization and set the number of cores to be used
         number_cores = nested_get(self._run_parameters, [_DE.PARAMS,
@@ -128,12 +202,111 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
             # use all available cores minus 1
             number_cores = multiprocessing.cpu_count() + number_cores
 
-        # call the backend-specific, overloaded docking routine
-        self._dock(number_cores=number_cores)
+        # ligands rejected by the filter get a score assigned and are not handed over to the backend
+        self._assigned_scores = {}
+        if self.ligand_filter is not None:
+            self._apply_ligand_filter()
+
+        # so do ligands, which the surrogate model predicts to be unable to beat the threshold
+        if self.surrogate is not None:
+            self._apply_surrogate()
+
+        # call the backend-specific, overloaded docking routine for the remaining ligands
+        all_ligands = self.ligands
+        self.ligands = [ligand for ligand in all_ligands if ligand.get_identifier() not in self._assigned_scores]
+        try:
+            if len(self.ligands) > 0:
+                self._dock(number_cores=number_cores)
+            else:
+                self._docking_performed = True
+        finally:
+            self.ligands = all_ligands
+        self._add_assigned_results()
+
+        # the new docking results are used by the surrogate model from now on
+        if self.surrogate is not None:
+            self._update_surrogate()
+
+        # report how many ligands could not be docked in time (so that batch size and deadline can be balanced)
+        if self._deadline is not None:
+            missed = len([reason for reason in self._failure_reasons.values() if reason == _MISSED_DEADLINE])
+            self._logger.log(f"{missed} of {len(self.ligands)} ligand enumeration(s) missed the deadline.",
+                             _LE.INFO if missed == 0 else _LE.WARNING)
 
     def _dock(self, number_cores):
         raise NotImplementedError
 
+    def _get_box_size(self):
+        """Returns the edge lengths (x, y, z) of the docking box for backends that define one, otherwise None."""
+        return None
+
+    def _assign_score(self, identifier: str, score: float, source: str):
+        self._assigned_scores[identifier] = (score, source)
+
+    def _apply_ligand_filter(self):
+        box_size = self._get_box_size()
+        if self.ligand_filter.check_box_extent and box_size is None:
+            self._logger.log(f"Backend {type(self).__name__} does not define a box, skipping the extent check.",
+                             _LE.WARNING)
+        rejections = self.ligand_filter.get_rejections(ligands=self.ligands, box_size=box_size)
+        for identifier, reason in rejections.items():
+            self._assign_score(identifier, self.ligand_filter.rejected_score, _SA.SCORE_SOURCE_FILTER)
+            self._logger.log(f"Ligand {identifier} rejected by filter: {reason}.", _LE.DEBUG)
+        self._logger.log(f"Filter rejected {len(rejections)} of {len(self.ligands)} ligand enumeration(s) before docking.",
+                         _LE.INFO)
+
+    def _get_surrogate_context(self) -> str:
+        # results can only be shared for identical receptors and boxes, i.e. the same backend parameters
+        parameters = getattr(self, _DE.PARAMS, None)
+        if isinstance(parameters, BaseModel):
+            parameters = parameters.dict()
+        parameters = {key: value for key, value in (parameters or {}).items()
+                      if key not in _SA.SURROGATE_CONTEXT_IGNORED_PARAMETERS}
+        return json.dumps({_DE.BACKEND: type(self).__name__, _DE.PARAMS: parameters}, sort_keys=True, default=str)
+
+    def _apply_surrogate(self):
+        self.surrogate.set_context(self._get_surrogate_context())
+        candidates = [ligand for ligand in self.ligands if ligand.get_identifier() not in self._assigned_scores]
+        skipped = self.surrogate.get_skipped(candidates, best=self._get_best())
+        for identifier, prediction in skipped.items():
+            self._assign_score(identifier, prediction, _SA.SCORE_SOURCE_SURROGATE)
+        self._logger.log(f"Surrogate model (trained on {self.surrogate.get_training_size()} results) skipped docking of {len(skipped)} of {len(candidates)} ligand enumeration(s).",
+                         _LE.INFO)
+
+    def _update_surrogate(self):
+        ligands_scores = []
+        for ligand in self.ligands:
+            if len(ligand.get_conformers()) == 0:
+                continue
+            scores = [self._get_score_from_conformer(conformer) for conformer in ligand.get_conformers()]
+            ligands_scores.append((ligand, min(scores) if self._get_best() == "min" else max(scores)))
+        self.surrogate.update(ligands_scores)
+
+    def _add_assigned_results(self):
+        # ligands with an assigned score (and no poses) are added to the results with their score's source stated
+        rows = []
+        for ligand in self.ligands:
+            if ligand.get_identifier() not in self._assigned_scores or len(ligand.get_conformers()) > 0:
+                continue
+            score, source = self._assigned_scores[ligand.get_identifier()]
+            rows.append({_RK.DF_LIGAND_NUMBER: ligand.get_ligand_number(),
+                         _RK.DF_LIGAND_ENUMERATION: ligand.get_enumeration(),
+                         _RK.DF_CONFORMER: 0,
+                         _RK.DF_LIGAND_NAME: ligand.get_name() if ligand.get_name() is not None
+                                             else ligand.get_identifier() + ":0",
+                         _RK.DF_SCORE: score,
+                         _RK.DF_SMILES: ligand.get_smile(),
+                         _RK.DF_LOWEST_CONFORMER: True,
+                         _SA.DF_SCORE_SOURCE: source})
+        if len(rows) == 0:
+            return
+        df_docked = self._df_results if self._df_results is not None else pd.DataFrame()
+        df_docked = df_docked.assign(**{_SA.DF_SCORE_SOURCE: _SA.SCORE_SOURCE_DOCKING})
+        self._df_results = pd.concat([df_docked, pd.DataFrame(rows)], ignore_index=True)
+        self._df_results = self._df_results.sort_values(by=[_RK.DF_LIGAND_NUMBER, _RK.DF_LIGAND_ENUMERATION],
+                                                        kind="mergesort").reset_index(drop=True)
+        self._df_results = set_result_column_types(self._df_results)
+
     def has_result(self) -> bool:
         """This method returns whether the pandas dataframe has been populated with docking data by a given backend
         (ex. Schrodinger Glide).
@@ -188,12 +361,194 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
             partitions = min(number_cores, len(self.ligands))
             return split_into_sublists(input_list=self.ligands, partitions=partitions, slice_size=None)
 
+    def _run_subjobs(self, target, list_arguments: list, list_identifiers: list, limits: SubjobLimits = None):
+        """Runs one process per subjob and waits until all of them are finished. If limits are specified, subjobs
+        exceeding their wall-clock limit are killed (alongside all processes they started) and all their ligands
+        are recorded as failed, as are the ligands of subjobs that terminated with an error (e.g. out of memory).
+
+        :param target: The function executing a subjob (usually "_dock_subjob")
+        :param list_arguments: One tuple of arguments for "target" per subjob
+        :param list_identifiers: One list of ligand identifiers per subjob
+        :param limits: The wall-clock and memory limits to be enforced
+        :type limits: SubjobLimits, optional
+        """
+        if limits is None:
+            limits = SubjobLimits()
+
+        processes = []
+        for arguments in list_arguments:
+            p = multiprocessing.Process(target=_run_limited_subjob, args=(target, arguments, limits.memory_limit_mb))
+            p.start()
+            try:
+                # also set the group from the parent to avoid a race with an early kill
+                os.setpgid(p.pid, p.pid)
+            except OSError:
+                pass
+            processes.append((p, time.time()))
+
+        for (p, start_time), identifiers in zip(processes, list_identifiers):
+            reason = None
+            end_time = None
+            if limits.time_limit_per_ligand is not None:
+                time_limit = limits.time_limit_per_ligand * max(len(identifiers), 1)
+                end_time = start_time + time_limit
+                reason = f"subjob exceeded the time limit of {time_limit} seconds and was killed"
+            if self._deadline is not None and (end_time is None or self._deadline < end_time):
+                end_time = self._deadline
+                reason = _MISSED_DEADLINE
+            if end_time is None:
+                p.join()
+            else:
+                p.join(timeout=max(end_time - time.time(), 0))
+            if p.is_alive():
+                _kill_subjob(p)
+            else:
+                reason = None
+                if p.exitcode != 0:
+                    reason = f"subjob terminated with exit code {p.exitcode}"
+                    if limits.memory_limit_mb is not None:
+                        reason = f"{reason} (memory limit: {limits.memory_limit_mb} MB)"
+            if reason is not None:
+                if reason != _MISSED_DEADLINE:
+                    self._logger.log(f"Docking of ligand(s) {', '.join(identifiers)} failed: {reason}.", _LE.WARNING)
+                for identifier in identifiers:
+                    self._failure_reasons[identifier] = reason
+
+    def set_deadline(self, deadline: Optional[float]):
+        """This method sets a deadline (as a "time.time()" timestamp) for the docking: once it has passed, no further
+        subjobs are started and running ones are cancelled (where supported by the backend). Ligands that have not
+        been docked by then are reported with a score of "NA".
+
+        :param deadline: Point in time (seconds since the epoch), by which the docking has to be finished
+        :type deadline: float, optional, default value None means no deadline
+        """
+        self._deadline = deadline
+
+    def set_pose_archive_step(self, step: Optional[str]):
+        """This method sets the step of a campaign (e.g. the output prefix), under which the poses are stored when
+        they are written to a pose archive (i.e. a poses path ending in ".posearchive")
+
+        :param step: Key of the current step in the pose archive
+        :type step: string, optional
+        """
+        self._pose_archive_step = step
+
+    def _deadline_reached(self) -> bool:
+        return self._deadline is not None and time.time() >= self._deadline
+
+    def _skip_sublists(self, sublists: list):
+        # record all ligands of sublists, that will not be dispatched any more as the deadline has passed
+        for sublist in sublists:
+            for ligand in sublist:
+                self._failure_reasons[ligand.get_identifier()] = _MISSED_DEADLINE
+
+    def _get_rescoring(self) -> Optional[Rescoring]:
+        # backends supporting the rescoring of existing poses return their "rescoring" parameters here
+        return None
+
+    def rescores_from_file(self) -> bool:
+        rescoring = self._get_rescoring()
+        return rescoring is not None and rescoring.input is not None
+
+    def get_rescoring_ligands(self) -> Optional[list]:
+        """This method loads the poses to be rescored, if the backend is set to rescore poses from an SDF file
+
+        :return: list of "Ligand" objects holding the poses or None, if the ligands are to be taken from the pools
+        """
+        if not self.rescores_from_file():
+            return None
+        poses_input = self._get_rescoring().input.copy(update={"type": _LPE.INPUT_TYPE_SDF})
+        ligands = LigandInputParser(input=poses_input).get_ligands()
+        self._logger.log(f"Loaded {len(ligands)} poses for rescoring from {poses_input.input_path}.", _LE.DEBUG)
+        return ligands
+
+    def _get_ligands_by_identifier(self) -> dict:
+        # used to assign the result molecules of the subjobs to their ligands without scanning the list for each
+        return {ligand.get_identifier(): ligand for ligand in self.ligands}
+
+    def get_failure_reasons(self) -> dict:
+        """This method returns the reasons for ligands that failed because their subjob was killed or crashed
+
+        :return: dictionary, mapping ligand identifiers to the reason of failure
+        """
+        return dict(self._failure_reasons)
+
+    def expand_duplicates(self, duplicates: list):
+        """This method adds the results for ligands, which were removed as duplicates before embedding and docking,
+        by copying the poses and scores of their representatives (renumbered to the duplicates' ligand numbers)
+
+        :param duplicates: List of (representative ligand number, duplicate ligand) tuples (see "get_duplicates()"
+            of the ligand preparators)
+        :type duplicates: list
+        :raises DockingRunFailed Error: This error is raised if the docking has not been run yet
+        """
+        if not self._docking_performed:
+            raise DockingRunFailed("Do the docking first.")
+        if len(duplicates) == 0:
+            return
+
+        clones = expand_duplicates(ligands=self.ligands, duplicates=duplicates)
+
+        # scores assigned instead of docking and the reasons of failed representatives hold for the duplicates as well
+        representatives = {duplicate.get_ligand_number(): representative_number
+                           for representative_number, duplicate in duplicates}
+        for clone in clones:
+            representative_identifier = ':'.join([str(representatives[clone.get_ligand_number()]),
+                                                  str(clone.get_enumeration())])
+            if representative_identifier in self._assigned_scores:
+                self._assigned_scores[clone.get_identifier()] = self._assigned_scores[representative_identifier]
+            if representative_identifier in self._failure_reasons:
+                self._failure_reasons[clone.get_identifier()] = self._failure_reasons[representative_identifier]
+        self.ligands = sorted(self.ligands + clones,
+                              key=lambda lig: (lig.get_ligand_number(), lig.get_enumeration()))
+
+        if self._df_results is not None and not self._df_results.empty:
+            buffer = [self._df_results]
+            rows_by_number = dict(tuple(self._df_results.groupby(_RK.DF_LIGAND_NUMBER, sort=False)))
+            for representative_number, duplicate in duplicates:
+                if representative_number not in rows_by_number:
+                    continue
+                rows = rows_by_number[representative_number].copy()
+                rows[_RK.DF_LIGAND_NUMBER] = duplicate.get_ligand_number()
+                if duplicate.get_name() is not None:
+                    rows[_RK.DF_LIGAND_NAME] = duplicate.get_name()
+                else:
+                    rows[_RK.DF_LIGAND_NAME] = [':'.join([str(duplicate.get_ligand_number()), str(enumeration), str(conformer)])
+                                                for enumeration, conformer in zip(rows[_RK.DF_LIGAND_ENUMERATION],
+                                                                                  rows[_RK.DF_CONFORMER])]
+                buffer.append(rows)
+            self._df_results = pd.concat(buffer, ignore_index=True)
+            self._df_results = self._df_results.sort_values(by=[_RK.DF_LIGAND_NUMBER], kind="mergesort").reset_index(drop=True)
+            self._df_results = set_result_column_types(self._df_results)
+        self._logger.log(f"Added results for {len(duplicates)} duplicated ligand(s).", _LE.DEBUG)
+
+    def absorb(self, other: "Docker"):
+        """This method merges the ligands and results of another docking with the same configuration (e.g. docking
+        of a further chunk of the same batch) into this one; ligand numbers are expected not to overlap
+
+        :param other: The docker holding the results to be merged
+        :type other: Docker
+        :raises DockingRunFailed Error: This error is raised if either docking has not been run yet
+        """
+        if not self._docking_performed or not other._docking_performed:
+            raise DockingRunFailed("Do the docking first.")
+        self.ligands = sorted(self.ligands + other.ligands,
+                              key=lambda lig: (lig.get_ligand_number(), lig.get_enumeration()))
+        self._failure_reasons.update(other._failure_reasons)
+        self._assigned_scores.update(other._assigned_scores)
+        results = [df for df in [self._df_results, other._df_results] if df is not None]
+        if len(results) > 0:
+            self._df_results = pd.concat(results, ignore_index=True)
+            self._df_results = self._df_results.sort_values(by=[_RK.DF_LIGAND_NUMBER],
+                                                            kind="mergesort").reset_index(drop=True)
+            self._df_results = set_result_column_types(self._df_results)
+
     def get_docked_ligands(self):
         """This method returns a list of the docked ligand poses from a given docking run
         :raises DockingRunFailed Error: This error is raised if the docking has not been run yet
         :return: list containing all the docked ligand poses
         """
-        return [ligand.get_clone() for ligand in self.ligands]
+        return [ligand.get_deep_clone() for ligand in self.ligands]
 
     def write_docked_ligands(self, path, mode="all"):
         """This method appends writes docked ligands binding poses and conformers to a file. There is the option
@@ -248,6 +603,11 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
                 selected_conformers.append(list_conf[0])
         return selected_conformers
 
+    def _get_best(self) -> str:
+        # whether lower ("min") or higher ("max") scores are better; overridden by backends, where this depends on
+        # the scoring function (ex. GOLD)
+        return "min"
+
     def _sort_conformers(self, conformers: list, best="min") -> list:
         if best == "min":
             return sorted(conformers, key=lambda c: self._get_score_from_conformer(conformer=c))
@@ -259,7 +619,8 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
             raise ValueError
 
     def _select_conformers(self, mode, mol_type):
-        ligands = [deepcopy(lig) for lig in self.ligands]
+        # the conformers are only read (and written out), so they do not need to be copied
+        ligands = self.ligands
         selected_conformers = []
 
         # extract all conformers for all ligands
@@ -289,7 +650,12 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
         # generate folder structure, if not available
         generate_folder_structure(filepath=path)
 
-        if mol_type == _LPE.TYPE_RDKIT:
+        if is_pose_archive_path(path):
+            number_poses = PoseArchive(path).append(selected_conformers, mol_type=mol_type, run_id=self.run_id,
+                                                    step=self._pose_archive_step)
+            self._logger.log(f"Appended {number_poses} poses to archive {path} (step: {self._pose_archive_step}).",
+                             _LE.DEBUG)
+        elif mol_type == _LPE.TYPE_RDKIT:
             import rdkit.Chem as Chem
             writer = Chem.SDWriter(path)
             for conformer in selected_conformers:
@@ -301,7 +667,7 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
             ofs.SetFormat(oechem.OEFormat_SDF)
             if ofs.open(path):
                 for conformer in selected_conformers:
-                    oechem.OEWriteMolecule(ofs, conformer)
+                    oechem.OEWriteConstMolecule(ofs, conformer)
             else:
                 oechem.OEThrow.Fatal("Unable to create specified output file.")
             ofs.close()
@@ -342,41 +708,70 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
         not_docked = len([conf for conf in self.ligands if len(conf.get_conformers()) == 0])
         self._logger.log(f"{not_docked} ligand enumeration(s) failed to dock (did not return a pose and score)", _LE.DEBUG)
 
+        # subjobs that were killed (e.g. for exceeding their limits) or crashed
+        if len(self._failure_reasons) > 0:
+            self._logger.log(f"{len(self._failure_reasons)} ligand enumeration(s) failed because their subjob was killed or crashed.", _LE.INFO)
+
     def write_result(self, path, mode="all"):
-        """This method writes the docking results to a csv file. There is the option to write out either the best
-        predicted binding pose per enumeration or all the predicted binding poses. Output for the best predicted
-        binding pose per ligand has yet to be implemented
+        """This method writes the docking results to a file. There is the option to write out either the best
+        predicted binding pose per ligand, the best predicted binding pose per enumeration or all the predicted binding
+        poses. The format is determined by the extension of the path: ".parquet" and ".feather" files are written in
+        columnar form (with single precision scores, requires "pyarrow"), anything else as CSV
 
         :param path: Contains information on results output path
         :type path: string
         :param mode: Determines whether the output contains the best predicted binding pose per ligand, the best
             predicted binding pose per enumeration, or all the predicted binding poses
-        :type mode: string, optional, default value is "all". Other possible value is "best_per_enumeration"
+        :type mode: string, optional, default value is "all". Other possible values are "best_per_ligand" and
+            "best_per_enumeration"
         """
         return self._write_result(path=path, mode=mode)
 
+    @staticmethod
+    def _select_best(df: pd.DataFrame, keys: list, best: str) -> pd.DataFrame:
+        # stable sort by score (failed scores last), keep the first row per group and restore the original order
+        return df.sort_values(by=_RK.DF_SCORE, ascending=(best == "min"), kind="mergesort", na_position="last") \
+                 .drop_duplicates(subset=keys, keep="first") \
+                 .sort_index()
+
+    def _write_result_file(self, df: pd.DataFrame, path: str):
+        extension = os.path.splitext(path)[1].lower()
+        try:
+            if extension == _RO.FORMAT_PARQUET:
+                df.astype({_RK.DF_SCORE: _RO.DTYPE_SCORE_COLUMNAR}).to_parquet(path, index=False)
+            elif extension == _RO.FORMAT_FEATHER:
+                df.astype({_RK.DF_SCORE: _RO.DTYPE_SCORE_COLUMNAR}).reset_index(drop=True).to_feather(path)
+            else:
+                df.to_csv(path_or_buf=path,
+                          sep=',',
+                          na_rep='',
+                          header=True,
+                          index=False,
+                          mode='w',
+                          quoting=None)
+        except ImportError as e:
+            self._logger.log(f"Could not write result to file {path}, as the format requires an optional package: {e}",
+                             _LE.ERROR)
+            raise DockingRunFailed(f"Could not write result to file {path}.")
+
     def _write_result(self, path, mode="all", best="min"):
         if self._df_results is not None:
             if self._df_results.empty:
                 self._logger.log("Generated dataframe is empty, skipping write-out (this probably means all poses were rejected).",
                                  _LE.WARNING)
             else:
+                if best not in ["min", "max"]:
+                    self._logger.log(f"Parameter best must be either \"min\" or \"max\" (value {best} unknown).",
+                                     _LE.EXCEPTION)
+                    raise ValueError
                 if mode == _DE.OUTPUT_MODE_ALL:
-                    df_buffer = self._df_results.copy()
+                    df_buffer = self._df_results
                 elif mode == _DE.OUTPUT_MODE_BESTPERENUMERATION:
-                    df_buffer = self._df_results.copy()
-                    df_buffer = df_buffer[df_buffer[_RK.DF_LOWEST_CONFORMER]]
+                    df_buffer = self._select_best(self._df_results,
+                                                  keys=[_RK.DF_LIGAND_NUMBER, _RK.DF_LIGAND_ENUMERATION],
+                                                  best=best)
                 elif mode == _DE.OUTPUT_MODE_BESTPERLIGAND:
-                    df_buffer = self._df_results.copy()
-                    df_buffer = df_buffer[df_buffer[_RK.DF_LOWEST_CONFORMER]]
-                    if best == "min":
-                        df_buffer = df_buffer.loc[df_buffer.groupby(_RK.DF_LIGAND_NUMBER)[_RK.DF_SCORE].idxmin()]
-                    elif best == "max":
-                        df_buffer = df_buffer.loc[df_buffer.groupby(_RK.DF_LIGAND_NUMBER)[_RK.DF_SCORE].idxmax()]
-                    else:
-                        self._logger.log(f"Parameter best must be either \"min\" or \"max\" (value {best} unknown).",
-                                         _LE.EXCEPTION)
-                        raise ValueError
+                    df_buffer = self._select_best(self._df_results, keys=[_RK.DF_LIGAND_NUMBER], best=best)
                 else:
                     self._logger.log(f"Score output mode \"{mode}\" is unknown - write-out of scores failed.",
                                      _LE.ERROR)
@@ -385,13 +780,7 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
                 # generate folder structure, if not available
                 generate_folder_structure(filepath=path)
 
-                df_buffer.to_csv(path_or_buf=path,
-                                 sep=',',
-                                 na_rep='',
-                                 header=True,
-                                 index=False,
-                                 mode='w',
-                                 quoting=None)
+                self._write_result_file(df_buffer, path)
                 self._logger.log(f"Wrote result of docking run to file {path} with mode set to \"{mode}\" ({df_buffer.shape[0]} rows).",
                                  _LE.DEBUG)
 
@@ -426,6 +815,8 @@ class Docker(BaseModel, metaclass=abc.ABCMeta):
                     continue
                 for conformer in ligand.get_conformers():
                     cur_ligand_list.append(self._get_score_from_conformer(conformer))
+                if len(ligand.get_conformers()) == 0 and ligand.get_identifier() in self._assigned_scores:
+                    cur_ligand_list.append(self._assigned_scores[ligand.get_identifier()][0])
             buffer_list.append(cur_ligand_list)
 
         # empty list -> no valid docking, return "NA"
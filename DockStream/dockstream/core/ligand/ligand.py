@@ -1,26 +1,52 @@
+import sys
 from copy import deepcopy
+from rdkit import Chem
+
 from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
 from dockstream.utils.enums.tag_additions_enum import TagAdditionsEnum
 
+_LP = LigandPreparationEnum()
+_TA = TagAdditionsEnum()
+_KNOWN_TYPES = (_LP.TYPE_RDKIT, _LP.TYPE_OPENEYE, _LP.TYPE_OMEGA, _LP.TYPE_CORINA, _LP.TYPE_GOLD, _LP.TYPE_LIGPREP, None)
+
+
+def _intern(value):
+    # names and original smiles are repeated across all enumerations of a ligand, so store them only once
+    return sys.intern(value) if isinstance(value, str) else value
+
 
 class Ligand:
-    """This class bundles all information on a ligand, including all molecule instances present."""
+    """This class bundles all information on a ligand, including all molecule instances present.
+
+    Clones ("get_clone()", "copy()") share the molecule and the conformers with the original (copy-on-write): both
+    are only copied when they are modified through this class ("add_tags_to_molecule()", "add_tags_to_conformers()",
+    "get_mutable_molecule()", "get_mutable_conformers()"). Objects returned by "get_molecule()" and
+    "get_conformers()" must therefore not be modified in place. "deepcopy()" still returns an independent copy.
+    """
+
+    # screens hold hundreds of thousands of instances, so do not allocate a "__dict__" for each
+    __slots__ = ("_smile", "_original_smile", "_ligand_number", "_enumeration", "_molecule", "_mol_type", "_name",
+                 "_conformers", "_molecule_shared", "_conformers_shared",
+                 "_graph", "_graph_smile", "_canonical_smile", "_canonical_smile_source")
 
     def __init__(self, smile: str, ligand_number: int, enumeration=0, molecule=None, mol_type=None, name=None, original_smile=None):
-        # initialize
-        self._LP = LigandPreparationEnum()
-        self._TA = TagAdditionsEnum()
-        self._known_types = [self._LP.TYPE_RDKIT, self._LP.TYPE_OPENEYE, self._LP.TYPE_OMEGA,
-                             self._LP.TYPE_CORINA, self._LP.TYPE_GOLD, self._LP.TYPE_LIGPREP, None]
         # set attributes
         self._smile = self._check_smile(smile)
-        self._original_smile = original_smile
+        self._original_smile = _intern(original_smile)
         self._ligand_number = self._check_ligand_number(ligand_number)
         self._enumeration = self._check_enumeration(enumeration)
         self._molecule = molecule
         self._mol_type = self._check_mol_type(mol_type)
-        self._name = name
+        self._name = _intern(name)
         self._conformers = []
+        self._molecule_shared = False
+        self._conformers_shared = False
+
+        # RDKit graph and canonical smile, built on first use and valid for the smile they were built from
+        self._graph = None
+        self._graph_smile = None
+        self._canonical_smile = None
+        self._canonical_smile_source = None
 
     def __repr__(self):
         return "<Ligand id: %s, enumeration: %s, smile: %s>" % (self.get_ligand_number(), self.get_enumeration(), self.get_smile())
@@ -31,25 +57,38 @@ class Ligand:
                f"mol_type: {self.get_mol_type()}, has molecule: {True if self.get_molecule() is not None else False}."
 
     def get_clone(self):
+        """Returns a copy-on-write clone, sharing molecule and conformers with this ligand until either modifies them."""
         clone = Ligand(smile=self.get_smile(),
                        ligand_number=self.get_ligand_number(),
                        enumeration=self.get_enumeration(),
-                       molecule=deepcopy(self.get_molecule()),
+                       molecule=self.get_molecule(),
                        mol_type=self.get_mol_type(),
                        name=self.get_name(),
                        original_smile=self.get_original_smile())
-        for conformer in self.get_conformers():
-            clone.add_conformer(deepcopy(conformer))
+        clone.set_conformers(list(self.get_conformers()))
+
+        # both sides have to copy before modifying; note, that the cached graph is never modified in place
+        self._molecule_shared = clone._molecule_shared = self._molecule is not None
+        self._conformers_shared = clone._conformers_shared = len(self._conformers) > 0
+        clone._graph, clone._graph_smile = self._graph, self._graph_smile
+        clone._canonical_smile, clone._canonical_smile_source = self._canonical_smile, self._canonical_smile_source
+        return clone
+
+    def get_deep_clone(self):
+        """Returns a clone with its own copies of the molecule and the conformers."""
+        clone = self.get_clone()
+        clone.get_mutable_molecule()
+        clone.get_mutable_conformers()
         return clone
 
     def __copy__(self):
         return self.get_clone()
 
     def __deepcopy__(self, memo):
-        return self.get_clone()
+        return self.get_deep_clone()
 
     def set_name(self, name: str):
-        self._name = name
+        self._name = _intern(name)
 
     def get_name(self) -> str:
         return self._name
@@ -58,22 +97,39 @@ class Ligand:
         self._conformers.append(conformer)
 
     def set_conformers(self, conformers: list):
+        # typically, the same conformers re-ordered, so they might still be shared
         self._conformers = conformers
 
     def get_conformers(self):
         return self._conformers
 
+    def get_mutable_conformers(self) -> list:
+        """Returns the conformers for in-place modification, copying them first if they are shared with a clone."""
+        if self._conformers_shared:
+            self._conformers = [deepcopy(conformer) for conformer in self._conformers]
+            self._conformers_shared = False
+        return self._conformers
+
     def clear_conformers(self):
         self._conformers = []
+        self._conformers_shared = False
 
     def set_molecule(self, molecule):
         self._molecule = molecule
+        self._molecule_shared = False
 
     def get_molecule(self):
         return self._molecule
 
+    def get_mutable_molecule(self):
+        """Returns the molecule for in-place modification, copying it first if it is shared with a clone."""
+        if self._molecule_shared:
+            self._molecule = deepcopy(self._molecule)
+            self._molecule_shared = False
+        return self._molecule
+
     def _check_mol_type(self, mol_type) -> str:
-        if mol_type not in self._known_types:
+        if mol_type not in _KNOWN_TYPES:
             raise ValueError(f"Type {mol_type} not in list of supported types.")
         return mol_type
 
@@ -94,8 +150,29 @@ class Ligand:
     def get_smile(self):
         return self._smile
 
+    def get_graph(self):
+        """Returns the RDKit molecule (without coordinates) built from the smile or None, if it cannot be parsed. The
+           graph is cached and shared between stages (and clones), so it must not be modified - use
+           "get_graph_copy()" instead."""
+        if self._graph_smile != self._smile:
+            self._graph = Chem.MolFromSmiles(self._smile)
+            self._graph_smile = self._smile
+        return self._graph
+
+    def get_graph_copy(self):
+        graph = self.get_graph()
+        return None if graph is None else Chem.Mol(graph)
+
+    def get_canonical_smile(self):
+        """Returns the canonical (isomeric) smile or None, if the smile cannot be parsed."""
+        if self._canonical_smile_source != self._smile:
+            graph = self.get_graph()
+            self._canonical_smile = None if graph is None else Chem.MolToSmiles(graph)
+            self._canonical_smile_source = self._smile
+        return self._canonical_smile
+
     def set_original_smile(self, smile: str):
-        self._original_smile = smile
+        self._original_smile = _intern(smile)
 
     def get_original_smile(self):
         return self._original_smile
@@ -126,16 +203,16 @@ class Ligand:
         return str(self.get_ligand_number()) + ':' + str(self.get_enumeration())
 
     def _add_title_to_molecule(self, molecule, title):
-        if self.get_mol_type() in [self._LP.TYPE_RDKIT, self._LP.TYPE_CORINA, self._LP.TYPE_GOLD, self._LP.TYPE_OMEGA]:
+        if self.get_mol_type() in [_LP.TYPE_RDKIT, _LP.TYPE_CORINA, _LP.TYPE_GOLD, _LP.TYPE_OMEGA]:
             molecule.SetProp("_Name", str(title))
-        elif self.get_mol_type() == self._LP.TYPE_OPENEYE:
+        elif self.get_mol_type() == _LP.TYPE_OPENEYE:
             molecule.SetTitle(str(title))
 
     def _add_tag_to_molecule(self, molecule, tag, value):
-        if self.get_mol_type() in [self._LP.TYPE_RDKIT, self._LP.TYPE_CORINA, self._LP.TYPE_GOLD, self._LP.TYPE_LIGPREP,
-                                   self._LP.TYPE_OMEGA]:
+        if self.get_mol_type() in [_LP.TYPE_RDKIT, _LP.TYPE_CORINA, _LP.TYPE_GOLD, _LP.TYPE_LIGPREP,
+                                   _LP.TYPE_OMEGA]:
             molecule.SetProp(tag, str(value))
-        elif self.get_mol_type() == self._LP.TYPE_OPENEYE:
+        elif self.get_mol_type() == _LP.TYPE_OPENEYE:
             import openeye.oechem as oechem
             oechem.OESetSDData(molecule, tag, str(value))
         else:
@@ -143,22 +220,23 @@ class Ligand:
 
     def add_tags_to_conformers(self):
         if len(self.get_conformers()) > 0:
-            for conformer_number, conformer in enumerate(self.get_conformers()):
+            for conformer_number, conformer in enumerate(self.get_mutable_conformers()):
                 self._add_title_to_molecule(conformer, self.get_identifier() + ':' + str(conformer_number))
                 if self.get_name() is not None:
-                    self._add_tag_to_molecule(conformer, self._TA.TAG_NAME, self.get_name())
-                self._add_tag_to_molecule(conformer, self._TA.TAG_LIGAND_ID, self.get_ligand_number())
-                self._add_tag_to_molecule(conformer, self._TA.TAG_ORIGINAL_SMILES, self.get_original_smile())
-                self._add_tag_to_molecule(conformer, self._TA.TAG_SMILES, self.get_smile())
+                    self._add_tag_to_molecule(conformer, _TA.TAG_NAME, self.get_name())
+                self._add_tag_to_molecule(conformer, _TA.TAG_LIGAND_ID, self.get_ligand_number())
+                self._add_tag_to_molecule(conformer, _TA.TAG_ORIGINAL_SMILES, self.get_original_smile())
+                self._add_tag_to_molecule(conformer, _TA.TAG_SMILES, self.get_smile())
 
     def add_tags_to_molecule(self):
         if self.get_molecule() is not None:
-            self._add_title_to_molecule(self.get_molecule(), self.get_identifier())
+            molecule = self.get_mutable_molecule()
+            self._add_title_to_molecule(molecule, self.get_identifier())
             if self.get_name() is not None:
-                self._add_tag_to_molecule(self.get_molecule(), self._TA.TAG_NAME, self.get_name())
-            self._add_tag_to_molecule(self.get_molecule(), self._TA.TAG_LIGAND_ID, self.get_ligand_number())
-            self._add_tag_to_molecule(self.get_molecule(), self._TA.TAG_ORIGINAL_SMILES, self.get_original_smile())
-            self._add_tag_to_molecule(self.get_molecule(), self._TA.TAG_SMILES, self.get_smile())
+                self._add_tag_to_molecule(molecule, _TA.TAG_NAME, self.get_name())
+            self._add_tag_to_molecule(molecule, _TA.TAG_LIGAND_ID, self.get_ligand_number())
+            self._add_tag_to_molecule(molecule, _TA.TAG_ORIGINAL_SMILES, self.get_original_smile())
+            self._add_tag_to_molecule(molecule, _TA.TAG_SMILES, self.get_smile())
 
 
 def get_next_enumeration_number_for_ligand(ligands: list, ligand_id: int):
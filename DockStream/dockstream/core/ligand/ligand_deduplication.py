@@ -0,0 +1,58 @@
+from dockstream.core.ligand.ligand import Ligand
+
+
+def get_deduplication_key(ligand: Ligand) -> str:
+    """Returns the canonical SMILES of a ligand or, if it cannot be parsed, the SMILES string as is."""
+    canonical_smile = ligand.get_canonical_smile()
+    if canonical_smile is None:
+        return ligand.get_smile()
+    return canonical_smile
+
+
+def deduplicate_ligands(ligands: list):
+    """Splits a list of ligands into those with a unique structure and the duplicates (different SMILES strings of the
+       same structure or exact repeats), keeping the first occurrence as representative.
+
+    :param ligands: List of "Ligand" objects (each with enumeration 0, i.e. directly after input parsing)
+    :return: tuple of the list of unique ligands and a list of (representative ligand number, duplicate ligand) tuples
+    """
+    representatives = {}
+    unique = []
+    duplicates = []
+    for ligand in ligands:
+        # molecules handed over directly (not as "Ligand" objects) are kept as they are
+        if not isinstance(ligand, Ligand):
+            unique.append(ligand)
+            continue
+        key = get_deduplication_key(ligand)
+        if key in representatives:
+            duplicates.append((representatives[key], ligand))
+        else:
+            representatives[key] = ligand.get_ligand_number()
+            unique.append(ligand)
+    return unique, duplicates
+
+
+def expand_duplicates(ligands: list, duplicates: list) -> list:
+    """Generates the clones (including their conformers) of all enumerations of the representatives for every
+       duplicate, carrying the duplicate's ligand number, name and original SMILES.
+
+    :param ligands: List of (docked) "Ligand" objects, containing the representatives
+    :param duplicates: List of (representative ligand number, duplicate ligand) tuples
+    :return: list of the cloned "Ligand" objects
+    """
+    # index the (enumerations of the) representatives by ligand number first, rather than scanning per duplicate
+    ligands_by_number = {}
+    for ligand in ligands:
+        ligands_by_number.setdefault(ligand.get_ligand_number(), []).append(ligand)
+
+    clones = []
+    for representative_number, duplicate in duplicates:
+        for ligand in ligands_by_number.get(representative_number, []):
+            clone = ligand.get_clone()
+            clone.set_ligand_number(duplicate.get_ligand_number())
+            clone.set_name(duplicate.get_name())
+            clone.set_original_smile(duplicate.get_original_smile())
+            clone.add_tags_to_conformers()
+            clones.append(clone)
+    return clones
@@ -126,9 +126,10 @@ class LigandInputParser(BaseModel):
                 else:
                     self._logger.log(f"Molecule number {mol_id} in input SDF file does not have name tag {name_tag} - will set to None.",
                                      _LE.DEBUG)
+            smile = to_smiles(mol)
             if self.input.initialization_mode == _LP.INITIALIZATION_MODE_ORDER:
-                lig_container.append(Ligand(smile=to_smiles(mol),
-                                            original_smile=to_smiles(mol),
+                lig_container.append(Ligand(smile=smile,
+                                            original_smile=smile,
                                             ligand_number=mol_id,
                                             molecule=mol,
                                             mol_type=_LP.TYPE_RDKIT,
@@ -136,8 +137,8 @@ class LigandInputParser(BaseModel):
             elif self.input.initialization_mode == _LP.INITIALIZATION_MODE_AZDOCK:
                 # TODO: fix / handle case where docked poses (with X:X:X) are fed in
                 parts = str(mol.GetProp("_Name")).split(':')
-                lig_container.append(Ligand(smile=to_smiles(mol),
-                                            original_smile=to_smiles(mol),
+                lig_container.append(Ligand(smile=smile,
+                                            original_smile=smile,
                                             ligand_number=int(parts[0]),
                                             enumeration=int(parts[1]),
                                             molecule=mol,
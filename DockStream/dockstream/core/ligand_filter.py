@@ -0,0 +1,103 @@
+from typing import List, Dict, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr, validator
+from rdkit import Chem
+from rdkit.Chem import Descriptors, rdMolDescriptors
+
+from dockstream.core.ligand.ligand import Ligand
+
+_DESCRIPTORS = dict(Descriptors.descList)
+
+
+class PropertyWindow(BaseModel):
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+
+class LigandFilter(BaseModel):
+    """Filter applied to the ligands of a docking run before they are handed over to the backend.
+
+    Ligands are rejected if they match any of the SMARTS alerts, have an RDKit descriptor (e.g. "MolWt", "TPSA")
+    outside its window, have more rotatable bonds than allowed or, if "check_box_extent" is set and the backend defines
+    a box, an embedded extent larger than the box along any axis. Rejected ligands get "rejected_score".
+    """
+
+    smarts_alerts: List[str] = []
+    property_windows: Dict[str, PropertyWindow] = {}
+    max_rotatable_bonds: Optional[int] = Field(default=None, ge=0)
+    check_box_extent: bool = False
+    rejected_score: float = 0.0
+
+    _patterns = PrivateAttr(default=None)
+
+    @validator("smarts_alerts")
+    def _check_smarts(cls, smarts_alerts):
+        for smarts in smarts_alerts:
+            if Chem.MolFromSmarts(smarts) is None:
+                raise ValueError(f"Could not parse SMARTS alert {smarts}.")
+        return smarts_alerts
+
+    @validator("property_windows")
+    def _check_descriptors(cls, property_windows):
+        unknown = [name for name in property_windows.keys() if name not in _DESCRIPTORS]
+        if len(unknown) > 0:
+            raise ValueError(f"Unknown RDKit descriptor(s): {unknown}.")
+        return property_windows
+
+    def _get_patterns(self) -> list:
+        if self._patterns is None:
+            self._patterns = [(smarts, Chem.MolFromSmarts(smarts)) for smarts in self.smarts_alerts]
+        return self._patterns
+
+    def _check_graph(self, molecule) -> Optional[str]:
+        for smarts, pattern in self._get_patterns():
+            if molecule.HasSubstructMatch(pattern):
+                return f"matches alert {smarts}"
+        for name, window in self.property_windows.items():
+            value = _DESCRIPTORS[name](molecule)
+            if (window.minimum is not None and value < window.minimum) or \
+                    (window.maximum is not None and value > window.maximum):
+                return f"{name} of {round(value, 2)} outside of window"
+        if self.max_rotatable_bonds is not None:
+            number_rotatable_bonds = rdMolDescriptors.CalcNumRotatableBonds(molecule)
+            if number_rotatable_bonds > self.max_rotatable_bonds:
+                return f"{number_rotatable_bonds} rotatable bonds"
+        return None
+
+    @staticmethod
+    def _get_extent(ligand: Ligand):
+        molecule = ligand.get_molecule()
+        if not isinstance(molecule, Chem.Mol) or molecule.GetNumConformers() == 0:
+            return None
+        positions = molecule.GetConformer().GetPositions()
+        return positions.max(axis=0) - positions.min(axis=0)
+
+    def get_rejections(self, ligands: List[Ligand], box_size=None) -> dict:
+        """Returns the reasons for rejection of all ligands that fail the filter.
+
+        :param ligands: The ligands to be checked (the properties are calculated from their cached graphs)
+        :param box_size: Edge lengths of the docking box along x, y and z (if the backend defines one)
+        :return: dictionary, mapping the identifiers of rejected ligands to the reason
+        """
+        rejections = {}
+        for ligand in ligands:
+            molecule = ligand.get_graph()
+            if molecule is None:
+                continue
+            reason = self._check_graph(molecule)
+            if reason is not None:
+                rejections[ligand.get_identifier()] = reason
+
+        # compare the extent of all embedded ligands against the box at once
+        if self.check_box_extent and box_size is not None:
+            candidates = [(ligand, self._get_extent(ligand)) for ligand in ligands
+                          if ligand.get_identifier() not in rejections]
+            candidates = [(ligand, extent) for ligand, extent in candidates if extent is not None]
+            if len(candidates) > 0:
+                extents = np.vstack([extent for _, extent in candidates])
+                too_large = np.any(extents > np.asarray(box_size, dtype=float), axis=1)
+                for (ligand, _), reject in zip(candidates, too_large):
+                    if reject:
+                        rejections[ligand.get_identifier()] = "embedded extent exceeds the docking box"
+        return rejections
@@ -6,6 +6,7 @@ from rdkit import Chem, RDLogger
 from dockstream.core.RDkit.RDkit_stereo_enumerator import RDKitStereoEnumerator
 
 from dockstream.core.ligand.ligand import find_ligand
+from dockstream.core.ligand.ligand_deduplication import deduplicate_ligands
 
 from dockstream.core.TautEnum.taut_enum_smile_preparation import TautEnumSmilePreparator
 from dockstream.core.factories.transformator_factory import TransformatorFactory
@@ -70,6 +71,7 @@ class Input(BaseModel):
     use_taut_enum: Optional[TautEnumInput] = None
     stereo_enumeration: Optional[AnyStereoEnumerator] = None
     transformations: Optional[List[TransformationInput]] = None
+    deduplicate: Optional[bool] = False
 
 
 class Output(BaseModel):
@@ -88,6 +90,7 @@ class LigandPreparator(BaseModel):
 
     _logger = PrivateAttr()
     _references: List = PrivateAttr(default=None)
+    _duplicates: List = PrivateAttr(default=None)
 
     class Config:
         underscore_attrs_are_private = True
@@ -109,6 +112,10 @@ class LigandPreparator(BaseModel):
         if len(self.ligands) == 0:
             raise LigandPreparationFailed("Specify at least one ligand (or a list).")
 
+        # remove duplicated structures (they are added back after docking), if specified
+        if self.input.deduplicate:
+            self._deduplicate()
+
         # enumerate ligand smiles with tautomers / protomers, if specified
         if self.input.use_taut_enum is not None:
             self._taut_enum()
@@ -125,9 +132,20 @@ class LigandPreparator(BaseModel):
         if self.align is not None:
             self._load_references()
 
+    def _deduplicate(self):
+        length_before = self.get_number_ligands()
+        self.ligands, self._duplicates = deduplicate_ligands(self.ligands)
+        self._logger.log(f"Removed {len(self._duplicates)} duplicates ({length_before} to {self.get_number_ligands()} ligands).",
+                         _LE.DEBUG)
+
+    def _reuses_stereo_embeddings(self) -> bool:
+        # backends that can start from the conformers embedded during stereo-enumeration override this
+        return False
+
     def _enumerate_stereoisomers(self):
         length_before = self.get_number_ligands()
-        self.ligands = self.input.stereo_enumeration.enumerate(self.ligands)
+        self.ligands = self.input.stereo_enumeration.enumerate(self.ligands,
+                                                               keep_embeddings=self._reuses_stereo_embeddings())
         self._logger.log(f"Enumerated stereo-isomers (expanded {length_before} to {self.get_number_ligands()} enumerations).",
                          _LE.DEBUG)
 
@@ -168,6 +186,10 @@ class LigandPreparator(BaseModel):
     def get_ligands(self):
         return self.ligands
 
+    def get_duplicates(self) -> list:
+        """Returns the ligands removed as duplicates as (representative ligand number, duplicate ligand) tuples."""
+        return self._duplicates if self._duplicates is not None else []
+
     def get_number_references(self):
         if self._references is not None:
             return len(self._references)
@@ -219,7 +241,8 @@ class LigandPreparator(BaseModel):
 
     def write_ligands(self, path, format):
         format = format.upper()
-        ligands_copy = [deepcopy(lig) for lig in self.ligands]
+        # copy-on-write clones: only the molecules are copied, when tagged
+        ligands_copy = [lig.get_clone() for lig in self.ligands]
 
         # generate folder structure, if not available
         generate_folder_structure(filepath=path)
@@ -231,7 +254,7 @@ class LigandPreparator(BaseModel):
             for lig in ligands_copy:
                 lig.add_tags_to_molecule()
                 if lig.get_molecule() is not None:
-                    mol = deepcopy(lig.get_molecule())
+                    mol = lig.get_mutable_molecule()
                     mol.SetProp("_Name", lig.get_identifier())
                     writer.write(mol)
             writer.close()
@@ -0,0 +1,144 @@
+import os
+import zlib
+import fcntl
+from collections import namedtuple
+
+from rdkit import Chem
+
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+from dockstream.utils.enums.pose_archive_enums import PoseArchiveEnum
+
+_LP = LigandPreparationEnum()
+_PA = PoseArchiveEnum()
+
+PoseKey = namedtuple("PoseKey", ["run_id", "step", "ligand_number", "enumeration", "conformer"])
+
+_Record = namedtuple("_Record", ["offset", "length", "format"])
+
+
+def is_pose_archive_path(path: str) -> bool:
+    return path is not None and path.lower().endswith(_PA.ARCHIVE_EXTENSION)
+
+
+def _get_conformer_title(conformer, mol_type: str) -> str:
+    if mol_type == _LP.TYPE_OPENEYE:
+        return conformer.GetTitle()
+    return conformer.GetProp("_Name")
+
+
+def _serialize(conformer, mol_type: str):
+    if mol_type == _LP.TYPE_OPENEYE:
+        import openeye.oechem as oechem
+        ofs = oechem.oemolostream()
+        ofs.SetFormat(oechem.OEFormat_SDF)
+        ofs.openstring()
+        oechem.OEWriteConstMolecule(ofs, conformer)
+        return ofs.GetString(), _PA.RECORD_FORMAT_SDF
+    return conformer.ToBinary(Chem.PropertyPickleOptions.AllProps), _PA.RECORD_FORMAT_RDKIT
+
+
+def _deserialize(payload: bytes, record_format: str):
+    if record_format == _PA.RECORD_FORMAT_RDKIT:
+        return Chem.Mol(payload)
+    supplier = Chem.SDMolSupplier()
+    supplier.SetData(payload.decode("utf-8"), removeHs=False)
+    return next(iter(supplier))
+
+
+class PoseArchive:
+    """Append-only archive of compressed poses with random access.
+
+    Every pose is stored as a separately compressed record in the archive file, while the index file next to it holds
+    one line per pose with its key (run ID, step, ligand number, enumeration and conformer), the byte offset and
+    length. Writers append records and index lines under a lock, so several steps (or processes) of a campaign can
+    write to the same archive; readers pick up new index lines on the next lookup.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._index_path = path + _PA.INDEX_SUFFIX
+        self._index = {}
+        self._index_position = 0
+
+    @staticmethod
+    def _key_to_string(value) -> str:
+        return '' if value is None else str(value)
+
+    def _update_index(self):
+        # only the lines appended since the last update are parsed
+        if not os.path.isfile(self._index_path) or os.path.getsize(self._index_path) == self._index_position:
+            return
+        with open(self._index_path, "rb") as index_file:
+            index_file.seek(self._index_position)
+            for line in index_file:
+                if not line.endswith(b'\n'):
+                    # incomplete line of a concurrent writer, read it next time
+                    break
+                self._index_position += len(line)
+                fields = line.decode("utf-8").rstrip('\n').split(_PA.INDEX_SEPARATOR)
+                if len(fields) != _PA.INDEX_NUMBER_FIELDS:
+                    continue
+                key = PoseKey(fields[0], fields[1], int(fields[2]), int(fields[3]), int(fields[4]))
+                self._index[key] = _Record(int(fields[5]), int(fields[6]), fields[7])
+
+    def append(self, conformers: list, mol_type: str, run_id=None, step=None) -> int:
+        """Appends poses to the archive.
+
+        :param conformers: The poses, named "<ligand number>:<enumeration>:<conformer>" (see "add_tags_to_conformers()")
+        :param mol_type: The type of the molecules (RDKit or OpenEye)
+        :param run_id: The ID of the docking run
+        :param step: The step of the campaign (e.g. the output prefix)
+        :return: number of poses appended
+        """
+        lines = []
+        with open(self._index_path, 'a') as index_file:
+            fcntl.flock(index_file, fcntl.LOCK_EX)
+            with open(self._path, "ab") as archive_file:
+                offset = archive_file.seek(0, os.SEEK_END)
+                for conformer in conformers:
+                    ligand_number, enumeration, conformer_number = _get_conformer_title(conformer, mol_type).split(':')[:3]
+                    payload, record_format = _serialize(conformer, mol_type)
+                    if isinstance(payload, str):
+                        payload = payload.encode("utf-8")
+                    record = zlib.compress(payload, _PA.COMPRESSION_LEVEL)
+                    archive_file.write(record)
+                    lines.append(_PA.INDEX_SEPARATOR.join([self._key_to_string(run_id), self._key_to_string(step),
+                                                           ligand_number, enumeration, conformer_number,
+                                                           str(offset), str(len(record)), record_format]) + '\n')
+                    offset += len(record)
+
+            # the index lines are only written once the records are complete, so no entry points to missing data
+            index_file.write(''.join(lines))
+        return len(lines)
+
+    def get_keys(self) -> list:
+        self._update_index()
+        return list(self._index.keys())
+
+    def get(self, ligand_number: int, enumeration: int = 0, conformer: int = 0, run_id=None, step=None):
+        """Returns the (RDKit) pose stored for a key or None, if there is none."""
+        self._update_index()
+        record = self._index.get(PoseKey(self._key_to_string(run_id), self._key_to_string(step),
+                                         ligand_number, enumeration, conformer))
+        if record is None:
+            return None
+        with open(self._path, "rb") as archive_file:
+            archive_file.seek(record.offset)
+            return _deserialize(zlib.decompress(archive_file.read(record.length)), record.format)
+
+    def to_sdf(self, path: str, run_id=None, step=None) -> int:
+        """Writes the poses (optionally of one run and / or step only) to an SDF file in the order they were appended.
+
+        :return: number of poses written
+        """
+        self._update_index()
+        records = [(key, record) for key, record in self._index.items()
+                   if (run_id is None or key.run_id == str(run_id)) and (step is None or key.step == str(step))]
+        records.sort(key=lambda item: item[1].offset)
+        writer = Chem.SDWriter(path)
+        with open(self._path, "rb") as archive_file:
+            for _, record in records:
+                archive_file.seek(record.offset)
+                writer.write(_deserialize(zlib.decompress(archive_file.read(record.length)), record.format))
+        writer.close()
+        return len(records)
@@ -0,0 +1,73 @@
+import os
+import shutil
+import hashlib
+from typing import Optional
+
+from dockstream.utils.enums.rDock_cavity_cache_enums import rDockCavityCacheEnum
+
+_CC = rDockCavityCacheEnum()
+
+
+def get_grid_suffixes() -> list:
+    """Returns the (protocol, suffix) tuples of the van der Waals grids used by the grid-based docking protocol."""
+    return [(_CC.CALCGRID_VDW1_PROTOCOL, _CC.CALCGRID_VDW1_SUFFIX),
+            (_CC.CALCGRID_VDW5_PROTOCOL, _CC.CALCGRID_VDW5_SUFFIX)]
+
+
+def get_artefact_path(prm_path: str, suffix: str) -> str:
+    # "rDock" derives the names of all files belonging to a receptor from its PRM file
+    return os.path.splitext(prm_path)[0] + suffix
+
+
+def compute_cavity_key(paths: list) -> str:
+    """Hashes the content of the given files (e.g. PRM template, receptor MOL2 and reference ligand) in order."""
+    hasher = hashlib.new(_CC.HASH_ALGORITHM)
+    for path in paths:
+        with open(path, "rb") as f:
+            # hash the length as well, so that the content cannot shift between consecutive files
+            content = f.read()
+            hasher.update(str(len(content)).encode("utf-8"))
+            hasher.update(content)
+    return hasher.hexdigest()
+
+
+class rDockCavityCache:
+    """Content-addressed store for the artefacts of an "rDock" target preparation (cavity files, the output of
+       "rbcavity" and precomputed grids). Every key gets a folder, in which artefacts are stored under their suffix.
+       Artefacts are written atomically, so that several preparations can share the cache."""
+
+    def __init__(self, folder: str):
+        self._folder = folder
+
+    def _get_entry_path(self, key: str, name: str) -> str:
+        return os.path.join(self._folder, key, name)
+
+    def retrieve(self, key: str, name: str, destination: str) -> bool:
+        """Copies an artefact to "destination"; returns False if it is not cached."""
+        path = self._get_entry_path(key, name)
+        if not os.path.isfile(path):
+            return False
+        shutil.copyfile(path, destination)
+        return True
+
+    def retrieve_text(self, key: str, name: str) -> Optional[str]:
+        path = self._get_entry_path(key, name)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'r') as f:
+            return f.read()
+
+    def store(self, key: str, name: str, source: str):
+        path = self._get_entry_path(key, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + _CC.TEMPORARY_SUFFIX + str(os.getpid())
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+
+    def store_text(self, key: str, name: str, text: str):
+        path = self._get_entry_path(key, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + _CC.TEMPORARY_SUFFIX + str(os.getpid())
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
@@ -1,21 +1,24 @@
 import os
 import tempfile
 import shutil
-import multiprocessing
-from copy import deepcopy
 from typing import Optional, List, Any
 
 import rdkit.Chem as Chem
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 from typing_extensions import Literal
 
 from dockstream.core.Schrodinger.Glide_docker import Parallelization
-from dockstream.core.docker import Docker
+from dockstream.core.docker import Docker, SubjobLimits, Rescoring
 from dockstream.core.rDock.rDock_result_parser import rDockResultParser
+from dockstream.core.rDock.rDock_cavity_cache import get_artefact_path, get_grid_suffixes
+from dockstream.core.result_ingestion import convert_to_binaries, read_result_molecules
 from dockstream.utils.enums.logging_enums import LoggingConfigEnum
 from dockstream.utils.execute_external.rDock import rDockExecutor
 from dockstream.utils.enums.rDock_enums import rDockExecutablesEnum, rDockDockingConfigurationEnum, rDockRbdockOutputEnum
 from dockstream.utils.enums.RDkit_enums import RDkitLigandPreparationEnum
+from dockstream.utils.enums.rescoring_enums import RescoringEnum
+from dockstream.utils.enums.rDock_htvs_enums import rDockHTVSEnum
+from dockstream.utils.enums.rDock_cavity_cache_enums import rDockCavityCacheEnum
 from dockstream.utils.general_utils import gen_temp_file
 
 from dockstream.utils.translations.molecule_translator import MoleculeTranslator
@@ -27,6 +30,68 @@ _LP = RDkitLigandPreparationEnum()
 _CE = rDockDockingConfigurationEnum()
 _EE = rDockExecutablesEnum()
 _ROE = rDockRbdockOutputEnum()
+_RS = RescoringEnum()
+_HE = rDockHTVSEnum()
+_CC = rDockCavityCacheEnum()
+
+
+class rDockHTVSStage(BaseModel):
+    score_threshold: float
+    max_runs: int = Field(gt=0)
+
+
+class rDockHTVS(BaseModel):
+    """High-throughput virtual screening mode of "rbdock" (filter file handed over with "-t").
+
+    Either an existing filter file is used as it is ("filter_path") or one is generated from the "stages": a ligand
+    that has not reached a "SCORE.INTER" below the "score_threshold" of a stage within its first "max_runs" runs is
+    dropped, the others continue until "number_runs" runs are done. For generated filters, all poses are written and
+    the stage at which docking stopped is recorded for each ligand ("number of stages + 1" means completed).
+    """
+
+    filter_path: Optional[str] = None
+    stages: List[rDockHTVSStage] = []
+    number_runs: int = Field(default=50, gt=0)
+
+    @validator("stages", always=True)
+    def _check_stages(cls, stages, values):
+        if values.get("filter_path") is None and len(stages) == 0:
+            raise ValueError("Either a filter file or at least one stage has to be specified.")
+        max_runs = [stage.max_runs for stage in stages]
+        if max_runs != sorted(set(max_runs)):
+            raise ValueError("The maximum numbers of runs of the stages have to be strictly increasing.")
+        return stages
+
+    @validator("number_runs", always=True)
+    def _check_number_runs(cls, number_runs, values):
+        stages = values.get("stages", [])
+        if len(stages) > 0 and stages[-1].max_runs >= number_runs:
+            raise ValueError("The number of runs has to be larger than the maximum number of runs of the last stage.")
+        return number_runs
+
+    def is_generated(self) -> bool:
+        return self.filter_path is None
+
+    def get_filter_definition(self) -> str:
+        # one termination filter per stage ("if the score is below the threshold, move on to the next filter; else, if
+        # the maximum number of runs is reached, stop; else continue") and a last one ending after "number_runs" runs;
+        # no output filter, so that all poses are written
+        lines = [str(len(self.stages) + 1)]
+        for stage in self.stages:
+            lines.append(' '.join(["if -", str(stage.score_threshold), _HE.SCORE_INTER, _HE.FILTER_NEXT,
+                                   "if -", _HE.SCORE_NRUNS, str(stage.max_runs - 1),
+                                   _HE.FILTER_STOP, _HE.FILTER_CONTINUE]) + ',')
+        lines.append(' '.join(['-', _HE.SCORE_NRUNS, str(self.number_runs - 1)]) + ',')
+        lines.append('0')
+        return '\n'.join(lines) + '\n'
+
+    def get_stage(self, inter_scores: list) -> int:
+        """Returns the (1-based) stage at which docking of a ligand stopped, given the "SCORE.INTER" of all its poses."""
+        best = min(inter_scores)
+        for stage_number, stage in enumerate(self.stages, start=1):
+            if best >= stage.score_threshold:
+                return stage_number
+        return len(self.stages) + 1
 
 
 class rDockParameters(BaseModel):
@@ -35,6 +100,10 @@ class rDockParameters(BaseModel):
     parallelization: Optional[Parallelization]
     rbdock_prm_paths: List[str]
     number_poses: int
+    subjob_limits: Optional[SubjobLimits] = None
+    rescoring: Optional[Rescoring] = None
+    htvs: Optional[rDockHTVS] = None
+    use_precomputed_grids: bool = False
 
     def get(self, key: str) -> Any:
         """Temporary method to support nested_get"""
@@ -65,10 +134,67 @@ class rDock(Docker):
             raise DockingRunFailed("Cannot initialize rDock docker, as rDock backend is not available - abort.")
         self._rDock_executor.set_env_vars()
         self._logger.log(f"Checked rDock backend availability (prefix_execution={self.parameters.prefix_execution}).", _LE.DEBUG)
+        if self.parameters.use_precomputed_grids:
+            self._check_precomputed_grids()
+
+    def _check_precomputed_grids(self):
+        # the grids are generated by the target preparation (parameter "precompute_grids") next to the PRM file
+        missing = [get_artefact_path(self.parameters.rbdock_prm_paths[0], suffix) for _, suffix in get_grid_suffixes()]
+        missing = [path for path in missing if not os.path.isfile(path)]
+        if len(missing) > 0:
+            raise DockingRunFailed(f"Cannot use precomputed grids, as grid files {missing} do not exist - abort.")
 
     def _get_score_from_conformer(self, conformer):
         return float(conformer.GetProp(_ROE.SCORE))
 
+    def _get_rescoring(self) -> Optional[Rescoring]:
+        return self.parameters.rescoring
+
+    def _use_htvs(self) -> bool:
+        return self.parameters.htvs is not None and self.parameters.rescoring is None
+
+    def _write_htvs_filter(self, folder: str) -> Optional[str]:
+        if not self._use_htvs():
+            return None
+        htvs = self.parameters.htvs
+        if not htvs.is_generated():
+            return htvs.filter_path
+        filter_path = gen_temp_file(suffix=_HE.FILTER_FILE_SUFFIX, dir=folder)
+        with open(filter_path, 'w') as file:
+            file.write(htvs.get_filter_definition())
+        return filter_path
+
+    def _add_htvs_stages(self):
+        # derive the stage at which each ligand stopped from its poses (before they are reduced to "number_poses")
+        htvs = self.parameters.htvs
+        for ligand in self.ligands:
+            conformers = ligand.get_conformers()
+            if len(conformers) == 0:
+                continue
+            stage = htvs.get_stage([float(conformer.GetProp(_HE.SCORE_INTER)) for conformer in conformers])
+            for conformer in ligand.get_mutable_conformers():
+                conformer.SetProp(_HE.TAG_HTVS_STAGE, str(stage))
+
+    def _get_docking_protocol(self) -> str:
+        # the grid-based protocol loads the precomputed grids instead of calculating the interactions on every start
+        if self.parameters.use_precomputed_grids:
+            return _CC.DOCK_GRID_PROTOCOL
+        return _EE.RBDOCK_P_DEFAULT
+
+    def _get_protocol_arguments(self, htvs_filter_path: Optional[str] = None) -> list:
+        # rescoring replaces the docking protocol by the (bundled) scoring or minimisation protocol with a single run
+        rescoring = self.parameters.rescoring
+        if rescoring is None and htvs_filter_path is not None:
+            return [_EE.RBDOCK_N, str(self.parameters.htvs.number_runs),
+                    _EE.RBDOCK_P, self._get_docking_protocol(),
+                    _HE.RBDOCK_T, htvs_filter_path]
+        if rescoring is None:
+            return [_EE.RBDOCK_N, str(self.parameters.number_poses),
+                    _EE.RBDOCK_P, self._get_docking_protocol()]
+        protocol = _RS.RDOCK_SCORE_PROTOCOL if rescoring.mode == _RS.MODE_SCORE_ONLY else _RS.RDOCK_MINIMISE_PROTOCOL
+        return [_EE.RBDOCK_N, "1",
+                _EE.RBDOCK_P, protocol]
+
     def add_molecules(self, molecules: list):
         mol_trans = MoleculeTranslator(self.ligands, force_mol_type=_LP.TYPE_RDKIT)
         mol_trans.add_molecules(molecules)
@@ -85,6 +211,7 @@ class rDock(Docker):
         tmp_output_dirs = []
         tmp_input_sdf_paths = []
         tmp_output_sdf_paths = []
+        ligand_identifiers = []
         for start_index, sublist in zip(start_indices, sublists):
 
             # generate temporary input file and output directory into which "rbdock" will deposit the poses
@@ -93,12 +220,14 @@ class rDock(Docker):
 
             # write-out the temporary input file
             one_written = False
+            cur_identifiers = []
             writer = Chem.SDWriter(cur_tmp_sdf)
             for ligand in sublist:
                 # initialize all ligands (as they could have failed)
                 if ligand.get_molecule() is not None:
-                    mol = deepcopy(ligand.get_molecule())
+                    mol = ligand.get_mutable_molecule()
                     one_written = True
+                    cur_identifiers.append(ligand.get_identifier())
                     mol.SetProp("_Name", ligand.get_identifier())
                     writer.write(mol)
             writer.close()
@@ -110,7 +239,8 @@ class rDock(Docker):
             tmp_output_dirs.append(cur_tmp_output_dir)
             tmp_input_sdf_paths.append(cur_tmp_sdf)
             tmp_output_sdf_paths.append('.'.join([cur_tmp_output_dir, "sd"]))
-        return tmp_output_dirs, tmp_input_sdf_paths, tmp_output_sdf_paths
+            ligand_identifiers.append(cur_identifiers)
+        return tmp_output_dirs, tmp_input_sdf_paths, tmp_output_sdf_paths, ligand_identifiers
 
     def _dock(self, number_cores):
 
@@ -122,72 +252,82 @@ class rDock(Docker):
 
         sublists_submitted = 0
         slices_per_iteration = min(number_cores, number_sublists)
-        while sublists_submitted < len(sublists):
-            upper_bound_slice = min((sublists_submitted + slices_per_iteration), len(sublists))
-            cur_slice_start_indices = start_indices[sublists_submitted:upper_bound_slice]
-            cur_slice_sublists = sublists[sublists_submitted:upper_bound_slice]
-
-            # generate paths and initialize molecules (so that if they fail, this can be covered)
-            tmp_output_dirs, tmp_input_sdf_paths, \
-            tmp_output_sdf_paths = self._generate_temporary_input_output_files(cur_slice_start_indices,
-                                                                               cur_slice_sublists)
-
-            # run in parallel
-            processes = []
-            for chunk_index in range(len(tmp_output_dirs)):
-                p = multiprocessing.Process(target=self._dock_subjob, args=(tmp_input_sdf_paths[chunk_index],
-                                                                            tmp_output_dirs[chunk_index],
-                                                                            tmp_output_sdf_paths[chunk_index]))
-                processes.append(p)
-                p.start()
-            for p in processes:
-                p.join()
-
-            # add the number of input sublists rather than the output temporary folders to account for cases where
-            # entire sublists failed to produce an input structure
-            sublists_submitted += len(cur_slice_sublists)
-
-            # load the chunks and recombine the result; add conformations
-            for chunk_index in range(len(tmp_output_dirs)):
-                if not os.path.isfile(tmp_output_sdf_paths[chunk_index]) or os.path.getsize(tmp_output_sdf_paths[chunk_index]) == 0:
-                    continue
-
-                # do not sanitize, because rDock sometimes produces stuff that cannot be kekulized
-                for molecule in Chem.SDMolSupplier(tmp_output_sdf_paths[chunk_index], sanitize=False, removeHs=False):
-                    # it can happen, that ligands have "impossible chemistry" and will be loaded by RDkit as "None"
-                    if molecule is None:
-                        continue
-                    cur_conformer_name = str(molecule.GetProp(_ROE.NAME))
-
-                    # add molecule to the appropriate ligand
-                    for ligand in self.ligands:
-                        if ligand.get_identifier() == cur_conformer_name:
+        ligands_by_identifier = self._get_ligands_by_identifier()
+        # a generated HTVS filter is written to a temporary folder, which is removed after the docking
+        tmp_htvs_dir = None
+        if self._use_htvs() and self.parameters.htvs.is_generated():
+            tmp_htvs_dir = tempfile.mkdtemp()
+        try:
+            htvs_filter_path = self._write_htvs_filter(tmp_htvs_dir)
+            while sublists_submitted < len(sublists):
+                # stop dispatching once the deadline has passed; the remaining ligands will not be docked
+                if self._deadline_reached():
+                    self._skip_sublists(sublists[sublists_submitted:])
+                    break
+
+                upper_bound_slice = min((sublists_submitted + slices_per_iteration), len(sublists))
+                cur_slice_start_indices = start_indices[sublists_submitted:upper_bound_slice]
+                cur_slice_sublists = sublists[sublists_submitted:upper_bound_slice]
+
+                # generate paths and initialize molecules (so that if they fail, this can be covered)
+                tmp_output_dirs, tmp_input_sdf_paths, \
+                tmp_output_sdf_paths, ligand_identifiers = self._generate_temporary_input_output_files(cur_slice_start_indices,
+                                                                                                       cur_slice_sublists)
+
+                # run in parallel; subjobs exceeding their limits are killed and their ligands recorded as failed
+                self._run_subjobs(target=self._dock_subjob,
+                                  list_arguments=[(input_sdf_path, output_dir, output_sdf_path, htvs_filter_path)
+                                                  for input_sdf_path, output_dir, output_sdf_path
+                                                  in zip(tmp_input_sdf_paths, tmp_output_dirs, tmp_output_sdf_paths)],
+                                  list_identifiers=ligand_identifiers,
+                                  limits=self.parameters.subjob_limits)
+
+                # add the number of input sublists rather than the output temporary folders to account for cases
+                # where entire sublists failed to produce an input structure
+                sublists_submitted += len(cur_slice_sublists)
+
+                # load the chunks (parsed by the subjobs already) and recombine the result; add conformations
+                for chunk_index in range(len(tmp_output_dirs)):
+                    # do not sanitize, because rDock sometimes produces stuff that cannot be kekulized
+                    for molecule in read_result_molecules(tmp_output_sdf_paths[chunk_index], sanitize=False):
+                        # add molecule to the appropriate ligand
+                        ligand = ligands_by_identifier.get(str(molecule.GetProp(_ROE.NAME)))
+                        if ligand is not None:
                             ligand.add_conformer(molecule)
-                            break
 
-            # clean-up
-            for path in tmp_output_dirs:
-                shutil.rmtree(path)
-            self._log_docking_progress(number_done=sublists_submitted, number_total=number_sublists)
+                # clean-up
+                for path in tmp_output_dirs:
+                    shutil.rmtree(path)
+                self._log_docking_progress(number_done=sublists_submitted, number_total=number_sublists)
+        finally:
+            if tmp_htvs_dir is not None:
+                shutil.rmtree(tmp_htvs_dir)
+
+        # for generated HTVS filters, all runs are written: record the stages and keep the best "number_poses" only
+        use_htvs_stages = self._use_htvs() and self.parameters.htvs.is_generated()
+        if use_htvs_stages:
+            self._add_htvs_stages()
 
         # sort the conformers (best to worst), update their names to contain the conformer id and add tags
         # -> <ligand_number>:<enumeration>:<conformer_number>
         for ligand in self.ligands:
-            ligand.set_conformers(sorted(ligand.get_conformers(),
-                                         key=lambda x: float(x.GetProp(_ROE.SCORE)), reverse=False))
+            conformers = sorted(ligand.get_conformers(), key=lambda x: float(x.GetProp(_ROE.SCORE)), reverse=False)
+            if use_htvs_stages:
+                conformers = conformers[:self.parameters.number_poses]
+            ligand.set_conformers(conformers)
             ligand.add_tags_to_conformers()
 
         # log any docking fails
         self._docking_fail_check()
 
         # parse the result of the docking step
-        result_parser = rDockResultParser([ligand.get_clone() for ligand in self.ligands])
+        result_parser = rDockResultParser(self.ligands)
         self._df_results = result_parser.as_dataframe()
 
         # docking flag
         self._docking_performed = True
 
-    def _dock_subjob(self, input_path_sdf, output_dir_path, output_sdf_path):
+    def _dock_subjob(self, input_path_sdf, output_dir_path, output_sdf_path, htvs_filter_path=None):
 
         # set up arguments list and execute
         # for an explanation of the parameters, see "rDockExecutablesEnum"
@@ -195,14 +335,15 @@ class rDock(Docker):
         arguments = [_EE.RBDOCK_R, self.parameters.rbdock_prm_paths[0],
                      _EE.RBDOCK_I, input_path_sdf,
                      _EE.RBDOCK_O, output_dir_path,
-                     _EE.RBDOCK_N, str(self.parameters.number_poses),
-                     _EE.RBDOCK_S, str(_EE.RBDOCK_S_DEFAULT),
-                     _EE.RBDOCK_P, _EE.RBDOCK_P_DEFAULT]
+                     _EE.RBDOCK_S, str(_EE.RBDOCK_S_DEFAULT)] + self._get_protocol_arguments(htvs_filter_path)
 
         execution_result = self._rDock_executor.execute(command=_EE.RBDOCK,
                                                         arguments=arguments,
                                                         check=True)
         self._delay4file_system(path=output_sdf_path)
+
+        # parse the poses here rather than on the main process (do not sanitize, see "_dock()")
+        convert_to_binaries(output_sdf_path, sanitize=False)
         self._logger.log(f"Finished sublist (input: {input_path_sdf}, output directory: {output_dir_path}).", _LE.DEBUG)
 
     def write_docked_ligands(self, path, mode="all"):
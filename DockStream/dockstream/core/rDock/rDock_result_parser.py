@@ -2,6 +2,7 @@ import pandas as pd
 from dockstream.core.result_parser import ResultParser
 
 from dockstream.utils.enums.rDock_enums import rDockRbdockOutputEnum, rDockResultKeywordsEnum
+from dockstream.utils.enums.rDock_htvs_enums import rDockHTVSEnum
 
 
 class rDockResultParser(ResultParser):
@@ -10,6 +11,7 @@ class rDockResultParser(ResultParser):
         super().__init__(ligands=ligands)
         self._ROE = rDockRbdockOutputEnum()
         self._RK = rDockResultKeywordsEnum()
+        self._HE = rDockHTVSEnum()
 
         self._df_results = self._construct_dataframe()
 
@@ -17,4 +19,10 @@ class rDockResultParser(ResultParser):
         def func_get_score(conformer):
             return float(conformer.GetProp(self._ROE.SCORE))
 
-        return super()._construct_dataframe_with_funcobject(func_get_score)
+        df = super()._construct_dataframe_with_funcobject(func_get_score)
+
+        # add the stage at which docking stopped, if run in HTVS mode (same order as the rows)
+        conformers = [conformer for ligand in self._ligands for conformer in ligand.get_conformers()]
+        if len(conformers) > 0 and all(conformer.HasProp(self._HE.TAG_HTVS_STAGE) for conformer in conformers):
+            df[self._HE.DF_HTVS_STAGE] = [int(conformer.GetProp(self._HE.TAG_HTVS_STAGE)) for conformer in conformers]
+        return df
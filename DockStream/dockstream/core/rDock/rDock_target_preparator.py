@@ -7,8 +7,12 @@ from rdkit import Chem
 from dockstream.utils.dockstream_exceptions import TargetPreparationFailed
 
 from dockstream.core.target_preparator import TargetPreparator
+from dockstream.core.rDock.rDock_cavity_cache import rDockCavityCache, compute_cavity_key, get_artefact_path, \
+    get_grid_suffixes
 from dockstream.utils.execute_external.rDock import rDockExecutor
+from dockstream.utils.execute_external.execute import Executor
 from dockstream.utils.enums.rDock_enums import rDockExecutablesEnum, rDockResultKeywordsEnum, rDockRbcavityOutputEnum, rDockTargetPreparationEnum
+from dockstream.utils.enums.rDock_cavity_cache_enums import rDockCavityCacheEnum
 from dockstream.containers.target_preparation_container import TargetPreparationContainer
 
 from dockstream.utils.general_utils import *
@@ -22,6 +26,7 @@ class rDockTargetPreparator(TargetPreparator):
         self._EE = rDockExecutablesEnum()
         self._GK = rDockResultKeywordsEnum()
         self._RCO = rDockRbcavityOutputEnum()
+        self._CC = rDockCavityCacheEnum()
 
         # invoke base class's constructor first
         super().__init__(conf=conf, run_number=run_number)
@@ -57,6 +62,7 @@ class rDockTargetPreparator(TargetPreparator):
                                                             self._TP.RUNS_PARAM_BINARY_LOCATION],
                                      default=None)
         self._rDock_executor = rDockExecutor(prefix_execution=prefix_execution, binary_location=binary_location)
+        self._calcgrid_executor = Executor(prefix_execution=prefix_execution, binary_location=binary_location)
         if not self._rDock_executor.is_available():
             raise TargetPreparationFailed("Cannot initialize rDock preparator, as rDock backend is not available - abort.")
         self._rDock_executor.set_env_vars()
@@ -146,6 +152,49 @@ class rDockTargetPreparator(TargetPreparator):
         self._update_prm_file(prm_path=prm_path,
                               receptor_mol2_path=receptor_mol2_path,
                               ref_ligand_sdf_path=ref_ligand_sdf_path)
+        return ref_ligand_sdf_path
+
+    def _get_cavity_cache(self):
+        cache_folder = nested_get(self._run_parameters, [self._TP.CAVITY, self._CC.CAVITY_CACHE_FOLDER], default=None)
+        if cache_folder is None:
+            return None
+        return rDockCavityCache(folder=cache_folder)
+
+    def _load_cavity_from_cache(self, cache: rDockCavityCache, key: str, prm_path: str):
+        # all artefacts of "rbcavity" have to be cached, otherwise it is executed again
+        rbcavity_output = cache.retrieve_text(key, self._CC.RBCAVITY_OUTPUT)
+        if rbcavity_output is None:
+            return None
+        for suffix in [self._CC.CAVITY_BINARY_SUFFIX, self._CC.CAVITY_GRID_SUFFIX]:
+            if not cache.retrieve(key, suffix, get_artefact_path(prm_path, suffix)):
+                return None
+        self._logger.log(f"Loaded cavity files for PRM file {prm_path} from cache (key {key}).", self._TL.DEBUG)
+        return rbcavity_output
+
+    def _store_cavity_in_cache(self, cache: rDockCavityCache, key: str, prm_path: str, rbcavity_output: str):
+        for suffix in [self._CC.CAVITY_BINARY_SUFFIX, self._CC.CAVITY_GRID_SUFFIX]:
+            cache.store(key, suffix, get_artefact_path(prm_path, suffix))
+        cache.store_text(key, self._CC.RBCAVITY_OUTPUT, rbcavity_output)
+        self._logger.log(f"Stored cavity files for PRM file {prm_path} in cache (key {key}).", self._TL.DEBUG)
+
+    def _precompute_grids(self, prm_path: str, cache: rDockCavityCache = None, key: str = None) -> list:
+        # the van der Waals grids are written next to the PRM file and used by the grid-based docking protocol
+        grid_paths = []
+        for protocol, suffix in get_grid_suffixes():
+            grid_path = get_artefact_path(prm_path, suffix)
+            grid_paths.append(grid_path)
+            if cache is not None and cache.retrieve(key, suffix, grid_path):
+                self._logger.log(f"Loaded grid {grid_path} from cache (key {key}).", self._TL.DEBUG)
+                continue
+            arguments = [self._CC.RBCALCGRID_R, prm_path, self._CC.RBCALCGRID_P, protocol,
+                         self._CC.RBCALCGRID_O, suffix]
+            self._calcgrid_executor.execute(command=self._CC.RBCALCGRID, arguments=arguments, check=True)
+            if not os.path.isfile(grid_path):
+                raise TargetPreparationFailed(f"Executing rbcalcgrid did not produce grid {grid_path}.")
+            if cache is not None:
+                cache.store(key, suffix, grid_path)
+            self._logger.log(f"Generated grid {grid_path}.", self._TL.DEBUG)
+        return grid_paths
 
     def specify_cavity(self) -> dict:
         # TODO: implement other cavity specification method(s) than "reference_ligand"
@@ -166,32 +215,48 @@ class rDockTargetPreparator(TargetPreparator):
         shutil.copyfile(original_prm_file_path, prm_input_file)
 
         # call the cavity method (only "reference ligand" at the moment)
-        self._cavity_by_reference(receptor_mol2_path=target_mol2_path,
-                                  prm_path=prm_input_file,
-                                  folder=cur_folder)
+        ref_ligand_sdf_path = self._cavity_by_reference(receptor_mol2_path=target_mol2_path,
+                                                        prm_path=prm_input_file,
+                                                        folder=cur_folder)
         self._logger.log(f"Wrote updated PRM file {prm_input_file} - based on template file {original_prm_file_path}.", self._TL.DEBUG)
 
         # output paths and file names are fixed when using rDock, set them here
         path_cavity_binary = os.path.splitext(prm_input_file)[0] + ".as"
         path_cavity_grid = os.path.splitext(prm_input_file)[0] + "_cav1.grd"
 
-        # set up arguments list and execute
-        arguments = [self._EE.RBCAVITY_R, prm_input_file, self._EE.RBCAVITY_D, self._EE.RBCAVITY_WAS]
-        result = self._rDock_executor.execute(command=self._EE.RBCAVITY,
-                                              arguments=arguments,
-                                              check=True)
-        self._logger.log(f"Generated cavity binary file {path_cavity_binary} and grid file {path_cavity_grid}.", self._TL.DEBUG)
-
-        if self._RCO.DOCKING_SITE not in result.stdout:
-            raise TargetPreparationFailed("".join(["Error occurred when executing rbcavity:\n", result.stdout]))
+        # if a cache is specified, the artefacts are keyed by the content of the PRM template, receptor and reference
+        cache = self._get_cavity_cache()
+        key = None
+        rbcavity_output = None
+        if cache is not None:
+            key = compute_cavity_key([original_prm_file_path, target_mol2_path, ref_ligand_sdf_path])
+            rbcavity_output = self._load_cavity_from_cache(cache, key, prm_input_file)
+
+        if rbcavity_output is None:
+            # set up arguments list and execute
+            arguments = [self._EE.RBCAVITY_R, prm_input_file, self._EE.RBCAVITY_D, self._EE.RBCAVITY_WAS]
+            result = self._rDock_executor.execute(command=self._EE.RBCAVITY,
+                                                  arguments=arguments,
+                                                  check=True)
+            self._logger.log(f"Generated cavity binary file {path_cavity_binary} and grid file {path_cavity_grid}.", self._TL.DEBUG)
+
+            if self._RCO.DOCKING_SITE not in result.stdout:
+                raise TargetPreparationFailed("".join(["Error occurred when executing rbcavity:\n", result.stdout]))
+            rbcavity_output = result.stdout
+            if cache is not None:
+                self._store_cavity_in_cache(cache, key, prm_input_file, rbcavity_output)
 
         # prepare the return dictionary
         dict_return = {self._GK.SPECIFYCAVITY_BINARY_PATH: path_cavity_binary}
         dict_return[self._GK.SPECIFYCAVITY_GRID_PATH] = path_cavity_grid
 
+        # precompute the scoring grids, so that docking with "dock_grid.prm" does not calculate them on every start
+        if nested_get(self._run_parameters, [self._TP.CAVITY, self._CC.CAVITY_PRECOMPUTE_GRIDS], default=False):
+            self._precompute_grids(prm_input_file, cache=cache, key=key)
+
         # the "rbcavity" executable writes a lot of information to the standard output, such as cavity dimensions
         # -> parse it
-        dict_return[self._GK.SPECIFYCAVITY_METADATA] = self._parse_rbcavity_output(input_str=result.stdout)
+        dict_return[self._GK.SPECIFYCAVITY_METADATA] = self._parse_rbcavity_output(input_str=rbcavity_output)
 
         # return the paths to the generated files
         return dict_return
@@ -0,0 +1,75 @@
+import os
+import gzip
+import pickle
+
+from rdkit import Chem
+
+from dockstream.utils.enums.result_output_enums import ResultOutputEnum
+
+_RO = ResultOutputEnum()
+
+
+def _is_gzipped(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(_RO.GZIP_MAGIC)) == _RO.GZIP_MAGIC
+
+
+def iter_sdf_molecules(path: str, sanitize: bool = True, removeHs: bool = False):
+    """Streams the molecules of an SDF file (gzipped or not, e.g. Glide's "*_lib.sdfgz") without decompressing it to
+       disk first; molecules that cannot be parsed are skipped."""
+    opener = gzip.open if _is_gzipped(path) else open
+    with opener(path, "rb") as stream:
+        for molecule in Chem.ForwardSDMolSupplier(stream, sanitize=sanitize, removeHs=removeHs):
+            if molecule is not None:
+                yield molecule
+
+
+def get_binaries_path(path_sdf: str) -> str:
+    return path_sdf + _RO.BINARIES_SUFFIX
+
+
+def convert_to_binaries(path_sdf: str, sanitize: bool = True, path_binaries: str = None) -> int:
+    """Parses a result SDF and stores the molecules as binary pickles (including all properties). This is meant to be
+       executed at the end of a subjob, so that parsing happens in parallel rather than on the main process.
+
+    :param path_sdf: The (potentially gzipped) result SDF
+    :param sanitize: Whether the molecules are to be sanitized when parsed
+    :param path_binaries: The output path (by default next to the SDF, see "get_binaries_path()")
+    :return: number of molecules stored
+    """
+    if not os.path.isfile(path_sdf) or os.path.getsize(path_sdf) == 0:
+        return 0
+    if path_binaries is None:
+        path_binaries = get_binaries_path(path_sdf)
+    return write_binaries(iter_sdf_molecules(path_sdf, sanitize=sanitize), path_binaries)
+
+
+def write_binaries(molecules, path_binaries: str) -> int:
+    """Stores molecules as binary pickles (including all properties), to be read by "read_result_molecules()".
+
+    :return: number of molecules stored
+    """
+    binaries = [molecule.ToBinary(Chem.PropertyPickleOptions.AllProps) for molecule in molecules]
+
+    # write to a temporary file first, so that a subjob killed halfway does not leave an incomplete file behind
+    with open(path_binaries + ".tmp", "wb") as file:
+        pickle.dump(binaries, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path_binaries + ".tmp", path_binaries)
+    return len(binaries)
+
+
+def read_result_molecules(path_sdf: str, sanitize: bool = True) -> list:
+    """Returns the result molecules of a subjob: from the binaries stored by "convert_to_binaries()" if available,
+       otherwise parsed from the SDF itself.
+
+    :param path_sdf: The result SDF of the subjob
+    :param sanitize: Whether the molecules are to be sanitized when parsed from the SDF
+    :return: list of RDKit molecules (empty, if there are no results)
+    """
+    path_binaries = get_binaries_path(path_sdf)
+    if os.path.isfile(path_binaries):
+        with open(path_binaries, "rb") as file:
+            return [Chem.Mol(binary) for binary in pickle.load(file)]
+    if not os.path.isfile(path_sdf) or os.path.getsize(path_sdf) == 0:
+        return []
+    return list(iter_sdf_molecules(path_sdf, sanitize=sanitize))
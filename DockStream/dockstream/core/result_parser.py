@@ -1,7 +1,7 @@
 import abc
+import numpy as np
 import pandas as pd
 import warnings
-from copy import deepcopy
 from dockstream.core.ligand.ligand import Ligand
 
 from dockstream.utils.dockstream_exceptions import ResultParsingFailed
@@ -9,6 +9,26 @@ from dockstream.utils.dockstream_exceptions import ResultParsingFailed
 from dockstream.loggers.docking_logger import DockingLogger
 from dockstream.utils.enums.logging_enums import LoggingConfigEnum
 from dockstream.utils.enums.docking_enum import ResultKeywordsEnum
+from dockstream.utils.enums.result_output_enums import ResultOutputEnum
+from dockstream.utils.enums.score_assignment_enums import ScoreAssignmentEnum
+
+_RK = ResultKeywordsEnum()
+_RO = ResultOutputEnum()
+_SA = ScoreAssignmentEnum()
+
+
+def set_result_column_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Sets the compact column types of a results dataframe (e.g. after concatenation, which falls back to generic
+       types): 32 bit integer identifiers and categorical names, smiles and score sources."""
+    dtypes = {_RK.DF_LIGAND_NUMBER: _RO.DTYPE_ID,
+              _RK.DF_LIGAND_ENUMERATION: _RO.DTYPE_ID,
+              _RK.DF_CONFORMER: _RO.DTYPE_ID,
+              _RK.DF_LIGAND_NAME: _RO.DTYPE_STRING,
+              _RK.DF_SCORE: _RO.DTYPE_SCORE,
+              _RK.DF_SMILES: _RO.DTYPE_STRING,
+              _RK.DF_LOWEST_CONFORMER: _RO.DTYPE_FLAG,
+              _SA.DF_SCORE_SOURCE: _RO.DTYPE_STRING}
+    return df.astype({column: dtype for column, dtype in dtypes.items() if column in df.columns})
 
 
 class ResultParser(metaclass=abc.ABCMeta):
@@ -26,7 +46,8 @@ class ResultParser(metaclass=abc.ABCMeta):
         if aggregate:
             warnings.warn("For now, \"aggregate\" is not available.")
         if isinstance(aggregate, bool) and aggregate is False:
-            return deepcopy(self._df_results)
+            # the parsers are discarded once the dataframe is retrieved, so it is handed over without copying
+            return self._df_results
         else:
             raise ResultParsingFailed("Parameter aggregate has an illegal value.")
 
@@ -39,24 +60,21 @@ class ResultParser(metaclass=abc.ABCMeta):
             return ligand.get_name()
 
     def _construct_dataframe_with_funcobject(self, func_get_score) -> pd.DataFrame:
-        data_buffer = []
+        # accumulate the values column-wise, so that every column can be given its type in one go
+        ligand_numbers, enumerations, conformer_indices, names, scores, smiles, lowest = [], [], [], [], [], [], []
         for ligand in self._ligands:
-            best = True
             for conformer_index, conformer in enumerate(ligand.get_conformers()):
-                name = self._get_name(ligand, conformer_index)
-                row = [ligand.get_ligand_number(),
-                       ligand.get_enumeration(),
-                       conformer_index,
-                       name,
-                       func_get_score(conformer),
-                       ligand.get_smile(),
-                       best]
-                best = False
-                data_buffer.append(row)
-        return pd.DataFrame(data_buffer, columns=[self._RK.DF_LIGAND_NUMBER,
-                                                  self._RK.DF_LIGAND_ENUMERATION,
-                                                  self._RK.DF_CONFORMER,
-                                                  self._RK.DF_LIGAND_NAME,
-                                                  self._RK.DF_SCORE,
-                                                  self._RK.DF_SMILES,
-                                                  self._RK.DF_LOWEST_CONFORMER])
+                ligand_numbers.append(ligand.get_ligand_number())
+                enumerations.append(ligand.get_enumeration())
+                conformer_indices.append(conformer_index)
+                names.append(self._get_name(ligand, conformer_index))
+                scores.append(func_get_score(conformer))
+                smiles.append(ligand.get_smile())
+                lowest.append(conformer_index == 0)
+        return pd.DataFrame({self._RK.DF_LIGAND_NUMBER: np.asarray(ligand_numbers, dtype=_RO.DTYPE_ID),
+                             self._RK.DF_LIGAND_ENUMERATION: np.asarray(enumerations, dtype=_RO.DTYPE_ID),
+                             self._RK.DF_CONFORMER: np.asarray(conformer_indices, dtype=_RO.DTYPE_ID),
+                             self._RK.DF_LIGAND_NAME: pd.Categorical(names),
+                             self._RK.DF_SCORE: np.asarray(scores, dtype=_RO.DTYPE_SCORE),
+                             self._RK.DF_SMILES: pd.Categorical(smiles),
+                             self._RK.DF_LOWEST_CONFORMER: np.asarray(lowest, dtype=_RO.DTYPE_FLAG)})
@@ -20,5 +20,5 @@ class StereoEnumerator(ABC, BaseModel):
         super().__init__(**data)
         self._logger = LigandPreparationLogger()
 
-    def enumerate(self, ligands: list) -> list:
+    def enumerate(self, ligands: list, keep_embeddings: bool = False) -> list:
         raise NotImplementedError
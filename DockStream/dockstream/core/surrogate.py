@@ -0,0 +1,113 @@
+import os
+import hashlib
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field, PrivateAttr
+from rdkit import Chem, DataStructs
+from rdkit.Chem import AllChem
+
+from dockstream.utils.enums.score_assignment_enums import ScoreAssignmentEnum
+
+_SA = ScoreAssignmentEnum()
+
+
+class Surrogate(BaseModel):
+    """Surrogate model deciding which ligands are worth docking.
+
+    Past docking results for the same backend parameters (i.e. receptor and box) are kept in a store and used for a
+    Tanimoto-weighted k-nearest-neighbour regression on Morgan fingerprints. Ligands whose optimistic estimate
+    (prediction shifted by "margin" times the uncertainty) cannot beat "threshold" are not docked. The uncertainty
+    combines the spread of the neighbours' scores and the distance to the closest neighbour. Each docking result is
+    added to the store, so the model grows with the campaign.
+    """
+
+    store_folder: str
+    threshold: float
+    margin: float = Field(default=1.0, ge=0)
+    number_neighbours: int = Field(default=10, ge=1)
+    minimum_training_size: int = Field(default=100, ge=1)
+    fingerprint_radius: int = 2
+    fingerprint_bits: int = 2048
+
+    _store_path = PrivateAttr(default=None)
+    _scores = PrivateAttr(default=None)
+    _fingerprints = PrivateAttr(default=None)
+
+    def _get_fingerprint(self, molecule):
+        if molecule is None:
+            return None
+        return AllChem.GetMorganFingerprintAsBitVect(molecule, self.fingerprint_radius, nBits=self.fingerprint_bits)
+
+    def set_context(self, context: str):
+        """Selects (and loads) the store for a receptor / box, identified by a string describing the parameters."""
+        file_name = hashlib.sha256(context.encode("utf-8")).hexdigest()[:16] + _SA.SURROGATE_STORE_SUFFIX
+        store_path = os.path.join(self.store_folder, file_name)
+        if store_path == self._store_path:
+            return
+        self._store_path = store_path
+        self._scores = []
+        self._fingerprints = []
+        if os.path.isfile(store_path):
+            data = pd.read_csv(store_path)
+            self._add([Chem.MolFromSmiles(str(smile)) for smile in data[_SA.SURROGATE_STORE_SMILES].tolist()],
+                      data[_SA.SURROGATE_STORE_SCORE].tolist())
+
+    def _add(self, molecules: list, scores: list):
+        for molecule, score in zip(molecules, scores):
+            fingerprint = self._get_fingerprint(molecule)
+            if fingerprint is not None:
+                self._fingerprints.append(fingerprint)
+                self._scores.append(float(score))
+
+    def get_training_size(self) -> int:
+        return 0 if self._scores is None else len(self._scores)
+
+    def predict(self, smile: str):
+        """Returns the predicted score and its uncertainty for a SMILES (or None, if it cannot be parsed)."""
+        return self._predict(self._get_fingerprint(Chem.MolFromSmiles(smile)))
+
+    def _predict(self, fingerprint):
+        if fingerprint is None or self.get_training_size() == 0:
+            return None
+        similarities = np.asarray(DataStructs.BulkTanimotoSimilarity(fingerprint, self._fingerprints))
+        scores = np.asarray(self._scores)
+        number_neighbours = min(self.number_neighbours, len(scores))
+        neighbours = np.argpartition(-similarities, number_neighbours - 1)[:number_neighbours]
+        weights = similarities[neighbours] + 1e-6
+        prediction = np.average(scores[neighbours], weights=weights)
+        spread = np.sqrt(np.average((scores[neighbours] - prediction) ** 2, weights=weights))
+        uncertainty = spread + (1.0 - similarities[neighbours].max()) * scores.std()
+        return float(prediction), float(uncertainty)
+
+    def get_skipped(self, ligands: list, best: str = "min") -> dict:
+        """Returns the predicted scores of those ligands, which are not expected to beat the threshold.
+
+        :param ligands: List of "Ligand" objects
+        :param best: Whether lower ("min") or higher ("max") scores are better, as set by the docking backend
+        :return: dictionary, mapping the identifiers of ligands not to be docked to their predicted score
+        """
+        if self.get_training_size() < self.minimum_training_size:
+            return {}
+        skipped = {}
+        for ligand in ligands:
+            result = self._predict(self._get_fingerprint(ligand.get_graph()))
+            if result is None:
+                continue
+            prediction, uncertainty = result
+            if best == "min" and prediction - self.margin * uncertainty > self.threshold:
+                skipped[ligand.get_identifier()] = prediction
+            elif best == "max" and prediction + self.margin * uncertainty < self.threshold:
+                skipped[ligand.get_identifier()] = prediction
+        return skipped
+
+    def update(self, ligands_scores: list):
+        """Adds new docking results, given as (ligand, best score) tuples, to the model and the store."""
+        if len(ligands_scores) == 0:
+            return
+        smiles = [ligand.get_smile() for ligand, _ in ligands_scores]
+        scores = [score for _, score in ligands_scores]
+        self._add([ligand.get_graph() for ligand, _ in ligands_scores], scores)
+        os.makedirs(self.store_folder, exist_ok=True)
+        data = pd.DataFrame({_SA.SURROGATE_STORE_SMILES: smiles, _SA.SURROGATE_STORE_SCORE: scores})
+        data.to_csv(self._store_path, mode='a', header=not os.path.isfile(self._store_path), index=False)
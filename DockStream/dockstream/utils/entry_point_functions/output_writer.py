@@ -0,0 +1,82 @@
+import queue
+import threading
+
+from dockstream.utils.enums.logging_enums import LoggingConfigEnum
+from dockstream.utils.dockstream_exceptions import DockingRunFailed, get_exception_message
+
+_LE = LoggingConfigEnum()
+
+
+class OutputWriter:
+    """Executes the output jobs of the docking runs (writing poses and scores, printing scores) on a background thread,
+       so that serialisation and disk writes overlap with the next docking run. Jobs are executed in the order they
+       were submitted. At most "max_pending" jobs wait in the queue, further submissions block until the writer has
+       caught up, so the results of many runs are not held in memory at once. By default ("asynchronous" is False),
+       jobs are executed right away on the submitting thread: the background thread is opt-in, as the next run forks
+       its subjobs while the thread may hold locks (e.g. of logging handlers) and write failures only surface with
+       the next submission.
+
+       A failing job stops all subsequent jobs; the failure is raised (as "DockingRunFailed") on the next submission
+       or when the writer is flushed or closed."""
+
+    def __init__(self, logger, max_pending: int = 2, asynchronous: bool = False):
+        self._logger = logger
+        self._asynchronous = asynchronous
+        self._failure = None
+        self._queue = None
+        self._thread = None
+        if asynchronous:
+            self._queue = queue.Queue(maxsize=max(max_pending, 1))
+            self._thread = threading.Thread(target=self._work, name="OutputWriter", daemon=True)
+            self._thread.start()
+
+    def _execute(self, run_id: str, job):
+        try:
+            job()
+        except Exception as e:
+            self._failure = (run_id, e)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._failure is None:
+                    self._execute(*item)
+            finally:
+                self._queue.task_done()
+
+    def _raise_failure(self):
+        if self._failure is None:
+            return
+        run_id, e = self._failure
+        self._failure = None
+        self._logger.log(f"Failed when writing the output of run {run_id}.", _LE.EXCEPTION)
+        self._logger.log(f"Exception reads: {get_exception_message(e)}.", _LE.EXCEPTION)
+        raise DockingRunFailed() from e
+
+    def submit(self, run_id: str, job):
+        """Queues a job (a function without arguments) writing the output of a docking run.
+
+        :raises DockingRunFailed: If a job submitted earlier has failed
+        """
+        self._raise_failure()
+        if self._asynchronous:
+            self._queue.put((run_id, job))
+        else:
+            self._execute(run_id, job)
+            self._raise_failure()
+
+    def flush(self):
+        """Waits until all jobs submitted so far have been executed."""
+        if self._asynchronous:
+            self._queue.join()
+        self._raise_failure()
+
+    def close(self):
+        """Executes all remaining jobs and stops the background thread."""
+        if self._asynchronous and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_failure()
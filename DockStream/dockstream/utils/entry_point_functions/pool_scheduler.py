@@ -0,0 +1,157 @@
+import logging
+import threading
+import multiprocessing
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+
+from rdkit import Chem
+
+from dockstream.loggers.ligand_preparation_logger import LigandPreparationLogger
+from dockstream.utils.entry_point_functions.embedding import embed_ligands
+
+from dockstream.utils.enums.docking_enum import DockingConfigurationEnum
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+from dockstream.utils.enums.logging_enums import LoggingConfigEnum
+from dockstream.utils.dockstream_exceptions import LigandPreparationFailed, get_exception_message
+from dockstream.utils.general_utils import nested_get
+
+_DE = DockingConfigurationEnum()
+_LP = LigandPreparationEnum()
+_LE = LoggingConfigEnum()
+
+# pools are built from worker threads: forking a multi-threaded process can deadlock the child on inherited locks
+# (e.g. of logging handlers), so the pool processes are started fresh
+_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _build_pool_subjob(connection, log_queue, smiles, pool_number: int, pool: dict):
+    # executed in a child process: spawned processes do not inherit the logging configuration, so all records are sent
+    # to the main process (and its handlers, e.g. the log file)
+    root_logger = logging.getLogger()
+    root_logger.handlers = [QueueHandler(log_queue)]
+    root_logger.setLevel(logging.DEBUG)
+
+    # the molecules are sent back pickled, so keep their properties (tags)
+    Chem.SetDefaultPickleProperties(Chem.PropertyPickleOptions.AllProps)
+    try:
+        prep = embed_ligands(smiles=smiles,
+                             pool_number=pool_number,
+                             pool=pool,
+                             logger=LigandPreparationLogger(),
+                             ligand_number_start=0)
+        connection.send((prep.get_ligands(), prep.get_duplicates(), None))
+    except Exception as e:
+        connection.send((None, None, get_exception_message(e)))
+    finally:
+        connection.close()
+
+
+class _LogRecordForwarder(QueueListener):
+    """Hands the log records of the pool processes to the loggers of the main process, which apply their levels."""
+
+    def handle(self, record):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+class PoolScheduler:
+    """Builds the embedding pools concurrently, each in its own (spawned) process, while the sum of the cores the
+       running pool preparators are configured to use does not exceed the core budget. Pools can be retrieved as soon as they
+       are ready, so docking runs do not have to wait for pools they do not use."""
+
+    def __init__(self, pools: list, smiles, core_budget: int, logger):
+        self._pools = pools
+        self._smiles = smiles
+        self._core_budget = max(core_budget, 1)
+        self._logger = logger
+
+        self._cores_available = self._core_budget
+        self._condition = threading.Condition()
+        self._executor = None
+        self._futures = {}
+        self._log_queue = None
+        self._log_forwarder = None
+
+    def _get_number_cores(self, pool: dict) -> int:
+        number_cores = nested_get(pool, [_LP.PARAMS, _DE.PARALLELIZATION, _DE.PARALLELIZATION_NUMBER_CORES],
+                                  default=1)
+        if number_cores <= 0:
+            number_cores = max(multiprocessing.cpu_count() + number_cores, 1)
+        return min(number_cores, self._core_budget)
+
+    @staticmethod
+    def _get_granted_pool(pool: dict, number_cores: int) -> dict:
+        # the preparator is handed a copy of the pool, which uses exactly the cores granted from the budget
+        pool = deepcopy(pool)
+        parallelization = pool.setdefault(_LP.PARAMS, {}).setdefault(_DE.PARALLELIZATION, {})
+        parallelization[_DE.PARALLELIZATION_NUMBER_CORES] = number_cores
+        return pool
+
+    def _build_in_process(self, pool_number: int, pool: dict):
+        parent_connection, child_connection = _CONTEXT.Pipe(duplex=False)
+        p = _CONTEXT.Process(target=_build_pool_subjob,
+                             args=(child_connection, self._log_queue, self._smiles, pool_number, pool))
+        p.start()
+        child_connection.close()
+        try:
+            ligands, duplicates, message = parent_connection.recv()
+        except EOFError:
+            ligands, duplicates, message = None, None, "pool preparation process terminated unexpectedly"
+        p.join()
+        if message is not None:
+            raise LigandPreparationFailed(message)
+        return ligands, duplicates
+
+    def _build(self, pool_number: int, pool: dict):
+        number_cores = self._get_number_cores(pool)
+        with self._condition:
+            self._condition.wait_for(lambda: self._cores_available >= number_cores)
+            self._cores_available -= number_cores
+        self._logger.log(f"Starting generation of pool {pool[_LP.POOLID]} (using {number_cores} core(s)).", _LE.INFO)
+        try:
+            # also a single pool is built in its own process, as its preparator would fork from this worker thread
+            result = self._build_in_process(pool_number, self._get_granted_pool(pool, number_cores))
+        except Exception as e:
+            self._logger.log(f"Failed in constructing pool {pool[_LP.POOLID]}.", _LE.EXCEPTION)
+            self._logger.log(f"Exception reads: {get_exception_message(e)}.", _LE.EXCEPTION)
+            raise LigandPreparationFailed
+        finally:
+            with self._condition:
+                self._cores_available += number_cores
+                self._condition.notify_all()
+        self._logger.log(f"Completed construction of pool {pool[_LP.POOLID]}.", _LE.INFO)
+        return result
+
+    def start(self):
+        Chem.SetDefaultPickleProperties(Chem.PropertyPickleOptions.AllProps)
+        self._log_queue = _CONTEXT.Queue()
+        self._log_forwarder = _LogRecordForwarder(self._log_queue)
+        self._log_forwarder.start()
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self._pools), 1))
+        for pool_number, pool in enumerate(self._pools):
+            self._futures[pool[_LP.POOLID]] = self._executor.submit(self._build, pool_number, pool)
+
+    def get_pool(self, pool_id: str):
+        """Waits until the pool is ready and returns its ligands and duplicates (or None, if the pool is unknown)."""
+        if pool_id not in self._futures:
+            return None
+        return self._futures[pool_id].result()
+
+    def get_ligands(self, pool_id: str):
+        pool = self.get_pool(pool_id)
+        return None if pool is None else pool[0]
+
+    def get_duplicates(self, pool_id: str) -> list:
+        pool = self.get_pool(pool_id)
+        return [] if pool is None else pool[1]
+
+    def shutdown(self):
+        """Waits for all pools (including those not used by any docking run) and raises if any of them failed."""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._log_forwarder.stop()
+        for future in self._futures.values():
+            future.result()
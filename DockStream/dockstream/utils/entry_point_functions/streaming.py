@@ -0,0 +1,112 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from rdkit import Chem
+
+from dockstream.loggers.ligand_preparation_logger import LigandPreparationLogger
+from dockstream.utils.entry_point_functions.embedding import embed_ligands
+
+from dockstream.utils.enums.docking_enum import DockingConfigurationEnum
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+from dockstream.utils.enums.logging_enums import LoggingConfigEnum
+from dockstream.utils.general_utils import nested_get
+
+_DE = DockingConfigurationEnum()
+_LP = LigandPreparationEnum()
+_LE = LoggingConfigEnum()
+
+
+def is_streamable(pools: list) -> bool:
+    """Streaming is only supported for pools, that take their SMILES from the command-line."""
+    for pool in pools:
+        input_type = nested_get(pool, [_LP.INPUT, _LP.INPUT_TYPE], default=None)
+        if input_type is not None and str(input_type).upper() != _LP.INPUT_TYPE_CONSOLE:
+            return False
+    return True
+
+
+def _embed_chunk(smiles: list, pool_number: int, pool: dict, ligand_number_start: int):
+    # executed in a worker process: the molecules are sent back pickled, so keep their properties (tags)
+    Chem.SetDefaultPickleProperties(Chem.PropertyPickleOptions.AllProps)
+    prep = embed_ligands(smiles=';'.join(smiles),
+                         pool_number=pool_number,
+                         pool=pool,
+                         logger=LigandPreparationLogger(),
+                         ligand_number_start=ligand_number_start)
+    return prep.get_ligands(), prep.get_duplicates()
+
+
+def stream_pools(smiles: list, pools: list, chunk_size: int, number_workers: int, max_pending: int, logger):
+    """Embeds the SMILES in chunks on a pool of worker processes and yields the prepared chunks in order, as soon as
+       they are ready. At most "max_pending" chunks are embedded (or waiting to be consumed) at any time, so the
+       embedding cannot run away from the consumer.
+
+    :return: generator of (ligand number of the chunk's first ligand, {pool ID: (ligands, duplicates)}) tuples
+    """
+    chunks = iter([(start, smiles[start:start + chunk_size]) for start in range(0, len(smiles), chunk_size)])
+    Chem.SetDefaultPickleProperties(Chem.PropertyPickleOptions.AllProps)
+
+    with ProcessPoolExecutor(max_workers=number_workers) as executor:
+        pending = deque()
+
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            start, chunk_smiles = chunk
+            futures = {pool[_LP.POOLID]: executor.submit(_embed_chunk, chunk_smiles, pool_number, pool, start)
+                       for pool_number, pool in enumerate(pools)}
+            pending.append((start, futures))
+            return True
+
+        while len(pending) < max_pending and submit_next():
+            pass
+        while len(pending) > 0:
+            start, futures = pending.popleft()
+            result = {pool_id: future.result() for pool_id, future in futures.items()}
+
+            # refill before handing the chunk over, so that embedding continues while the chunk is being docked
+            submit_next()
+            logger.log(f"Embedded chunk starting at ligand {start} ({len(pending)} chunk(s) pending).", _LE.DEBUG)
+            yield start, result
+
+
+def stream_docking(smiles: list, pools: list, docking_runs: list, build_docker, chunk_size: int, number_workers: int,
+                   max_pending: int, deadline, logger) -> dict:
+    """Overlaps ligand preparation and docking: while the embedding workers prepare the next chunks, the current
+       chunk is docked with every docking run. The results of all chunks are merged per run.
+
+    :param build_docker: Function returning a new docker instance for a docking run configuration
+    :return: dictionary, mapping the run IDs to the dockers holding the merged results
+    """
+    dict_dockers = {}
+    for start, chunk_pools in stream_pools(smiles=smiles, pools=pools, chunk_size=chunk_size,
+                                           number_workers=number_workers, max_pending=max_pending, logger=logger):
+        for docking_run in docking_runs:
+            pool_ids = docking_run[_DE.INPUT_POOLS]
+            if isinstance(pool_ids, str):
+                pool_ids = [pool_ids]
+            docker = build_docker(docking_run)
+            if docker.rescores_from_file():
+                # runs rescoring poses from a file do not use the pools, they are executed after streaming
+                continue
+            duplicates = []
+            for pool_id in pool_ids:
+                if pool_id not in chunk_pools:
+                    raise Exception(f"Could not find pool id {pool_id} during docking run.")
+                ligands, pool_duplicates = chunk_pools[pool_id]
+                if len(ligands) > 0:
+                    docker.add_molecules(molecules=[lig.get_clone() for lig in ligands])
+                duplicates += pool_duplicates
+            if len(docker.ligands) == 0:
+                continue
+
+            docker.set_deadline(deadline)
+            docker.dock()
+            docker.expand_duplicates(duplicates)
+            if docking_run[_DE.RUN_ID] in dict_dockers:
+                dict_dockers[docking_run[_DE.RUN_ID]].absorb(docker)
+            else:
+                dict_dockers[docking_run[_DE.RUN_ID]] = docker
+        logger.log(f"Docked chunk starting at ligand {start}.", _LE.INFO)
+    return dict_dockers
@@ -0,0 +1,330 @@
+import os
+import json
+import hashlib
+import warnings
+import multiprocessing
+from copy import deepcopy
+from shutil import copyfile
+
+from dockstream.core.pdb_preparator import PDBPreparator
+from dockstream.core.rDock.rDock_target_preparator import rDockTargetPreparator
+from dockstream.core.OpenEye.OpenEye_target_preparator import OpenEyeTargetPreparator
+from dockstream.core.AutodockVina.AutodockVina_target_preparator import AutodockVinaTargetPreparator, \
+                                                                    patch_docking_configuration
+from dockstream.containers.target_preparation_container import TargetPreparationContainer
+from dockstream.loggers.target_preparation_logger import TargetPreparationLogger
+
+from dockstream.utils.enums.target_preparation_enum import TargetPreparationEnum
+from dockstream.utils.enums.target_preparation_cache_enum import TargetPreparationCacheEnum
+from dockstream.utils.enums.OpenEye_enums import OpenEyeTargetPreparationEnum
+from dockstream.utils.enums.Gold_enums import GoldTargetPreparationEnum
+from dockstream.utils.enums.AutodockVina_enums import AutodockTargetPreparationEnum
+from dockstream.utils.enums.AutodockVina_search_space_enums import AutodockSearchSpaceEnum
+from dockstream.utils.enums.rDock_enums import rDockResultKeywordsEnum
+from dockstream.utils.enums.logging_enums import LoggingConfigEnum
+from dockstream.utils.dockstream_exceptions import TargetPreparationFailed, get_exception_message
+from dockstream.utils.general_utils import gen_temp_file, nested_get
+
+_TP = TargetPreparationEnum()
+_TC = TargetPreparationCacheEnum()
+_LE = LoggingConfigEnum()
+_AD_TP = AutodockTargetPreparationEnum()
+_SE = AutodockSearchSpaceEnum()
+_RK_RDOCK = rDockResultKeywordsEnum()
+
+# parameters naming files, that are written (not read) by a run; they must not be part of its hash
+_WRITTEN_FILE_KEYS = {_SE.EXTRACT_BOX_PATCH_DOCKING_CONFIGURATION}
+
+
+def collect_target_paths(targets) -> list:
+    """Expands a target specification (a path to a PDB file or a folder holding PDB files, or a list of those) into
+       the list of PDB files to be prepared."""
+    if isinstance(targets, str):
+        targets = [targets]
+    target_paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            target_paths += sorted([os.path.join(target, file_name) for file_name in os.listdir(target)
+                                    if os.path.splitext(file_name)[1].lower() == _TC.TARGET_FILE_EXTENSION])
+        elif os.path.isfile(target):
+            target_paths.append(target)
+        else:
+            raise TargetPreparationFailed(f"Target {target} is neither a file nor a folder.")
+    if len(target_paths) == 0:
+        raise TargetPreparationFailed(f"Could not find any target in {targets}.")
+    return target_paths
+
+
+def _is_directory_output(path: str) -> bool:
+    return os.path.isdir(path) or os.path.splitext(path)[1] == ""
+
+
+def _name_output_path(path: str, target_name: str) -> str:
+    # output folders get a sub-folder per target, output files are prefixed with the target's name
+    if _is_directory_output(path):
+        return os.path.join(path, target_name)
+    return os.path.join(os.path.dirname(path), '_'.join([target_name, os.path.basename(path)]))
+
+
+def _get_patch_path(run: dict):
+    return nested_get(run, [_AD_TP.RUNS_PARAM, _AD_TP.EXTRACT_BOX, _SE.EXTRACT_BOX_PATCH_DOCKING_CONFIGURATION],
+                      default=None)
+
+
+def derive_target_configuration(conf: dict, target_path: str, name_outputs: bool) -> dict:
+    """Returns a copy of the target preparation configuration for one target; if "name_outputs" is set, all output
+       paths are made unique for this target (as several targets are prepared with the same configuration)."""
+    conf = deepcopy(conf)
+    conf[_TP.TARGETPREP][_TP.INPUT_PATH] = target_path
+    if not name_outputs:
+        return conf
+
+    # a docking configuration patched with the search space can only hold the box of a single target
+    for run in conf[_TP.TARGETPREP][_TP.RUNS]:
+        if _get_patch_path(run) is not None:
+            raise TargetPreparationFailed(f"Parameter {_SE.EXTRACT_BOX_PATCH_DOCKING_CONFIGURATION} is not supported when preparing several targets.")
+
+    target_name = os.path.splitext(os.path.basename(target_path))[0]
+    fixed_pdb_path = nested_get(conf, [_TP.TARGETPREP, _TP.FIX, _TP.FIX_PBDOUTPUTPATH], default=None)
+    if isinstance(fixed_pdb_path, str):
+        conf[_TP.TARGETPREP][_TP.FIX][_TP.FIX_PBDOUTPUTPATH] = _name_output_path(fixed_pdb_path, target_name)
+    for run in conf[_TP.TARGETPREP][_TP.RUNS]:
+        outputs = run.get(_TP.RUNS_OUTPUT, {})
+        for key, value in outputs.items():
+            if not isinstance(value, str):
+                continue
+            outputs[key] = _name_output_path(value, target_name)
+            if _is_directory_output(value):
+                os.makedirs(outputs[key], exist_ok=True)
+    return conf
+
+
+def _hash_referenced_files(hasher, block):
+    # files referenced in the parameters (e.g. reference ligands) influence the result as well
+    if isinstance(block, dict):
+        for key in sorted(block.keys()):
+            if key in _WRITTEN_FILE_KEYS:
+                continue
+            _hash_referenced_files(hasher, block[key])
+    elif isinstance(block, list):
+        for value in block:
+            _hash_referenced_files(hasher, value)
+    elif isinstance(block, str) and os.path.isfile(block):
+        with open(block, "rb") as f:
+            hasher.update(f.read())
+
+
+def compute_preparation_hash(conf: dict, run_number: int) -> str:
+    """Hashes the input PDB file, the fixing and run parameters and all files referenced by the run's parameters."""
+    hasher = hashlib.new(_TC.HASH_ALGORITHM)
+    with open(conf[_TP.TARGETPREP][_TP.INPUT_PATH], "rb") as f:
+        hasher.update(f.read())
+    run = conf[_TP.TARGETPREP][_TP.RUNS][run_number]
+    parameters = {_TP.FIX: conf[_TP.TARGETPREP].get(_TP.FIX),
+                  _TP.RUNS: run}
+    hasher.update(json.dumps(parameters, sort_keys=True).encode("utf-8"))
+    _hash_referenced_files(hasher, {key: value for key, value in run.items() if key != _TP.RUNS_OUTPUT})
+    return hasher.hexdigest()
+
+
+def _get_hash_path(run: dict, run_number: int):
+    # several runs may write to the same output folder, so every run has its own hash file
+    outputs = [value for _, value in sorted(run.get(_TP.RUNS_OUTPUT, {}).items()) if isinstance(value, str)]
+    if len(outputs) == 0:
+        return None
+    file_name = "".join([_TC.HASH_FILE_RUN_PREFIX, str(run_number), _TC.HASH_FILE_SUFFIX])
+    if _is_directory_output(outputs[0]):
+        return os.path.join(outputs[0], file_name)
+    return outputs[0] + file_name
+
+
+def _load_record(run: dict, run_number: int):
+    hash_path = _get_hash_path(run, run_number)
+    if hash_path is None or not os.path.isfile(hash_path):
+        return None
+    try:
+        with open(hash_path, 'r') as f:
+            record = json.load(f)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def is_up_to_date(run: dict, run_number: int, preparation_hash: str) -> bool:
+    """A run is up-to-date, if it was executed with the very same input and parameters and all its outputs still
+       exist; for output folders, the files written into them (e.g. the "rDock" cavity) are checked."""
+    record = _load_record(run, run_number)
+    if record is None or record.get(_TC.RECORD_HASH) != preparation_hash:
+        return False
+
+    # a docking configuration can only be patched, if the search space was stored with the output
+    if _get_patch_path(run) is not None and _TC.RECORD_SEARCH_SPACE not in record:
+        return False
+    outputs = [value for value in run[_TP.RUNS_OUTPUT].values() if isinstance(value, str)]
+    if not all([os.path.isdir(value) for value in outputs if _is_directory_output(value)]):
+        return False
+    files = [value for value in outputs if not _is_directory_output(value)] + record.get(_TC.RECORD_FILES, [])
+    return all([os.path.isfile(path) for path in files])
+
+
+def _store_record(run: dict, run_number: int, preparation_hash: str, record: dict):
+    hash_path = _get_hash_path(run, run_number)
+    if hash_path is not None:
+        with open(hash_path, 'w') as f:
+            json.dump(dict(record, **{_TC.RECORD_HASH: preparation_hash}), f, indent=2)
+
+
+def _apply_stored_patch(run: dict, run_number: int, logger):
+    # a skipped "AutoDock Vina" run still patches its docking configuration (which might have been regenerated)
+    patch_path = _get_patch_path(run)
+    search_space = _load_record(run, run_number).get(_TC.RECORD_SEARCH_SPACE)
+    if patch_path is None or search_space is None:
+        return
+    number_patched = patch_docking_configuration(patch_path, search_space)
+    logger.log(f"Patched search space of {number_patched} AutoDock Vina run(s) in docking configuration {patch_path}.",
+               _LE.INFO)
+
+
+def _execute_run(config: TargetPreparationContainer, run: dict, run_number: int, input_pdb_path: str,
+                 logger) -> dict:
+    # returns the record stored with the hash: the files written (outputs not named in the configuration) and, for
+    # "AutoDock Vina", the search space derived
+    if run[_TP.RUNS_BACKEND] == _TP.RUNS_BACKEND_RDOCK:
+        prep = rDockTargetPreparator(conf=config, target=input_pdb_path, run_number=run_number)
+        cavity = prep.specify_cavity()
+        logger.log("Wrote rDock cavity files to folder specified.",
+                   _LE.INFO)
+        return {_TC.RECORD_FILES: [cavity[_RK_RDOCK.SPECIFYCAVITY_BINARY_PATH],
+                                   cavity[_RK_RDOCK.SPECIFYCAVITY_GRID_PATH]]}
+    elif run[_TP.RUNS_BACKEND] == _TP.RUNS_BACKEND_OPENEYE:
+        _OpenEye_TP = OpenEyeTargetPreparationEnum()
+        prep = OpenEyeTargetPreparator(conf=config, target=input_pdb_path, run_number=run_number)
+        prep.specify_cavity()
+        prep.write_target(path=run[_TP.RUNS_OUTPUT][_OpenEye_TP.OUTPUT_RECEPTORPATH])
+        logger.log(f"Wrote OpenEye receptor to file {run[_TP.RUNS_OUTPUT][_OpenEye_TP.OUTPUT_RECEPTORPATH]}.",
+                   _LE.INFO)
+        return {}
+    elif run[_TP.RUNS_BACKEND] == _TP.RUNS_BACKEND_GOLD:
+        # anything related to Gold (CCDC) fails if the proper environment has not been loaded; load the module here
+        with warnings.catch_warnings(record=True):
+            from dockstream.core.Gold.Gold_target_preparator import GoldTargetPreparator
+        _Gold_TP = GoldTargetPreparationEnum()
+        prep = GoldTargetPreparator(conf=config, target=input_pdb_path, run_number=run_number)
+        prep.specify_cavity()
+        prep.write_target(path=run[_TP.RUNS_OUTPUT][_Gold_TP.OUTPUT_RECEPTORPATH])
+        logger.log(f"Wrote Gold target to file {run[_TP.RUNS_OUTPUT][_Gold_TP.OUTPUT_RECEPTORPATH]}.",
+                   _LE.INFO)
+        return {}
+    elif run[_TP.RUNS_BACKEND] == _TP.RUNS_BACKEND_AUTODOCKVINA:
+        _AD_TP = AutodockTargetPreparationEnum()
+        prep = AutodockVinaTargetPreparator(conf=config, target=input_pdb_path, run_number=run_number)
+        search_space = prep.specify_cavity()
+        prep.write_target(path=run[_AD_TP.RUNS_OUTPUT][_AD_TP.RECEPTOR_PATH])
+        logger.log(f"Wrote AutoDock Vina target to file {run[_AD_TP.RUNS_OUTPUT][_AD_TP.RECEPTOR_PATH]}.",
+                   _LE.INFO)
+        if search_space is not None:
+            logger.log(f"Search space derived from reference ligand: {search_space}.", _LE.INFO)
+        return {_TC.RECORD_SEARCH_SPACE: search_space}
+    else:
+        raise TargetPreparationFailed("Target preparation backend unknown.")
+
+
+def prepare_target(conf: dict, logger, use_cache=True):
+    """Fixes the PDB file (if specified) and executes all target preparation runs for one target. Runs, whose output
+       is up-to-date with respect to the input PDB file and the parameters, are skipped (if "use_cache" is set)."""
+    config = TargetPreparationContainer(conf=conf, validation=False)
+    target_path = config[_TP.TARGETPREP][_TP.INPUT_PATH]
+
+    # check which runs actually need to be executed; the hash covers the original (unfixed) input and the fixing
+    runs = config[_TP.TARGETPREP][_TP.RUNS]
+    hashes = [compute_preparation_hash(conf, run_number) for run_number in range(len(runs))]
+    runs_to_execute = [run_number for run_number in range(len(runs))
+                       if not (use_cache and is_up_to_date(runs[run_number], run_number, hashes[run_number]))]
+    for run_number in sorted(set(range(len(runs))) - set(runs_to_execute)):
+        logger.log(f"Skipped preparation run number {run_number} for target {target_path}, output is up-to-date.",
+                   _LE.INFO)
+        _apply_stored_patch(runs[run_number], run_number, logger)
+    if len(runs_to_execute) == 0:
+        return
+
+    # make a list of temporary files, that are to be deleted at the end
+    temp_files = []
+
+    # do the PDB fixing (if specified)
+    # note, that as these steps are backend-independent, we can use the base Enum
+    input_pdb_path = target_path
+    if config[_TP.TARGETPREP][_TP.FIX][_TP.FIX_ENABLED]:
+        pdb_prep = PDBPreparator(conf=config)
+
+        # generate a temporary PDB file, that will be the input later
+        temp_pdb_file = gen_temp_file(suffix=".pdb")
+
+        # apply the specified fixing and set the input PDB file
+        pdb_prep.fix_pdb(input_pdb_file=input_pdb_path,
+                         output_pdb_file=temp_pdb_file)
+        temp_files.append(temp_pdb_file)
+
+        # clean-up (and make copy in case specified)
+        if nested_get(config, [_TP.TARGETPREP, _TP.FIX, _TP.FIX_PBDOUTPUTPATH], default=False):
+            try:
+                copyfile(src=temp_pdb_file, dst=config[_TP.TARGETPREP][_TP.FIX][_TP.FIX_PBDOUTPUTPATH])
+                input_pdb_path = config[_TP.TARGETPREP][_TP.FIX][_TP.FIX_PBDOUTPUTPATH]
+            except:
+                logger.log("Could not write fixed intermediate PDB file.", _LE.WARNING)
+                input_pdb_path = temp_pdb_file
+        else:
+            input_pdb_path = temp_pdb_file
+        logger.log(f"Wrote fixed PDB to file {input_pdb_path}.", _LE.DEBUG)
+
+    # loop over the specified target preparation steps and execute them
+    try:
+        for run_number in runs_to_execute:
+            run = runs[run_number]
+            logger.log(f"Started preparation run number {run_number} for target {target_path}.", _LE.INFO)
+            try:
+                record = _execute_run(config=config, run=run, run_number=run_number, input_pdb_path=input_pdb_path,
+                                      logger=logger)
+            except Exception as e:
+                logger.log(f"Failed when target preparation run number {run_number}.", _LE.EXCEPTION)
+                raise TargetPreparationFailed() from e
+            else:
+                _store_record(run, run_number, hashes[run_number], record)
+                logger.log(f"Completed target preparation run number {run_number}.", _LE.INFO)
+    finally:
+        # clean-up
+        for temp_file in temp_files:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+
+def _prepare_target_subjob(conf: dict, use_cache: bool):
+    target_path = conf[_TP.TARGETPREP][_TP.INPUT_PATH]
+    try:
+        prepare_target(conf=conf, logger=TargetPreparationLogger(), use_cache=use_cache)
+    except Exception as e:
+        return target_path, get_exception_message(e)
+    return target_path, None
+
+
+def prepare_targets(conf: dict, target_paths: list, logger, number_cores=1, use_cache=True, name_outputs=None):
+    """Prepares all targets with the same configuration, distributing them over "number_cores" worker processes.
+       Unless specified otherwise, output paths are made unique per target, if more than one target is prepared."""
+    if name_outputs is None:
+        name_outputs = len(target_paths) > 1
+    target_confs = [derive_target_configuration(conf, target_path, name_outputs) for target_path in target_paths]
+
+    if number_cores <= 1 or len(target_confs) == 1:
+        for target_conf in target_confs:
+            prepare_target(conf=target_conf, logger=logger, use_cache=use_cache)
+        return
+
+    number_cores = min(number_cores, len(target_confs))
+    logger.log(f"Preparing {len(target_confs)} targets on {number_cores} cores.", _LE.INFO)
+    with multiprocessing.Pool(processes=number_cores) as pool:
+        results = pool.starmap(_prepare_target_subjob, [(target_conf, use_cache) for target_conf in target_confs])
+    failed = [(target_path, message) for target_path, message in results if message is not None]
+    for target_path, message in failed:
+        logger.log(f"Preparation of target {target_path} failed: {message}", _LE.ERROR)
+    if len(failed) > 0:
+        raise TargetPreparationFailed(f"Preparation of {len(failed)} of {len(target_confs)} targets failed.")
+    logger.log(f"Prepared {len(target_confs)} targets.", _LE.INFO)
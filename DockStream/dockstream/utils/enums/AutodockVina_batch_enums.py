@@ -0,0 +1,28 @@
+class AutodockVinaBatchEnum:
+    """This "Enum" serves to store the flags and file names used to dock many ligands with one "AutoDock Vina" call
+       ("--batch" mode, available from version 1.2.0 on)."""
+
+    # flags
+    # ---------
+    VINA_BATCH = "--batch"                                  # followed by all ligand PDBQT files
+    VINA_DIR = "--dir"                                      # output folder of the docked poses
+    VINA_VERSION = "--version"
+
+    # version check: e.g. "AutoDock Vina v1.2.3" or "AutoDock Vina 1.1.2 (May 11, 2011)"
+    # ---------
+    VERSION_PATTERN = r"(\d+)\.(\d+)(?:\.(\d+))?"
+    MINIMUM_BATCH_VERSION = (1, 2, 0)
+
+    # the poses of "<folder>/<name>.pdbqt" are written to "<dir>/<name>_out.pdbqt"
+    # ---------
+    BATCH_OUTPUT_SUFFIX = "_out.pdbqt"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
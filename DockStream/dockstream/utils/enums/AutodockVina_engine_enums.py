@@ -0,0 +1,38 @@
+class AutodockVinaEngineEnum:
+    """This "Enum" serves to store the names, binaries and output formats of the "AutoDock Vina"-compatible engines,
+       which can be selected with parameter "engine" of the AutoDockVina backend."""
+
+    # engines (values of parameter "engine")
+    # ---------
+    ENGINE_VINA = "vina"
+    ENGINE_QVINA2 = "qvina2"
+    ENGINE_QVINAW = "qvina-w"
+    ENGINE_SMINA = "smina"
+
+    # binaries (of the engines other than "AutoDock Vina" itself)
+    # ---------
+    BINARY_QVINA2 = "qvina2"
+    BINARY_QVINAW = "qvina-w"
+    BINARY_SMINA = "smina"
+
+    # availability check: all engines list the (shared) receptor flag in their help message
+    # ---------
+    HELP = "--help"
+    HELP_IDENTIFICATION_STRING = "--receptor"
+
+    # scores: "smina" writes its own remark line into the output PDBQT
+    # ---------
+    SMINA_RESULT_LINE = "REMARK minimizedAffinity"
+    SMINA_RESULT_LINE_POS_SCORE = 2
+    SMINA_REMARK_IDENTIFIER = "minimizedAffinity"
+    SMINA_REMARK_POS_SCORE = 1
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
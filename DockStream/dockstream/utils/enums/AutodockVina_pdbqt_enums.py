@@ -0,0 +1,35 @@
+class AutodockVinaPDBQTEnum:
+    """This "Enum" serves to store the record names and column positions used when reading "AutoDock Vina" PDBQT
+       files (the ligand input and the docked poses) directly, rather than translating them with "OpenBabel"."""
+
+    # records
+    # ---------
+    ATOM = "ATOM"
+    HETATM = "HETATM"
+    MODEL = "MODEL"
+    ENDMDL = "ENDMDL"
+
+    # the score of a pose is the first value of its "REMARK VINA RESULT:" line
+    # ---------
+    RESULT_LINE = "REMARK VINA RESULT:"
+    RESULT_LINE_POS_SCORE = 3
+
+    # fixed columns of the coordinates in "ATOM" / "HETATM" records
+    # ---------
+    COLUMNS_X = (30, 38)
+    COLUMNS_Y = (38, 46)
+    COLUMNS_Z = (46, 54)
+
+    # atoms of the input PDBQT are matched to the RDKit molecule by their coordinates (written with 3 decimals)
+    # ---------
+    MATCHING_TOLERANCE = 0.01
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
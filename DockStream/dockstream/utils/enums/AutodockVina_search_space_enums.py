@@ -0,0 +1,27 @@
+class AutodockSearchSpaceEnum:
+    """This "Enum" serves to store the keywords used to derive an "AutoDock Vina" search space (box) from a
+       reference ligand during target preparation and to hand it over to docking configurations."""
+
+    # parameters in block "extract_box" of a target preparation run
+    # ---------
+    EXTRACT_BOX_MARGIN = "margin"                                       # padding (in Angstrom) added on every side
+    EXTRACT_BOX_MARGIN_DEFAULT = 4.0
+    EXTRACT_BOX_PATCH_DOCKING_CONFIGURATION = "patch_docking_configuration"   # path to a docking JSON to update
+
+    # output of a target preparation run
+    # ---------
+    SEARCH_SPACE_PATH = "search_space_path"                             # JSON file holding the "search_space" block
+
+    # docking configuration
+    # ---------
+    SEARCH_SPACE = "search_space"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
@@ -0,0 +1,23 @@
+class GlideFunnelEnum:
+    """This "Enum" serves to store the keywords of the "Glide" funnel mode, in which all ligands are docked with a
+       fast precision first and only the best fraction is handed over to the next (more precise) stage."""
+
+    # keyword overwritten for every stage
+    # ---------
+    GLIDE_PRECISION = "PRECISION"
+
+    # results: the (1-based) number of the deepest stage, from which the poses (and thus the score) of a ligand are
+    # taken; as for the stages of the "rDock" HTVS mode
+    # ---------
+    TAG_FUNNEL_STAGE = "glide_funnel_stage"
+    DF_FUNNEL_STAGE = "funnel_stage"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
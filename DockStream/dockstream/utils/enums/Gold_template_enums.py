@@ -0,0 +1,25 @@
+class GoldTemplateEnum:
+    """This "Enum" serves to store the file names used when preparing a "Gold" target once (per pickled target
+       dictionary) and sharing the prepared protein and settings template with all subjobs of a docking run."""
+
+    # the prepared target is stored in a folder named by the hash of the pickled target dictionary
+    # ---------
+    HASH_ALGORITHM = "sha256"
+    TARGET_FOLDER_PREFIX = "dockstream_Gold_"
+    TARGET_PDB_NAME = "target.pdb"
+    PROTEIN_MOL2_NAME = "protein_prepared.mol2"
+    REFERENCE_LIGAND_NAME = "reference_ligand"              # the file ending is taken from the target dictionary
+
+    # the settings (protein, binding site and run parameters) written once per run; subjobs add ligands and output
+    # ---------
+    SETTINGS_TEMPLATE_NAME = "gold_template.conf"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
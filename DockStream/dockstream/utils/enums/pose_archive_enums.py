@@ -0,0 +1,32 @@
+class PoseArchiveEnum:
+    """This "Enum" serves to store the strings used by the pose archive, an append-only file of compressed poses with
+       an index allowing random access by run, step, ligand number, enumeration and conformer."""
+
+    # poses paths with this extension are written to an archive instead of an SDF file; the index is stored next to it
+    # ---------
+    ARCHIVE_EXTENSION = ".posearchive"
+    INDEX_SUFFIX = ".idx"
+
+    # the index holds one tab-separated line per pose: the key, the byte offset and length of the record and its format
+    # ---------
+    INDEX_SEPARATOR = '\t'
+    INDEX_NUMBER_FIELDS = 8
+
+    # the record formats: RDKit binary molecules (including all properties) or SDF blocks (e.g. for OpenEye poses)
+    # ---------
+    RECORD_FORMAT_RDKIT = "rdkit"
+    RECORD_FORMAT_SDF = "sdf"
+
+    # compression level of the records (zlib)
+    # ---------
+    COMPRESSION_LEVEL = 6
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
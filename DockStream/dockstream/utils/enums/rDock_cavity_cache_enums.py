@@ -0,0 +1,38 @@
+class rDockCavityCacheEnum:
+    """This "Enum" serves to store the keywords and file names used to cache the cavity files and precomputed scoring
+       grids of "rDock" targets, keyed by the content of the PRM (template) file, the receptor and the reference."""
+
+    # target preparation: additional keys of the "cavity" block
+    # ---------
+    CAVITY_CACHE_FOLDER = "cache_folder"
+    CAVITY_PRECOMPUTE_GRIDS = "precompute_grids"
+
+    # cache entries: one folder per key, holding the artefacts named by the suffix they carry next to the PRM file
+    # ---------
+    HASH_ALGORITHM = "sha256"
+    CAVITY_BINARY_SUFFIX = ".as"
+    CAVITY_GRID_SUFFIX = "_cav1.grd"
+    RBCAVITY_OUTPUT = "rbcavity.log"
+    TEMPORARY_SUFFIX = ".tmp"
+
+    # "rbcalcgrid": precomputed van der Waals grids, used by the grid-based docking protocol "dock_grid.prm"
+    # ---------
+    RBCALCGRID = "rbcalcgrid"
+    RBCALCGRID_R = "-r"                                     # the receptor PRM file
+    RBCALCGRID_P = "-p"                                     # the grid protocol
+    RBCALCGRID_O = "-o"                                     # the suffix of the grid file written next to the PRM file
+    CALCGRID_VDW1_PROTOCOL = "calcgrid_vdw1.prm"
+    CALCGRID_VDW1_SUFFIX = "_vdw1.grd"
+    CALCGRID_VDW5_PROTOCOL = "calcgrid_vdw5.prm"
+    CALCGRID_VDW5_SUFFIX = "_vdw5.grd"
+    DOCK_GRID_PROTOCOL = "dock_grid.prm"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
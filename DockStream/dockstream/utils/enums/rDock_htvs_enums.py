@@ -0,0 +1,31 @@
+class rDockHTVSEnum:
+    """This "Enum" serves to store the keywords of the "rDock" high-throughput virtual screening (HTVS) mode, in which
+       "rbdock" is handed over a filter file ("-t") that terminates the runs of ligands early."""
+
+    # "rbdock" argument
+    # ---------
+    RBDOCK_T = "-t"                                         # path to the filter file
+
+    # filter definition: score terms as written by "rbdock" and the values returned by a termination filter
+    # ---------
+    SCORE_INTER = "SCORE.INTER"
+    SCORE_NRUNS = "SCORE.NRUNS"
+    FILTER_STOP = "0.0"                                     # stop docking this ligand
+    FILTER_CONTINUE = "-1.0"                                # continue with the current filter
+    FILTER_NEXT = "1.0"                                     # move on to the next filter
+    FILTER_FILE_SUFFIX = ".txt"
+
+    # results: the stage at which docking of a ligand stopped (the stage after the last threshold means "completed")
+    # ---------
+    TAG_HTVS_STAGE = "htvs_stage"
+    DF_HTVS_STAGE = "htvs_stage"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
@@ -0,0 +1,31 @@
+class RescoringEnum:
+    """This "Enum" serves to store the modes and backend-specific flags used when rescoring existing poses instead of
+       running a docking search."""
+
+    # modes
+    # ---------
+    MODE_SCORE_ONLY = "score_only"                          # score the poses as they are
+    MODE_LOCAL_ONLY = "local_only"                          # optimize the poses locally, then score them
+
+    # "AutoDock Vina": the score is printed as "Affinity: -7.21 (kcal/mol)" (version 1.1, "smina") or as
+    # "Estimated Free Energy of Binding   : -7.21 (kcal/mol) [...]" (version 1.2)
+    # ---------
+    VINA_SCORE_ONLY = "--score_only"
+    VINA_LOCAL_ONLY = "--local_only"
+    VINA_AFFINITY_PATTERN = r"^\s*Affinity:\s*(-?\d+(?:\.\d+)?)"
+    VINA_FREE_ENERGY_PATTERN = r"^\s*Estimated Free Energy of Binding\s*:\s*(-?\d+(?:\.\d+)?)"
+
+    # "rDock": protocols shipped with rDock (scripts folder), used instead of "dock.prm"
+    # ---------
+    RDOCK_SCORE_PROTOCOL = "score.prm"
+    RDOCK_MINIMISE_PROTOCOL = "minimise.prm"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
@@ -0,0 +1,31 @@
+class ResultOutputEnum:
+    """This "Enum" serves to store the strings and types used when storing and writing out the docking results
+       (scores) in columnar form and when handing the result molecules over from the subjobs."""
+
+    # the output format is determined by the extension of the scores path; anything else is written as CSV
+    # ---------
+    FORMAT_PARQUET = ".parquet"
+    FORMAT_FEATHER = ".feather"
+
+    # column types of the results: compact integer and float types, repeated strings as categories
+    # ---------
+    DTYPE_ID = "int32"
+    DTYPE_SCORE = "float64"
+    DTYPE_SCORE_COLUMNAR = "float32"
+    DTYPE_FLAG = "bool"
+    DTYPE_STRING = "category"
+
+    # the subjobs parse their result SDF and store the molecules as binary pickles next to it
+    # ---------
+    BINARIES_SUFFIX = ".molbin"
+    GZIP_MAGIC = b"\x1f\x8b"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
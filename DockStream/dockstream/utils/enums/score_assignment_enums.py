@@ -0,0 +1,30 @@
+class ScoreAssignmentEnum:
+    """This "Enum" serves to store the strings used for ligands, which are not docked but get a score assigned
+       otherwise (e.g. a fixed score after being rejected by the ligand filter)."""
+
+    # the column in the results dataframe, that states where a score comes from
+    # ---------
+    DF_SCORE_SOURCE = "score_source"
+
+    # the sources of scores
+    # ---------
+    SCORE_SOURCE_DOCKING = "docking"
+    SCORE_SOURCE_FILTER = "filter"
+    SCORE_SOURCE_SURROGATE = "surrogate"
+
+    # the store of past docking results used by the surrogate model (one file per receptor / box)
+    # ---------
+    SURROGATE_STORE_SMILES = "smiles"
+    SURROGATE_STORE_SCORE = "score"
+    SURROGATE_STORE_SUFFIX = ".csv"
+    SURROGATE_CONTEXT_IGNORED_PARAMETERS = ["parallelization", "subjob_limits", "prefix_execution", "binary_location"]
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
@@ -0,0 +1,27 @@
+class TargetPreparationCacheEnum:
+    """This "Enum" serves to store the strings used when preparing several targets in parallel and skipping those,
+       whose preparation output is already up-to-date."""
+
+    # the input PDB files and the preparation parameters are hashed and the hash is stored per run next to the output
+    # (inside output folders), together with the files written and (for "AutoDock Vina") the derived search space
+    # ---------
+    HASH_FILE_RUN_PREFIX = ".run_"
+    HASH_FILE_SUFFIX = ".dockstream_hash"
+    HASH_ALGORITHM = "sha256"
+    RECORD_HASH = "hash"
+    RECORD_FILES = "files"
+    RECORD_SEARCH_SPACE = "search_space"
+
+    # the PDB files of a directory handed over as input
+    # ---------
+    TARGET_FILE_EXTENSION = ".pdb"
+
+    # try to find the internal value and return
+    def __getattr__(self, name):
+        if name in self:
+            return name
+        raise AttributeError
+
+    # prohibit any attempt to set any values
+    def __setattr__(self, key, value):
+        raise ValueError("No changes allowed.")
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+#  coding=utf-8
+
+import os
+import argparse
+
+from dockstream.core.pose_archive import PoseArchive
+
+
+if __name__ == "__main__":
+
+    # get the input parameters and parse them
+    parser = argparse.ArgumentParser(description="Implements simple translator taking a pose archive and spitting out an SDF file.")
+    parser.add_argument("-archive", type=str, default=None, help="A path to a pose archive.")
+    parser.add_argument("-sdf", type=str, default=None, help="A path an output SDF file.")
+    parser.add_argument("-run_id", type=str, default=None, required=False,
+                        help="If set, only the poses of this docking run are exported.")
+    parser.add_argument("-step", type=str, default=None, required=False,
+                        help="If set, only the poses of this step (output prefix) are exported.")
+    args = parser.parse_args()
+
+    if args.archive is None or not os.path.isfile(args.archive):
+        raise Exception("Parameter \"-archive\" must be a relative or absolute path to valid pose archive.")
+    if args.sdf is None:
+        raise Exception("Parameter \"-sdf\" must be set.")
+
+    # write out
+    # ---------
+    number_poses = PoseArchive(args.archive).to_sdf(args.sdf, run_id=args.run_id, step=args.step)
+    print(f"Wrote {number_poses} pose(s) to {args.sdf}.")
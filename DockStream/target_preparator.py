@@ -5,23 +5,15 @@ import os
 import sys
 import warnings
 import argparse
-import tempfile
-from shutil import copyfile
 
-from dockstream.core.pdb_preparator import PDBPreparator
 from dockstream.utils.dockstream_exceptions import *
 
-from dockstream.core.rDock.rDock_target_preparator import rDockTargetPreparator
-from dockstream.core.OpenEye.OpenEye_target_preparator import OpenEyeTargetPreparator
-from dockstream.core.AutodockVina.AutodockVina_target_preparator import AutodockVinaTargetPreparator
 from dockstream.containers.target_preparation_container import TargetPreparationContainer
 
 from dockstream.utils.entry_point_functions.header import initialize_logging, set_environment
+from dockstream.utils.entry_point_functions.target_preparation import collect_target_paths, prepare_targets
 
 from dockstream.utils.enums.target_preparation_enum import TargetPreparationEnum
-from dockstream.utils.enums.OpenEye_enums import OpenEyeTargetPreparationEnum
-from dockstream.utils.enums.Gold_enums import GoldTargetPreparationEnum
-from dockstream.utils.enums.AutodockVina_enums import AutodockTargetPreparationEnum
 from dockstream.utils.enums.logging_enums import LoggingConfigEnum
 
 from dockstream.utils.files_paths import attach_root_path
@@ -40,6 +32,9 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Implements entry point for the target preparation for one or multiple backends.")
     parser.add_argument("-conf", type=str, default=None, help="A path to an preparation configuration file (JSON dictionary) that is to be executed.")
     parser.add_argument("-validation", type=str2bool, default=True, help="If set to False, this flag will prohibit a JSON Schema validation.")
+    parser.add_argument("-targets", type=str, nargs='+', default=None, help="One or more PDB files or folders holding PDB files, that are prepared with the same configuration (overwrites the input path specified in the configuration).")
+    parser.add_argument("-number_cores", type=int, default=1, help="The number of targets that are prepared in parallel.")
+    parser.add_argument("-use_cache", type=str2bool, default=True, help="If set to False, targets will be prepared again even if their output is up-to-date with respect to input and parameters.")
     parser.add_argument("-silent", type=str2bool, default=False, help="If set, the program will silently execute without printing status updates.")
     parser.add_argument("-debug", action="store_true", help="Set this flag to activate the inbuilt debug logging mode (this will overwrite parameter \"-log_conf\", if set).")
     parser.add_argument("-log_conf", type=str, default=None, help="Set absolute path to a logger configuration other than the default stored at \"config/logging/default.json\".")
@@ -74,74 +69,17 @@ if __name__ == "__main__":
     except:
         logger.log("Could not load CCDC / Gold target preparator - if another backend is being used, you can safely ignore this warning.", _LE.DEBUG)
 
-    # make a list of temporary files, that are to be deleted at the end
-    temp_files = []
-
-    # do the PDB fixing (if specified)
-    # note, that as these steps are backend-independent, we can use the base Enum
-    input_pdb_path = config[_TP.TARGETPREP][_TP.INPUT_PATH]
-    if config[_TP.TARGETPREP][_TP.FIX][_TP.FIX_ENABLED]:
-        pdb_prep = PDBPreparator(conf=config)
-
-        # generate a temporary PDB file, that will be the input later
-        temp_pdb_file = gen_temp_file(suffix=".pdb")
-
-        # apply the specified fixing and set the input PDB file
-        pdb_prep.fix_pdb(input_pdb_file=input_pdb_path,
-                         output_pdb_file=temp_pdb_file)
-        temp_files.append(temp_pdb_file)
-
-        # clean-up (and make copy in case specified)
-        if nested_get(config, [_TP.TARGETPREP, _TP.FIX, _TP.FIX_PBDOUTPUTPATH], default=False):
-            try:
-                copyfile(src=temp_pdb_file, dst=config[_TP.TARGETPREP][_TP.FIX][_TP.FIX_PBDOUTPUTPATH])
-                input_pdb_path = config[_TP.TARGETPREP][_TP.FIX][_TP.FIX_PBDOUTPUTPATH]
-            except:
-                logger.log("Could not write fixed intermediate PDB file.", _LE.WARNING)
-        else:
-            input_pdb_path = temp_pdb_file
-        logger.log(f"Wrote fixed PDB to file {input_pdb_path}.", _LE.DEBUG)
-
-    # loop over the specified target preparation steps and execute them
-    for run_number, run in enumerate(config[_TP.TARGETPREP][_TP.RUNS]):
-        logger.log(f"Started preparation run number {run_number}.", _LE.INFO)
-        try:
-            if run[_TP.RUNS_BACKEND] == _TP.RUNS_BACKEND_RDOCK:
-                prep = rDockTargetPreparator(conf=config, target=input_pdb_path, run_number=run_number)
-                result = prep.specify_cavity()
-                logger.log("Wrote rDock cavity files to folder specified.",
-                           _LE.INFO)
-            elif run[_TP.RUNS_BACKEND] == _TP.RUNS_BACKEND_OPENEYE:
-                _OpenEye_TP = OpenEyeTargetPreparationEnum()
-                prep = OpenEyeTargetPreparator(conf=config, target=input_pdb_path, run_number=run_number)
-                prep.specify_cavity()
-                prep.write_target(path=run[_TP.RUNS_OUTPUT][_OpenEye_TP.OUTPUT_RECEPTORPATH])
-                logger.log(f"Wrote OpenEye receptor to file {run[_TP.RUNS_OUTPUT][_OpenEye_TP.OUTPUT_RECEPTORPATH]}.",
-                           _LE.INFO)
-            elif run[_TP.RUNS_BACKEND] == _TP.RUNS_BACKEND_GOLD:
-                _Gold_TP = GoldTargetPreparationEnum()
-                prep = GoldTargetPreparator(conf=config, target=input_pdb_path, run_number=run_number)
-                prep.specify_cavity()
-                prep.write_target(path=run[_TP.RUNS_OUTPUT][_Gold_TP.OUTPUT_RECEPTORPATH])
-                logger.log(f"Wrote Gold target to file {run[_TP.RUNS_OUTPUT][_Gold_TP.OUTPUT_RECEPTORPATH]}.",
-                           _LE.INFO)
-            elif run[_TP.RUNS_BACKEND] == _TP.RUNS_BACKEND_AUTODOCKVINA:
-                _AD_TP = AutodockTargetPreparationEnum()
-                prep = AutodockVinaTargetPreparator(conf=config, target=input_pdb_path, run_number=run_number)
-                prep.specify_cavity()
-                prep.write_target(path=run[_AD_TP.RUNS_OUTPUT][_AD_TP.RECEPTOR_PATH])
-                logger.log(f"Wrote AutoDock Vina target to file {run[_AD_TP.RUNS_OUTPUT][_AD_TP.RECEPTOR_PATH]}.",
-                           _LE.INFO)
-            else:
-                raise TargetPreparationFailed("Target preparation backend unknown.")
-        except Exception as e:
-            logger.log(f"Failed when target preparation run number {run_number}.", _LE.EXCEPTION)
-            raise TargetPreparationFailed() from e
-        else:
-            logger.log(f"Completed target preparation run number {run_number}.", _LE.INFO)
-
-    # clean-up
-    for temp_file in temp_files:
-        os.remove(temp_file)
+    # collect the targets: parameter "-targets" overwrites the input path, which can be a PDB file, a folder or a list
+    target_spec = args.targets if args.targets is not None else config[_TP.TARGETPREP][_TP.INPUT_PATH]
+    try:
+        target_paths = collect_target_paths(target_spec)
+    except Exception as e:
+        logger.log(f"Could not collect targets: {get_exception_message(e)}", _LE.EXCEPTION)
+        raise TargetPreparationFailed() from e
+    name_outputs = len(target_paths) > 1 or (isinstance(target_spec, str) and os.path.isdir(target_spec))
+
+    # prepare all targets; outputs that are up-to-date are not regenerated unless "-use_cache" is switched off
+    prepare_targets(conf=config.get_as_dict(), target_paths=target_paths, logger=logger,
+                    number_cores=args.number_cores, use_cache=args.use_cache, name_outputs=name_outputs)
 
     sys.exit(0)
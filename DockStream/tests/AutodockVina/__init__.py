@@ -1,2 +1,4 @@
 from tests.AutodockVina.test_AutoDockVina_target_preparation import *
 from tests.AutodockVina.test_AutoDockVina_backend import *
+from tests.AutodockVina.test_AutoDockVina_pdbqt_parser import *
+from tests.AutodockVina.test_AutoDockVina_engines import *
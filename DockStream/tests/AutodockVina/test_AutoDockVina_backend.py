@@ -1,9 +1,11 @@
 import unittest
 import os
+import time
 import rdkit.Chem as Chem
 
 from dockstream.core.AutodockVina.AutodockVina_docker import AutodockVina, AutodockVinaParameters, SearchSpace
 from dockstream.core.Schrodinger.Glide_docker import Parallelization
+from dockstream.core.docker import SubjobLimits
 
 from dockstream.utils.enums.AutodockVina_enums import AutodockVinaDockingConfigurationEnum, \
                                                   AutodockResultKeywordsEnum
@@ -108,6 +110,8 @@ class Test_AutoDockVina_backend(unittest.TestCase):
                 number_poses=4,
                 receptor_pdbqt_path=[self.receptor_path],
                 seed=11,
+                # the line counts of the pose files below refer to poses translated by OpenBabel
+                native_pose_reader=False,
                 search_space=SearchSpace(
                     center_x=3.3,
                     center_y=11.5,
@@ -170,6 +174,43 @@ class Test_AutoDockVina_backend(unittest.TestCase):
                                     mode=self._CE.OUTPUT_MODE_BESTPERENUMERATION)
         self.assertEqual(lines_in_file(path_poses_best_per_enumeration), 672)
 
+    def test_AutoDockVina_docking_native_pose_reader(self):
+        docker = AutodockVina(
+            input_pools=["RDkit"],
+            parameters=AutodockVinaParameters(
+                parallelization=Parallelization(number_cores=1),
+                number_poses=4,
+                receptor_pdbqt_path=[self.receptor_path],
+                seed=11,
+                search_space=SearchSpace(
+                    center_x=3.3,
+                    center_y=11.5,
+                    center_z=24.8,
+                    size_x=15,
+                    size_y=10,
+                    size_z=10
+                ),
+                prefix_execution="module load AutoDock_Vina"
+            )
+        )
+        self.assertTrue(docker.parameters.native_pose_reader)
+        docker.add_molecules(molecules=self.ligands_with_hydrogens[:4])
+        docker.dock()
+
+        # the poses are read from the output PDBQT directly; the scores are the same as with "OpenBabel"
+        docked_ligands = docker.get_docked_ligands()
+        self.assertEqual(4, len(docked_ligands))
+        self.assertListEqual([len(ligand.get_conformers()) for ligand in docked_ligands], [4, 4, 4, 4])
+        self.assertListEqual([conf.GetProp(self._ROE.SDF_TAG_SCORE) for conf in docked_ligands[0].get_conformers()],
+                             ["-9.1", "-8.1", "-7.9", "-7.8"])
+        self.assertListEqual(docker.get_scores(best_only=True), [-9.1, -9.0, -8.9, -9.2])
+
+        # the poses are copies of the input molecules (all atoms, including the hydrogens) tagged with their ligand
+        for ligand, input_ligand in zip(docked_ligands, self.ligands_with_hydrogens[:4]):
+            for conformer in ligand.get_conformers():
+                self.assertEqual(conformer.GetNumAtoms(), input_ligand.get_molecule().GetNumAtoms())
+                self.assertTrue(conformer.GetProp("_Name").startswith(ligand.get_identifier()))
+
     def test_AutoDockVina_docking_parallelized(self):
         docker = AutodockVina(
             input_pools=["RDkit"],
@@ -178,6 +219,8 @@ class Test_AutoDockVina_backend(unittest.TestCase):
                 number_poses=4,
                 receptor_pdbqt_path=[self.receptor_path],
                 seed=9,
+                # the line counts of the pose files below refer to poses translated by OpenBabel
+                native_pose_reader=False,
                 search_space=SearchSpace(
                     center_x=3.3,
                     center_y=11.5,
@@ -265,3 +308,94 @@ class Test_AutoDockVina_backend(unittest.TestCase):
         docker.write_docked_ligands(path=path_poses_best_per_enumeration,
                                     mode=self._CE.OUTPUT_MODE_BESTPERENUMERATION)
         self.assertEqual(lines_in_file(path_poses_best_per_enumeration), 2297)
+
+    def test_AutoDockVina_docking_time_limit(self):
+        docker = AutodockVina(
+            input_pools=["RDkit"],
+            parameters=AutodockVinaParameters(
+                parallelization=Parallelization(number_cores=2),
+                subjob_limits=SubjobLimits(time_limit_per_ligand=0.01),
+                number_poses=2,
+                receptor_pdbqt_path=[self.receptor_path],
+                search_space=SearchSpace(
+                    center_x=3.3,
+                    center_y=11.5,
+                    center_z=24.8,
+                    size_x=15,
+                    size_y=10,
+                    size_z=10
+                ),
+                prefix_execution="module load AutoDock_Vina"
+            )
+        )
+        docker.add_molecules(molecules=self.ligands_with_hydrogens[:2])
+        docker.dock()
+
+        # all subjobs are killed, which results in failed ligands with a reason
+        self.assertListEqual(docker.get_scores(best_only=True), ['NA', 'NA'])
+        failure_reasons = docker.get_failure_reasons()
+        self.assertEqual(2, len(failure_reasons))
+        self.assertTrue(all(["time limit" in reason for reason in failure_reasons.values()]))
+
+    def test_AutoDockVina_docking_deadline(self):
+        docker = AutodockVina(
+            input_pools=["RDkit"],
+            parameters=AutodockVinaParameters(
+                parallelization=Parallelization(number_cores=2),
+                number_poses=2,
+                receptor_pdbqt_path=[self.receptor_path],
+                search_space=SearchSpace(
+                    center_x=3.3,
+                    center_y=11.5,
+                    center_z=24.8,
+                    size_x=15,
+                    size_y=10,
+                    size_z=10
+                ),
+                prefix_execution="module load AutoDock_Vina"
+            )
+        )
+        docker.add_molecules(molecules=self.ligands_with_hydrogens[:3])
+
+        # a deadline in the past means no ligand is dispatched, but scores are reported for all of them
+        docker.set_deadline(time.time())
+        docker.dock()
+        self.assertListEqual(docker.get_scores(best_only=True), ['NA', 'NA', 'NA'])
+        self.assertEqual(3, len(docker.get_failure_reasons()))
+
+    def test_AutoDockVina_docking_batch_mode(self):
+        docker = AutodockVina(
+            input_pools=["RDkit"],
+            parameters=AutodockVinaParameters(
+                parallelization=Parallelization(number_cores=1),
+                number_poses=2,
+                receptor_pdbqt_path=[self.receptor_path],
+                seed=11,
+                batch_mode=True,
+                search_space=SearchSpace(
+                    center_x=3.3,
+                    center_y=11.5,
+                    center_z=24.8,
+                    size_x=15,
+                    size_y=10,
+                    size_z=10
+                ),
+                prefix_execution="module load AutoDock_Vina"
+            )
+        )
+        docker.add_molecules(molecules=self.ligands_with_hydrogens[:4])
+
+        # "--batch" requires AutoDock Vina 1.2; with older binaries, the ligands would be docked one by one
+        docker._initialize_executors()
+        if not docker._use_batch_mode():
+            self.skipTest("The AutoDock Vina binary does not support \"--batch\" (requires version 1.2 or later).")
+
+        # the poses of all ligands docked in one batch are assigned to the right ligands
+        docker.dock()
+        docked_ligands = docker.get_docked_ligands()
+        self.assertEqual(4, len(docked_ligands))
+        for ligand in docked_ligands:
+            self.assertEqual(2, len(ligand.get_conformers()))
+            for conformer in ligand.get_conformers():
+                self.assertTrue(conformer.GetProp("_Name").startswith(ligand.get_identifier()))
+        self.assertTrue(all([score < 0 for score in docker.get_scores(best_only=True)]))
@@ -0,0 +1,27 @@
+import unittest
+
+from dockstream.core.AutodockVina.AutodockVina_engines import get_engine_adapter
+
+
+class Test_AutoDockVina_engines(unittest.TestCase):
+
+    def test_adapters(self):
+        self.assertTrue(get_engine_adapter("vina").supports_batch)
+        self.assertFalse(get_engine_adapter("qvina2").supports_batch)
+        self.assertEqual(get_engine_adapter("qvina-w").binary, "qvina-w")
+        with self.assertRaises(ValueError):
+            get_engine_adapter("autodock4")
+
+    def test_scores_from_remarks(self):
+        self.assertEqual(get_engine_adapter("qvina2").get_score_from_remark(
+            "Name = ligand\nVINA RESULT:      -8.4      0.000      0.000"), "-8.4")
+        self.assertEqual(get_engine_adapter("smina").get_score_from_remark(
+            "minimizedAffinity -7.91234\n"), "-7.91234")
+
+    def test_affinity(self):
+        adapter = get_engine_adapter("vina")
+        self.assertEqual(adapter.get_affinity("Intramolecular energy: -0.5\nAffinity: -7.21234 (kcal/mol)\n"),
+                         "-7.21234")
+        self.assertEqual(adapter.get_affinity("Estimated Free Energy of Binding   : -6.982 (kcal/mol) "
+                                              "[=(1)+(2)+(3)+(4)]\n"), "-6.982")
+        self.assertIsNone(adapter.get_affinity("Reading input ... done."))
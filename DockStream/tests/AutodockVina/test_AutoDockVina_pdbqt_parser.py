@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import rdkit.Chem as Chem
+from rdkit.Chem import AllChem
+
+from dockstream.core.AutodockVina.AutodockVina_pdbqt_parser import AutodockVinaPDBQTParser, read_pdbqt_models
+from dockstream.utils.execute_external.OpenBabel import OpenBabelExecutor
+from dockstream.utils.enums.OpenBabel_enums import OpenBabelExecutablesEnum
+
+_BEE = OpenBabelExecutablesEnum()
+
+
+def _atom_line(serial: int, atom, position) -> str:
+    return "".join(["ATOM  ", f"{serial:5d}", " ", f"{atom.GetSymbol():<4}", " LIG A", f"{1:4d}", "    ",
+                    f"{position[0]:8.3f}{position[1]:8.3f}{position[2]:8.3f}", "  1.00  0.00    ",
+                    f"{0.0:6.3f} {atom.GetSymbol():<2}"])
+
+
+class Test_AutoDockVina_pdbqt_parser(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self.molecule = Chem.AddHs(Chem.MolFromSmiles("OC(=O)c1ccc(CN)cc1"))
+        AllChem.EmbedMolecule(self.molecule, randomSeed=42)
+        self.positions = self.molecule.GetConformer().GetPositions()
+
+        # like in a PDBQT written by OpenBabel, the atom order differs and only polar hydrogens are kept
+        self.pdbqt_order = [atom.GetIdx() for atom in reversed(list(self.molecule.GetAtoms()))
+                            if atom.GetAtomicNum() != 1 or atom.GetNeighbors()[0].GetAtomicNum() in (7, 8)]
+        self.input_path = os.path.join(self._folder, "input.pdbqt")
+        with open(self.input_path, 'w') as file:
+            for serial, index in enumerate(self.pdbqt_order, start=1):
+                file.write(_atom_line(serial, self.molecule.GetAtomWithIdx(index), self.positions[index]) + "\n")
+
+        # two poses: the input, shifted
+        self.shifts = [np.array([1.0, 2.0, 3.0]), np.array([-1.0, 0.0, 0.5])]
+        self.scores = [-7.1, -6.5]
+        self.output_path = os.path.join(self._folder, "output.pdbqt")
+        with open(self.output_path, 'w') as file:
+            for model_number, (shift, score) in enumerate(zip(self.shifts, self.scores), start=1):
+                file.write(f"MODEL {model_number}\n")
+                file.write(f"REMARK VINA RESULT: {score:8.3f}      0.000      0.000\n")
+                for serial, index in enumerate(self.pdbqt_order, start=1):
+                    file.write(_atom_line(serial, self.molecule.GetAtomWithIdx(index),
+                                          self.positions[index] + shift) + "\n")
+                file.write("ENDMDL\n")
+
+    def tearDown(self):
+        if os.path.isdir(self._folder):
+            shutil.rmtree(self._folder)
+
+    def test_read_models(self):
+        models = read_pdbqt_models(self.output_path)
+        self.assertListEqual([score for score, _ in models], self.scores)
+        self.assertEqual(models[0][1].shape, (len(self.pdbqt_order), 3))
+
+    def test_read_single_model(self):
+        # files written by "--local_only" hold a single pose without "MODEL" blocks
+        models = read_pdbqt_models(self.input_path)
+        self.assertEqual(len(models), 1)
+        np.testing.assert_allclose(models[0][1], self.positions[self.pdbqt_order], atol=1e-3)
+
+    def test_poses(self):
+        parser = AutodockVinaPDBQTParser(molecule=self.molecule, input_pdbqt_path=self.input_path)
+        self.assertTrue(parser.is_matched())
+        poses = parser.get_poses(self.output_path)
+        self.assertListEqual([score for _, score in poses], self.scores)
+
+        for (pose, _), shift in zip(poses, self.shifts):
+            # bond orders and atom order of the input molecule are kept
+            self.assertEqual(pose.GetNumAtoms(), self.molecule.GetNumAtoms())
+            self.assertEqual(Chem.MolToSmiles(Chem.RemoveHs(pose)), Chem.MolToSmiles(Chem.RemoveHs(self.molecule)))
+            self.assertListEqual([atom.GetAtomicNum() for atom in pose.GetAtoms()],
+                                 [atom.GetAtomicNum() for atom in self.molecule.GetAtoms()])
+
+            positions = pose.GetConformer().GetPositions()
+            np.testing.assert_allclose(positions[self.pdbqt_order], self.positions[self.pdbqt_order] + shift, atol=1e-3)
+
+            # non-polar hydrogens have been placed at their heavy atoms again
+            for atom in pose.GetAtoms():
+                if atom.GetAtomicNum() == 1:
+                    parent = atom.GetNeighbors()[0].GetIdx()
+                    self.assertTrue(0.9 < np.linalg.norm(positions[atom.GetIdx()] - positions[parent]) < 1.2)
+
+    def test_unmatched(self):
+        other = Chem.AddHs(Chem.MolFromSmiles("CCO"))
+        AllChem.EmbedMolecule(other, randomSeed=42)
+        parser = AutodockVinaPDBQTParser(molecule=other, input_pdbqt_path=self.input_path)
+        self.assertFalse(parser.is_matched())
+        self.assertListEqual(parser.get_poses(self.output_path), [])
+
+    def test_equal_to_OpenBabel(self):
+        executor = OpenBabelExecutor()
+        if not executor.is_available():
+            self.skipTest("OpenBabel is not available.")
+        output_sdf = os.path.join(self._folder, "output.sdf")
+        executor.execute(command=_BEE.OBABEL,
+                         arguments=[self.output_path, _BEE.OBABLE_INPUTFORMAT_PDBQT, _BEE.OBABEL_OUTPUT_FORMAT_SDF,
+                                    "".join([_BEE.OBABEL_O, output_sdf])],
+                         check=True)
+        reference = [molecule for molecule in Chem.SDMolSupplier(output_sdf, removeHs=False, sanitize=False)]
+
+        poses = AutodockVinaPDBQTParser(molecule=self.molecule, input_pdbqt_path=self.input_path).get_poses(self.output_path)
+        self.assertEqual(len(poses), len(reference))
+        for (pose, score), molecule in zip(poses, reference):
+            # OpenBabel keeps the PDBQT atom order and stores the score in the remarks
+            np.testing.assert_allclose(pose.GetConformer().GetPositions()[self.pdbqt_order],
+                                       molecule.GetConformer().GetPositions(), atol=1e-3)
+            self.assertIn(f"{score:.3f}", molecule.GetProp("REMARK"))
@@ -1,5 +1,6 @@
 import unittest
 import os
+import json
 import shutil
 from rdkit import Chem
 
@@ -7,8 +8,12 @@ from dockstream.containers.target_preparation_container import TargetPreparation
 from dockstream.core.AutodockVina.AutodockVina_target_preparator import AutodockVinaTargetPreparator
 
 from dockstream.utils.enums.AutodockVina_enums import AutodockTargetPreparationEnum
+from dockstream.utils.enums.AutodockVina_search_space_enums import AutodockSearchSpaceEnum
 from dockstream.utils.enums.OpenBabel_enums import OpenBabelExecutablesEnum
+from dockstream.utils.enums.docking_enum import DockingConfigurationEnum
 from dockstream.utils.execute_external.OpenBabel import OpenBabelExecutor
+from dockstream.utils.entry_point_functions.target_preparation import prepare_targets
+from dockstream.loggers.target_preparation_logger import TargetPreparationLogger
 
 from tests.tests_paths import PATHS_1UYD, PATH_AUTODOCKVINA_EXAMPLES
 from dockstream.utils.files_paths import attach_root_path
@@ -84,3 +89,82 @@ class Test_AutoDockVina_target_preparation(unittest.TestCase):
         self.assertListEqual([4.403, 5.122, 5.091], x_coords[:3])
         self.assertListEqual([15.528, 15.084, 13.786], y_coords[:3])
         self.assertListEqual([26.579, 25.453, 24.846], z_coords[:3])
+
+    def test_search_space_from_reference(self):
+        _SE = AutodockSearchSpaceEnum()
+        search_space_path = os.path.join(self._working_dir, "search_space.json")
+        self._conf[self._TE.TARGETPREP][self._TE.RUNS][0][self._TE.RUNS_OUTPUT][_SE.SEARCH_SPACE_PATH] = search_space_path
+        self._conf[self._TE.TARGETPREP][self._TE.RUNS][0][self._TE.RUNS_PARAM][self._TE.EXTRACT_BOX] = {
+            self._TE.EXTRACT_BOX_REFERENCE_LIGAND_PATH: attach_root_path(PATHS_1UYD.LIGAND_PU8_SDF),
+            self._TE.EXTRACT_BOX_REFERENCE_LIGAND_FORMAT: self._TE.EXTRACT_BOX_REFERENCE_LIGAND_FORMAT_SDF,
+            _SE.EXTRACT_BOX_MARGIN: 3.0
+        }
+
+        conf = TargetPreparationContainer(conf=self._conf)
+        prep = AutodockVinaTargetPreparator(conf=conf, target=self.target)
+        x_coords, y_coords, z_coords = prep._extract_box()
+        search_space = prep.get_search_space()
+
+        # the box is centered on the ligand and padded by the margin on every side
+        self.assertAlmostEqual(search_space["--center_x"], (min(x_coords) + max(x_coords)) / 2, places=2)
+        self.assertAlmostEqual(search_space["--center_z"], (min(z_coords) + max(z_coords)) / 2, places=2)
+        self.assertAlmostEqual(search_space["--size_y"], max(y_coords) - min(y_coords) + 6.0, places=2)
+
+        # the "search_space" block is written out, ready to be used in a docking configuration
+        prep._write_search_space(search_space_path, search_space)
+        with open(search_space_path, 'r') as f:
+            self.assertDictEqual(json.load(f)[_SE.SEARCH_SPACE], search_space)
+
+    def test_parallel_cached_preparation(self):
+        # prepare two copies of the same target into one output folder
+        targets_dir = os.path.join(self._working_dir, "targets")
+        os.makedirs(targets_dir, exist_ok=True)
+        target_paths = []
+        for name in ["first", "second"]:
+            target_paths.append(os.path.join(targets_dir, name + ".pdb"))
+            shutil.copyfile(attach_root_path(PATHS_1UYD.TARGET_APO_PDB), target_paths[-1])
+        receptor_path = os.path.join(self._working_dir, "receptor.pdbqt")
+        self._conf[self._TE.TARGETPREP][self._TE.RUNS][0][self._TE.RUNS_OUTPUT][self._TE.RECEPTOR_PATH] = receptor_path
+
+        prepare_targets(conf=self._conf, target_paths=target_paths, logger=TargetPreparationLogger(), number_cores=2)
+        first_receptor = os.path.join(self._working_dir, "first_receptor.pdbqt")
+        self.assertTrue(os.path.isfile(first_receptor))
+        self.assertTrue(os.path.isfile(os.path.join(self._working_dir, "second_receptor.pdbqt")))
+        self.assertTrue(os.path.isfile(first_receptor + ".run_0.dockstream_hash"))
+
+        # the second call must not touch the up-to-date output
+        modification_time = os.stat(first_receptor).st_mtime
+        prepare_targets(conf=self._conf, target_paths=target_paths, logger=TargetPreparationLogger(), number_cores=2)
+        self.assertEqual(modification_time, os.stat(first_receptor).st_mtime)
+
+    def test_cached_preparation_patches_docking_configuration(self):
+        _SE = AutodockSearchSpaceEnum()
+        _DE = DockingConfigurationEnum()
+        receptor_path = os.path.join(self._working_dir, "patched_receptor.pdbqt")
+        docking_conf_path = os.path.join(self._working_dir, "patched_docking.json")
+        docking_conf = {_DE.DOCKING: {_DE.DOCKING_RUNS: [{_DE.BACKEND: _DE.BACKEND_AUTODOCKVINA, _DE.PARAMS: {}}]}}
+        with open(docking_conf_path, 'w') as f:
+            json.dump(docking_conf, f)
+        run = self._conf[self._TE.TARGETPREP][self._TE.RUNS][0]
+        run[self._TE.RUNS_OUTPUT][self._TE.RECEPTOR_PATH] = receptor_path
+        run[self._TE.RUNS_PARAM][self._TE.EXTRACT_BOX] = {
+            self._TE.EXTRACT_BOX_REFERENCE_LIGAND_PATH: attach_root_path(PATHS_1UYD.LIGAND_PU8_SDF),
+            self._TE.EXTRACT_BOX_REFERENCE_LIGAND_FORMAT: self._TE.EXTRACT_BOX_REFERENCE_LIGAND_FORMAT_SDF,
+            _SE.EXTRACT_BOX_PATCH_DOCKING_CONFIGURATION: docking_conf_path
+        }
+
+        prepare_targets(conf=self._conf, target_paths=[attach_root_path(PATHS_1UYD.TARGET_APO_PDB)],
+                        logger=TargetPreparationLogger())
+        with open(docking_conf_path, 'r') as f:
+            search_space = json.load(f)[_DE.DOCKING][_DE.DOCKING_RUNS][0][_DE.PARAMS][_SE.SEARCH_SPACE]
+
+        # a regenerated docking configuration is patched, although the (up-to-date) preparation is skipped
+        with open(docking_conf_path, 'w') as f:
+            json.dump(docking_conf, f)
+        modification_time = os.stat(receptor_path).st_mtime
+        prepare_targets(conf=self._conf, target_paths=[attach_root_path(PATHS_1UYD.TARGET_APO_PDB)],
+                        logger=TargetPreparationLogger())
+        self.assertEqual(modification_time, os.stat(receptor_path).st_mtime)
+        with open(docking_conf_path, 'r') as f:
+            self.assertDictEqual(json.load(f)[_DE.DOCKING][_DE.DOCKING_RUNS][0][_DE.PARAMS][_SE.SEARCH_SPACE],
+                                 search_space)
@@ -1,2 +1,3 @@
 from tests.Gold.test_Gold_target_preparation import *
 from tests.Gold.test_Gold_backend import *
+from tests.Gold.test_Gold_template import *
@@ -0,0 +1,72 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest import mock
+from tests.tests_paths import MAIN_CONFIG
+if "CSDHOME" in MAIN_CONFIG:
+    os.environ["CSDHOME"] = MAIN_CONFIG["CSDHOME"]
+
+from ccdc.docking import Docker as DockerGold
+
+from dockstream.core.Gold.Gold_docker import Gold, GoldParameters, GoldFitnessFunction
+from dockstream.utils.enums.Gold_template_enums import GoldTemplateEnum
+
+from tests.tests_paths import PATH_GOLD_EXAMPLES
+from dockstream.utils.files_paths import attach_root_path
+
+
+class Test_Gold_template(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._GT = GoldTemplateEnum()
+        cls.target_path = attach_root_path(PATH_GOLD_EXAMPLES.TARGETFILE)
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self.docker = Gold(
+            input_pools=["Corina_pool"],
+            parameters=GoldParameters(
+                prefix_execution="module load ccdc/2020.3.0",
+                receptor_paths=[self.target_path],
+                fitness_function=GoldFitnessFunction.PLP,
+                early_termination=True,
+                autoscale=10.0,
+                prepared_target_folder=os.path.join(self._folder, "targets")
+            )
+        )
+
+    def tearDown(self):
+        if os.path.isdir(self._folder):
+            shutil.rmtree(self._folder)
+
+    def test_prepared_target_folder_reuse(self):
+        folder = self.docker._get_prepared_target_folder()
+        self.assertEqual(os.path.dirname(folder), os.path.join(self._folder, "targets"))
+        self.assertTrue(os.path.basename(folder).startswith(self._GT.TARGET_FOLDER_PREFIX))
+        self.assertTrue(os.path.isfile(os.path.join(folder, self._GT.PROTEIN_MOL2_NAME)))
+
+        # a second run (with the same pickled target) reuses the folder without preparing the protein again
+        with mock.patch.object(Gold, "_prepare_protein") as prepare_protein:
+            self.assertEqual(folder, self.docker._get_prepared_target_folder())
+            prepare_protein.assert_not_called()
+
+        # no temporary folders are left behind
+        self.assertListEqual(os.listdir(os.path.join(self._folder, "targets")), [os.path.basename(folder)])
+
+    def test_settings_template_round_trip(self):
+        target_folder = self.docker._get_prepared_target_folder()
+        run_folder = os.path.join(self._folder, "run")
+        os.makedirs(run_folder)
+        template_path = self.docker._write_settings_template(target_folder, run_folder)
+        self.assertEqual(template_path, os.path.join(run_folder, self._GT.SETTINGS_TEMPLATE_NAME))
+
+        # the subjobs load the template and only add their ligands and output
+        settings = DockerGold.Settings.from_file(template_path)
+        self.assertEqual(settings.fitness_function.lower(), GoldFitnessFunction.PLP.value)
+        self.assertEqual(settings.autoscale, 10.0)
+        self.assertTrue(settings.early_termination)
+        self.assertEqual(1, len(settings.protein_files))
+        self.assertEqual(os.path.basename(settings.protein_files[0].file_name), self._GT.PROTEIN_MOL2_NAME)
+        self.assertTrue(settings.reference_ligand_file.startswith(target_folder))
@@ -1,6 +1,7 @@
 import unittest
 
-from dockstream.core.RDkit.RDkit_stereo_enumerator import RDKitStereoEnumerator, RDKitStereoEnumeratorParameters
+from dockstream.core.RDkit.RDkit_stereo_enumerator import RDKitStereoEnumerator, RDKitStereoEnumeratorParameters, \
+    take_stereo_embedded_molecule
 
 from tests.tests_paths import PATHS_1UYD
 from dockstream.utils.files_paths import attach_root_path
@@ -68,3 +69,40 @@ class Test_RDkit_stereo_enumeration(unittest.TestCase):
                                  [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 16, 16, 16])
             self.assertListEqual(list_enumeration_numbers,
                                  [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 2, 3])
+
+        def test_RDkit_stereo_enumerator_keep_embeddings(self):
+            enum = RDKitStereoEnumerator(
+                parameters=RDKitStereoEnumeratorParameters(
+                    try_embedding=True,
+                    unique=True,
+                    max_isomers=1024))
+            enum_result = enum.enumerate(ligands=self.ligands[-1:], keep_embeddings=True)
+
+            # the isomers carry their conformers, until they are taken over by the preparator
+            self.assertEqual(len(enum_result), 4)
+            for result in enum_result:
+                self.assertEqual(result.get_molecule().GetNumConformers(), 1)
+                molecule = take_stereo_embedded_molecule(result)
+                self.assertEqual(molecule.GetNumConformers(), 1)
+                self.assertIsNone(result.get_molecule())
+
+            # a changed smile invalidates the conformer
+            enum_result = enum.enumerate(ligands=self.ligands[-1:], keep_embeddings=True)
+            enum_result[0].set_smile("CCO")
+            self.assertIsNone(take_stereo_embedded_molecule(enum_result[0]))
+
+        def test_RDkit_stereo_enumerator_keep_embeddings_max_isomers(self):
+            enum = RDKitStereoEnumerator(
+                parameters=RDKitStereoEnumeratorParameters(
+                    try_embedding=True,
+                    unique=True,
+                    max_isomers=2))
+
+            # keeping the embeddings must not change which (and how many) isomers are enumerated
+            enum_result = enum.enumerate(ligands=self.ligands[-1:])
+            enum_result_embedded = enum.enumerate(ligands=self.ligands[-1:], keep_embeddings=True)
+            self.assertEqual(len(enum_result_embedded), 2)
+            self.assertListEqual([ligand.get_smile() for ligand in enum_result],
+                                 [ligand.get_smile() for ligand in enum_result_embedded])
+            for result in enum_result_embedded:
+                self.assertEqual(take_stereo_embedded_molecule(result).GetNumConformers(), 1)
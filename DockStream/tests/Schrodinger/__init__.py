@@ -1,3 +1,4 @@
 from tests.Schrodinger.test_Schrodinger_backend import *
 from tests.Schrodinger.test_token_guard import *
 from tests.Schrodinger.test_ligprep_ligand_preparation import *
+from tests.Schrodinger.test_Glide_funnel import *
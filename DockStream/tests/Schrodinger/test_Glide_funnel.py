@@ -0,0 +1,91 @@
+import unittest
+from unittest import mock
+
+import rdkit.Chem as Chem
+from pydantic import ValidationError
+
+from dockstream.core.Schrodinger.Glide_docker import Glide, GlideParameters, GlideFunnel, GlideFunnelStage, \
+                                                   select_top_fraction
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.utils.execute_external.Schrodinger import SchrodingerExecutor
+from dockstream.utils.enums.Glide_funnel_enums import GlideFunnelEnum
+from dockstream.utils.enums.Schrodinger_enums import SchrodingerOutputEnum
+from dockstream.utils.enums.RDkit_enums import RDkitLigandPreparationEnum
+
+
+def _fake_dock_stage(docker, number_cores, precision=None):
+    # ligand "n" scores "-n" (better in later stages); ligand 9 fails in every stage but the first
+    _ROE = SchrodingerOutputEnum()
+    for ligand in docker.ligands:
+        if precision != "HTVS" and ligand.get_ligand_number() == 9:
+            docker._failure_reasons[ligand.get_identifier()] = "subjob terminated with exit code 1"
+            continue
+        score = -ligand.get_ligand_number() - (0 if precision == "HTVS" else 0.5)
+        conformer = Chem.MolFromSmiles("CCO")
+        conformer.SetProp(_ROE.GLIDE_DOCKING_SCORE, str(score))
+        ligand.add_conformer(conformer)
+
+
+class Test_Glide_funnel(unittest.TestCase):
+
+    def test_default_stages(self):
+        funnel = GlideFunnel()
+        self.assertListEqual([stage.precision for stage in funnel.stages], ["HTVS", "SP", "XP"])
+        self.assertListEqual([stage.fraction for stage in funnel.stages], [1.0, 0.1, 0.1])
+
+    def test_validation(self):
+        with self.assertRaises(ValidationError):
+            GlideFunnel(stages=[])
+        with self.assertRaises(ValidationError):
+            GlideFunnelStage(precision="SP", fraction=0)
+        with self.assertRaises(ValidationError):
+            GlideFunnelStage(precision="SP", fraction=1.5)
+
+    def test_select_top_fraction(self):
+        best_scores = {"0:0": -5.1, "1:0": -8.3, "2:0": -6.0, "3:0": -2.2, "4:0": -7.7}
+        self.assertListEqual(select_top_fraction(best_scores, 0.4), ["1:0", "4:0"])
+        self.assertListEqual(select_top_fraction(best_scores, 0.5), ["1:0", "4:0", "2:0"])
+        self.assertListEqual(select_top_fraction(best_scores, 0.01), ["1:0"])
+        self.assertEqual(len(select_top_fraction(best_scores, 1.0)), 5)
+        self.assertListEqual(select_top_fraction({}, 0.5), [])
+
+    def test_dock_funnel(self):
+        _GF = GlideFunnelEnum()
+        _LP = RDkitLigandPreparationEnum()
+        with mock.patch.object(SchrodingerExecutor, "is_available", return_value=True):
+            docker = Glide(parameters=GlideParameters(funnel=GlideFunnel(stages=[
+                GlideFunnelStage(precision="HTVS"),
+                GlideFunnelStage(precision="SP", fraction=0.3),
+                GlideFunnelStage(precision="XP", fraction=0.5)])))
+        docker.add_molecules(molecules=[Ligand(smile="CCO", original_smile="CCO", ligand_number=number,
+                                               enumeration=0, molecule=Chem.MolFromSmiles("CCO"),
+                                               mol_type=_LP.TYPE_RDKIT)
+                                        for number in range(10)])
+        all_ligands = docker.ligands
+
+        handed_over = []
+
+        def record_stage(docker, number_cores, precision=None):
+            handed_over.append((precision, [ligand.get_ligand_number() for ligand in docker.ligands]))
+            _fake_dock_stage(docker, number_cores, precision)
+
+        with mock.patch.object(Glide, "_dock_stage", autospec=True, side_effect=record_stage):
+            docker._dock_funnel(number_cores=1)
+
+        # all ligands are docked with HTVS, the best 30% with SP and the best half (rounded up) of those docked in SP
+        # with XP; ligand 9 failed in SP, so it is not ranked on its HTVS score against the SP scores
+        self.assertListEqual(handed_over, [("HTVS", list(range(10))), ("SP", [7, 8, 9]), ("XP", [8])])
+        self.assertIs(docker.ligands, all_ligands)
+        self.assertEqual(10, len(docker.ligands))
+
+        # the poses (and stage) are taken from the deepest stage a ligand reached; ligand 9 failed in "SP" and keeps
+        # its "HTVS" poses without being reported as failed
+        stages = {ligand.get_ligand_number(): [int(conformer.GetProp(_GF.TAG_FUNNEL_STAGE))
+                                               for conformer in ligand.get_conformers()]
+                  for ligand in docker.ligands}
+        self.assertListEqual(stages[0], [1])
+        self.assertListEqual(stages[7], [2])
+        self.assertListEqual(stages[8], [3])
+        self.assertListEqual(stages[9], [1])
+        self.assertEqual(docker._get_score_from_conformer(docker.ligands[9].get_conformers()[0]), -9)
+        self.assertNotIn("9:0", docker.get_failure_reasons())
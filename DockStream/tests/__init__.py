@@ -1,3 +1,9 @@
 from tests.test_PDBPreparation import *
 from tests.test_ligand_preparation import *
+from tests.test_ligand_filter import *
+from tests.test_surrogate import *
+from tests.test_result_output import *
+from tests.test_pose_archive import *
+from tests.test_output_writer import *
+from tests.test_result_ingestion import *
 from tests.tests_translation import Test_molecule_container_translation
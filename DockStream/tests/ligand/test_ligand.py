@@ -0,0 +1,78 @@
+import unittest
+from copy import deepcopy
+
+from rdkit import Chem
+
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+
+_LP = LigandPreparationEnum()
+
+
+class Test_ligand(unittest.TestCase):
+
+    def test_graph_cache(self):
+        ligand = Ligand(smile="OC1=CC=CC=C1", original_smile="OC1=CC=CC=C1", ligand_number=0)
+        graph = ligand.get_graph()
+        self.assertEqual(graph.GetNumAtoms(), 7)
+        self.assertIs(graph, ligand.get_graph())
+        self.assertEqual(ligand.get_canonical_smile(), "Oc1ccccc1")
+
+        # copies are independent of the cache, clones share it
+        copy = ligand.get_graph_copy()
+        self.assertIsNot(copy, graph)
+        self.assertIs(ligand.get_clone().get_graph(), graph)
+
+        # setting the same smile keeps the cache, a different one invalidates it
+        ligand.set_smile("OC1=CC=CC=C1")
+        self.assertIs(graph, ligand.get_graph())
+        ligand.set_smile("CCO")
+        self.assertEqual(ligand.get_graph().GetNumAtoms(), 3)
+        self.assertEqual(ligand.get_canonical_smile(), "CCO")
+
+        # unparsable smiles yield no graph
+        ligand.set_smile("C1CC")
+        self.assertIsNone(ligand.get_graph())
+        self.assertIsNone(ligand.get_graph_copy())
+        self.assertIsNone(ligand.get_canonical_smile())
+
+    def test_slots(self):
+        ligand = Ligand(smile="CCO", original_smile="CCO", ligand_number=0, name="ethanol")
+        self.assertFalse(hasattr(ligand, "__dict__"))
+        with self.assertRaises(AttributeError):
+            ligand.unknown_attribute = 1
+        with self.assertRaises(ValueError):
+            ligand.set_mol_type("unknown")
+
+        # repeated names and original smiles of enumerations are stored only once
+        enumeration = Ligand(smile="CCO", original_smile="".join(["CC", "O"]), ligand_number=0, enumeration=1,
+                             name="".join(["eth", "anol"]))
+        self.assertIs(ligand.get_name(), enumeration.get_name())
+        self.assertIs(ligand.get_original_smile(), enumeration.get_original_smile())
+
+    def test_copy_on_write(self):
+        ligand = Ligand(smile="CCO", original_smile="CCO", ligand_number=0, molecule=Chem.MolFromSmiles("CCO"),
+                        mol_type=_LP.TYPE_RDKIT)
+        ligand.add_conformer(Chem.MolFromSmiles("CCO"))
+
+        # clones share molecule and conformers, but not the list of conformers
+        clone = ligand.get_clone()
+        self.assertIs(clone.get_molecule(), ligand.get_molecule())
+        self.assertIs(clone.get_conformers()[0], ligand.get_conformers()[0])
+        clone.add_conformer(Chem.MolFromSmiles("CCO"))
+        self.assertEqual(len(ligand.get_conformers()), 1)
+
+        # tagging copies first, leaving the original untouched
+        clone.set_ligand_number(5)
+        clone.add_tags_to_molecule()
+        clone.add_tags_to_conformers()
+        self.assertIsNot(clone.get_molecule(), ligand.get_molecule())
+        self.assertIsNot(clone.get_conformers()[0], ligand.get_conformers()[0])
+        self.assertEqual(clone.get_molecule().GetProp("_Name"), "5:0")
+        self.assertFalse(ligand.get_molecule().HasProp("_Name"))
+        self.assertFalse(ligand.get_conformers()[0].HasProp("_Name"))
+
+        # deep copies are independent right away
+        copy = deepcopy(ligand)
+        self.assertIsNot(copy.get_molecule(), ligand.get_molecule())
+        self.assertIsNot(copy.get_conformers()[0], ligand.get_conformers()[0])
@@ -1,2 +1,4 @@
 from tests.rDock.test_rDock_target_preparation import *
 from tests.rDock.test_rDock_backend import *
+from tests.rDock.test_rDock_htvs import *
+from tests.rDock.test_rDock_cavity_cache import *
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dockstream.core.rDock.rDock_cavity_cache import rDockCavityCache, compute_cavity_key, get_artefact_path
+
+
+class Test_rDock_cavity_cache(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self.paths = []
+        for name, content in [("template.prm", "RECEPTOR_FILE <receptor>"), ("target.mol2", "@<TRIPOS>MOLECULE"),
+                              ("ref_ligand.sdf", "$$$$")]:
+            path = os.path.join(self._folder, name)
+            with open(path, 'w') as f:
+                f.write(content)
+            self.paths.append(path)
+        self.cache = rDockCavityCache(folder=os.path.join(self._folder, "cache"))
+
+    def tearDown(self):
+        if os.path.isdir(self._folder):
+            shutil.rmtree(self._folder)
+
+    def test_key(self):
+        key = compute_cavity_key(self.paths)
+        self.assertEqual(key, compute_cavity_key(list(self.paths)))
+        self.assertNotEqual(key, compute_cavity_key(list(reversed(self.paths))))
+
+        # a change of the receptor changes the key
+        with open(self.paths[1], 'a') as f:
+            f.write("\n")
+        self.assertNotEqual(key, compute_cavity_key(self.paths))
+
+    def test_store_retrieve(self):
+        key = compute_cavity_key(self.paths)
+        prm_path = os.path.join(self._folder, "rbcavity_updated.prm")
+        cavity_path = get_artefact_path(prm_path, ".as")
+        self.assertEqual(cavity_path, os.path.join(self._folder, "rbcavity_updated.as"))
+        self.assertFalse(self.cache.retrieve(key, ".as", cavity_path))
+        self.assertIsNone(self.cache.retrieve_text(key, "rbcavity.log"))
+
+        with open(cavity_path, 'w') as f:
+            f.write("cavity")
+        self.cache.store(key, ".as", cavity_path)
+        self.cache.store_text(key, "rbcavity.log", "Total volume 1025.75 A^3")
+        os.remove(cavity_path)
+
+        self.assertTrue(self.cache.retrieve(key, ".as", cavity_path))
+        with open(cavity_path, 'r') as f:
+            self.assertEqual(f.read(), "cavity")
+        self.assertEqual(self.cache.retrieve_text(key, "rbcavity.log"), "Total volume 1025.75 A^3")
+
+        # no temporary files are left behind
+        self.assertListEqual(sorted(os.listdir(os.path.join(self._folder, "cache", key))), [".as", "rbcavity.log"])
@@ -0,0 +1,37 @@
+import unittest
+
+from pydantic import ValidationError
+
+from dockstream.core.rDock.rDock_docker import rDockHTVS, rDockHTVSStage
+
+
+class Test_rDock_htvs(unittest.TestCase):
+
+    def setUp(self):
+        self.htvs = rDockHTVS(stages=[rDockHTVSStage(score_threshold=-10, max_runs=5),
+                                      rDockHTVSStage(score_threshold=-20, max_runs=15)],
+                              number_runs=30)
+
+    def test_filter_definition(self):
+        self.assertEqual(self.htvs.get_filter_definition(),
+                         "3\n"
+                         "if - -10.0 SCORE.INTER 1.0 if - SCORE.NRUNS 4 0.0 -1.0,\n"
+                         "if - -20.0 SCORE.INTER 1.0 if - SCORE.NRUNS 14 0.0 -1.0,\n"
+                         "- SCORE.NRUNS 29,\n"
+                         "0\n")
+        self.assertTrue(self.htvs.is_generated())
+        self.assertFalse(rDockHTVS(filter_path="htvs.txt").is_generated())
+
+    def test_stage(self):
+        self.assertEqual(self.htvs.get_stage([-5.0, -9.9]), 1)
+        self.assertEqual(self.htvs.get_stage([-5.0, -12.3, -19.0]), 2)
+        self.assertEqual(self.htvs.get_stage([-25.1, -12.3]), 3)
+
+    def test_validation(self):
+        with self.assertRaises(ValidationError):
+            rDockHTVS()
+        with self.assertRaises(ValidationError):
+            rDockHTVS(stages=[rDockHTVSStage(score_threshold=-10, max_runs=15),
+                              rDockHTVSStage(score_threshold=-20, max_runs=5)])
+        with self.assertRaises(ValidationError):
+            rDockHTVS(stages=[rDockHTVSStage(score_threshold=-10, max_runs=50)], number_runs=50)
@@ -0,0 +1,41 @@
+import unittest
+
+from rdkit import Chem
+from rdkit.Chem import AllChem
+
+from dockstream.core.ligand_filter import LigandFilter, PropertyWindow
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
+
+_LP = LigandPreparationEnum()
+
+
+class Test_ligand_filter(unittest.TestCase):
+
+    def setUp(self):
+        smiles = ["c1ccccc1O", "CC(=O)Cl", "CCCCCCCCCCCCCCCCCCCC", "c1ccc2ccccc2c1C(=O)NCc1ccccc1"]
+        self.ligands = []
+        for number, smile in enumerate(smiles):
+            mol = Chem.AddHs(Chem.MolFromSmiles(smile))
+            AllChem.EmbedMolecule(mol, randomSeed=42)
+            self.ligands.append(Ligand(smile=smile, original_smile=smile, ligand_number=number,
+                                       molecule=mol, mol_type=_LP.TYPE_RDKIT))
+
+    def test_graph_filters(self):
+        ligand_filter = LigandFilter(smarts_alerts=["C(=O)[Cl,Br,I]"],
+                                     property_windows={"MolWt": PropertyWindow(minimum=50, maximum=300)},
+                                     max_rotatable_bonds=8)
+        rejections = ligand_filter.get_rejections(self.ligands)
+        self.assertListEqual(sorted(rejections.keys()), ["1:0", "2:0"])
+        self.assertIn("alert", rejections["1:0"])
+
+    def test_box_extent(self):
+        ligand_filter = LigandFilter(check_box_extent=True)
+        self.assertDictEqual(ligand_filter.get_rejections(self.ligands, box_size=None), {})
+        rejections = ligand_filter.get_rejections(self.ligands, box_size=(10, 10, 10))
+        self.assertIn("2:0", rejections.keys())
+        self.assertNotIn("0:0", rejections.keys())
+
+    def test_unknown_descriptor(self):
+        with self.assertRaises(ValueError):
+            LigandFilter(property_windows={"NotADescriptor": PropertyWindow(maximum=1)})
@@ -3,6 +3,8 @@ import unittest
 from rdkit import Chem
 
 from dockstream.core.ligand_preparator import LigandPreparator, Input
+from dockstream.core.ligand.ligand import Ligand
+from dockstream.core.ligand.ligand_deduplication import expand_duplicates
 from dockstream.utils.enums.ligand_preparation_enum import LigandPreparationEnum
 from dockstream.utils.enums.docking_enum import DockingConfigurationEnum
 
@@ -28,3 +30,20 @@ class Test_ligand_preparation(unittest.TestCase):
         )
         self.assertEqual(len(prep.get_ligands()), 15)
         self.assertEqual(type(prep.get_ligands()), list)
+
+    def test_deduplication(self):
+        smiles = ["c1ccccc1O", "Oc1ccccc1", "CCO", "c1ccccc1O", "OCC"]
+        ligands = [Ligand(smile=smile, original_smile=smile, ligand_number=number) for number, smile in enumerate(smiles)]
+        prep = LigandPreparator(
+            ligands=ligands,
+            pool_id="testPool",
+            input=Input(deduplicate=True)
+        )
+        self.assertListEqual([lig.get_ligand_number() for lig in prep.get_ligands()], [0, 2])
+        self.assertListEqual([(rep, dup.get_ligand_number()) for rep, dup in prep.get_duplicates()],
+                             [(0, 1), (0, 3), (2, 4)])
+
+        # the results are fanned out again with the duplicates' numbers and original SMILES
+        clones = expand_duplicates(prep.get_ligands(), prep.get_duplicates())
+        self.assertListEqual([lig.get_ligand_number() for lig in clones], [1, 3, 4])
+        self.assertListEqual([lig.get_original_smile() for lig in clones], ["Oc1ccccc1", "c1ccccc1O", "OCC"])
@@ -0,0 +1,46 @@
+import time
+import unittest
+
+from dockstream.loggers.docking_logger import DockingLogger
+from dockstream.utils.entry_point_functions.output_writer import OutputWriter
+from dockstream.utils.dockstream_exceptions import DockingRunFailed
+
+
+class Test_output_writer(unittest.TestCase):
+
+    def setUp(self):
+        self._logger = DockingLogger()
+
+    def test_order_and_flush(self):
+        written = []
+
+        def job(number):
+            time.sleep(0.01)
+            written.append(number)
+
+        writer = OutputWriter(logger=self._logger, max_pending=1, asynchronous=True)
+        for number in range(5):
+            writer.submit(str(number), lambda number=number: job(number))
+        writer.flush()
+        self.assertListEqual(written, [0, 1, 2, 3, 4])
+        writer.close()
+
+    def test_failure(self):
+        written = []
+
+        def fail():
+            raise IOError("disk full")
+
+        writer = OutputWriter(logger=self._logger, asynchronous=True)
+        writer.submit("run1", fail)
+        with self.assertRaises(DockingRunFailed):
+            # depending on timing, the failure is raised on the next submission or when closing
+            writer.submit("run2", lambda: written.append("run2"))
+            writer.close()
+        self.assertListEqual(written, [])
+
+    def test_synchronous(self):
+        writer = OutputWriter(logger=self._logger)
+        with self.assertRaises(DockingRunFailed):
+            writer.submit("run1", lambda: 1 / 0)
+        writer.close()
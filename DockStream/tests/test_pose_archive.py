@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rdkit import Chem
+from rdkit.Chem import AllChem
+
+from dockstream.core.pose_archive import PoseArchive, PoseKey
+
+
+class Test_pose_archive(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self._path = os.path.join(self._folder, "poses.posearchive")
+
+    def tearDown(self):
+        if os.path.isdir(self._folder):
+            shutil.rmtree(self._folder)
+
+    @staticmethod
+    def _poses(smiles: list) -> list:
+        poses = []
+        for ligand_number, smile in enumerate(smiles):
+            for conformer_number in range(2):
+                molecule = Chem.AddHs(Chem.MolFromSmiles(smile))
+                AllChem.EmbedMolecule(molecule, randomSeed=42 + conformer_number)
+                molecule.SetProp("_Name", f"{ligand_number}:0:{conformer_number}")
+                molecule.SetProp("score", str(-5.0 - ligand_number - conformer_number))
+                poses.append(molecule)
+        return poses
+
+    def test_append_and_get(self):
+        archive = PoseArchive(self._path)
+        self.assertEqual(archive.append(self._poses(["CCO", "c1ccccc1"]), mol_type="rdkit", run_id="run1", step="0"),
+                         4)
+        self.assertEqual(archive.append(self._poses(["CCN"]), mol_type="rdkit", run_id="run1", step="1"), 2)
+        self.assertEqual(len(archive.get_keys()), 6)
+
+        pose = archive.get(1, 0, 1, run_id="run1", step="0")
+        self.assertEqual(pose.GetProp("_Name"), "1:0:1")
+        self.assertEqual(pose.GetProp("score"), "-7.0")
+        self.assertEqual(pose.GetNumAtoms(), 12)
+        self.assertEqual(pose.GetNumConformers(), 1)
+        self.assertIsNone(archive.get(1, 0, 1, run_id="run1", step="1"))
+
+        # a second reader sees everything written so far and picks up later appends
+        reader = PoseArchive(self._path)
+        self.assertIn(PoseKey("run1", "1", 0, 0, 1), reader.get_keys())
+        archive.append(self._poses(["CCC"]), mol_type="rdkit", run_id="run2")
+        self.assertEqual(len(reader.get_keys()), 8)
+        self.assertEqual(Chem.MolToSmiles(Chem.RemoveHs(reader.get(0, run_id="run2"))), "CCC")
+
+    def test_to_sdf(self):
+        archive = PoseArchive(self._path)
+        archive.append(self._poses(["CCO", "c1ccccc1"]), mol_type="rdkit", run_id="run1", step="0")
+        archive.append(self._poses(["CCN"]), mol_type="rdkit", run_id="run1", step="1")
+        sdf_path = os.path.join(self._folder, "poses.sdf")
+        self.assertEqual(archive.to_sdf(sdf_path, step="0"), 4)
+        molecules = [molecule for molecule in Chem.SDMolSupplier(sdf_path, removeHs=False)]
+        self.assertListEqual([molecule.GetProp("_Name") for molecule in molecules],
+                             ["0:0:0", "0:0:1", "1:0:0", "1:0:1"])
+        self.assertEqual(archive.to_sdf(sdf_path), 6)
@@ -0,0 +1,56 @@
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+
+from rdkit import Chem
+from rdkit.Chem import AllChem
+
+from dockstream.core.result_ingestion import convert_to_binaries, get_binaries_path, iter_sdf_molecules, \
+                                             read_result_molecules
+
+
+class Test_result_ingestion(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self._path_sdf = os.path.join(self._folder, "results.sdf")
+        writer = Chem.SDWriter(self._path_sdf)
+        for number, smile in enumerate(["CCO", "c1ccccc1", "CC(=O)N"]):
+            molecule = Chem.AddHs(Chem.MolFromSmiles(smile))
+            AllChem.EmbedMolecule(molecule, randomSeed=42)
+            molecule.SetProp("_Name", f"{number}:0")
+            molecule.SetProp("score", str(-number))
+            writer.write(molecule)
+        writer.close()
+
+    def tearDown(self):
+        if os.path.isdir(self._folder):
+            shutil.rmtree(self._folder)
+
+    def test_gzipped(self):
+        path_gz = os.path.join(self._folder, "results_lib.sdfgz")
+        with open(self._path_sdf, "rb") as fin, gzip.open(path_gz, "wb") as fout:
+            shutil.copyfileobj(fin, fout)
+        molecules = list(iter_sdf_molecules(path_gz))
+        self.assertListEqual([molecule.GetProp("_Name") for molecule in molecules], ["0:0", "1:0", "2:0"])
+        self.assertEqual(molecules[1].GetNumAtoms(), 12)
+
+        # without binaries, a (still gzipped) result is parsed by the fallback as well
+        self.assertEqual(len(read_result_molecules(path_gz)), 3)
+
+    def test_binaries(self):
+        self.assertEqual(convert_to_binaries(self._path_sdf), 3)
+        self.assertTrue(os.path.isfile(get_binaries_path(self._path_sdf)))
+
+        # the binaries take precedence over the SDF and keep all properties and coordinates
+        os.remove(self._path_sdf)
+        molecules = read_result_molecules(self._path_sdf)
+        self.assertListEqual([molecule.GetProp("score") for molecule in molecules], ["0", "-1", "-2"])
+        self.assertEqual(molecules[2].GetNumConformers(), 1)
+
+    def test_missing_results(self):
+        self.assertEqual(convert_to_binaries(os.path.join(self._folder, "missing.sdf")), 0)
+        self.assertListEqual(read_result_molecules(os.path.join(self._folder, "missing.sdf")), [])
+        self.assertEqual(len(read_result_molecules(self._path_sdf)), 3)
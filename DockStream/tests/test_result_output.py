@@ -0,0 +1,39 @@
+import unittest
+
+import pandas as pd
+
+from dockstream.core.docker import Docker
+from dockstream.core.result_parser import set_result_column_types
+from dockstream.utils.enums.docking_enum import ResultKeywordsEnum
+
+_RK = ResultKeywordsEnum()
+
+
+class Test_result_output(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({_RK.DF_LIGAND_NUMBER: [0, 0, 0, 0, 1, 1],
+                                _RK.DF_LIGAND_ENUMERATION: [0, 0, 1, 1, 0, 0],
+                                _RK.DF_CONFORMER: [0, 1, 0, 1, 0, 1],
+                                _RK.DF_LIGAND_NAME: ["a", "a", "a", "a", "b", "b"],
+                                _RK.DF_SCORE: [-7.5, -7.0, -9.1, -8.2, -6.0, -6.0],
+                                _RK.DF_SMILES: ["CCO", "CCO", "CCO", "CCO", "CCN", "CCN"],
+                                _RK.DF_LOWEST_CONFORMER: [True, False, True, False, True, False]})
+
+    def test_column_types(self):
+        df = set_result_column_types(self.df)
+        self.assertEqual(str(df[_RK.DF_LIGAND_NUMBER].dtype), "int32")
+        self.assertEqual(str(df[_RK.DF_SCORE].dtype), "float64")
+        self.assertEqual(str(df[_RK.DF_SMILES].dtype), "category")
+        self.assertListEqual(list(df[_RK.DF_SMILES].cat.categories), ["CCN", "CCO"])
+
+    def test_select_best(self):
+        df = set_result_column_types(self.df)
+        best_per_enumeration = Docker._select_best(df, keys=[_RK.DF_LIGAND_NUMBER, _RK.DF_LIGAND_ENUMERATION],
+                                                   best="min")
+        self.assertListEqual(list(best_per_enumeration[_RK.DF_SCORE]), [-7.5, -9.1, -6.0])
+        best_per_ligand = Docker._select_best(df, keys=[_RK.DF_LIGAND_NUMBER], best="min")
+        self.assertListEqual(list(best_per_ligand[_RK.DF_SCORE]), [-9.1, -6.0])
+        self.assertListEqual(list(best_per_ligand[_RK.DF_CONFORMER]), [0, 0])
+        best_per_ligand = Docker._select_best(df, keys=[_RK.DF_LIGAND_NUMBER], best="max")
+        self.assertListEqual(list(best_per_ligand[_RK.DF_SCORE]), [-7.0, -6.0])
@@ -0,0 +1,45 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from dockstream.core.surrogate import Surrogate
+from dockstream.core.ligand.ligand import Ligand
+
+
+class Test_surrogate(unittest.TestCase):
+
+    def setUp(self):
+        self._store_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        if os.path.isdir(self._store_folder):
+            shutil.rmtree(self._store_folder)
+
+    @staticmethod
+    def _ligands(smiles: list) -> list:
+        return [Ligand(smile=smile, original_smile=smile, ligand_number=number) for number, smile in enumerate(smiles)]
+
+    def test_skip_and_incremental_update(self):
+        surrogate = Surrogate(store_folder=self._store_folder, threshold=-8.0, margin=1.0, minimum_training_size=4,
+                              number_neighbours=2)
+        surrogate.set_context("receptor_A")
+
+        # too few results to decide anything
+        self.assertDictEqual(surrogate.get_skipped(self._ligands(["CCCCO"])), {})
+
+        # alkyl chains dock poorly, the polyaromatic compounds well
+        training = self._ligands(["CCCCCO", "CCCCCCO", "c1ccc2cc3ccccc3cc2c1", "c1ccc2cc3cc4ccccc4cc3cc2c1"])
+        surrogate.update(list(zip(training, [-3.0, -3.2, -9.5, -10.1])))
+        self.assertEqual(4, surrogate.get_training_size())
+
+        skipped = surrogate.get_skipped(self._ligands(["CCCCCCCO", "c1ccc2cc3cc4cc5ccccc5cc4cc3cc2c1"]))
+        self.assertListEqual(list(skipped.keys()), ["0:0"])
+        self.assertLess(skipped["0:0"], -2.9)
+
+        # the results are persisted per context
+        reloaded = Surrogate(store_folder=self._store_folder, threshold=-8.0)
+        reloaded.set_context("receptor_A")
+        self.assertEqual(4, reloaded.get_training_size())
+        reloaded.set_context("receptor_B")
+        self.assertEqual(0, reloaded.get_training_size())